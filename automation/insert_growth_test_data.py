@@ -11,10 +11,16 @@ Usage:
 import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import sys
 from datetime import datetime, timedelta
 import uuid
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from models import GrowthEvent, GrowthEventType, ContractorGrowthRole
+from services.growth_service import GrowthService
+
 # Load environment
 load_dotenv("backend/providers/providers.env")
 
@@ -144,18 +150,41 @@ async def insert_test_data():
         jobs_inserted += 1
         print(f"   ✓ Inserted job {i}: {job_id}")
 
-    # 4. Verify growth unlock should trigger
+    # 4. Emit growth events for the completed jobs (one bulk call, one summary update)
+    print(f"\n4. Emitting growth events...")
+
+    growth_events = []
+    for i in range(1, 6):
+        job_id = f"growth-test-job-{i}"
+        for event_type, value in (
+            (GrowthEventType.JOB_COMPLETED, 1.0),
+            (GrowthEventType.REVENUE_EARNED, 500.0 * 0.85),
+        ):
+            # Same IDs as GrowthService.emit_job_completed, so re-runs are skipped
+            growth_events.append(GrowthEvent(
+                id=f"{job_id}:{event_type.value}",
+                user_id=handyman_id,
+                role=ContractorGrowthRole.HANDYMAN,
+                type=event_type,
+                value=value,
+                meta={"job_id": job_id}
+            ))
+
+    stats = await GrowthService(db).emit_events_bulk(growth_events)
+    print(f"   ✓ {stats['inserted']} events inserted, {stats['duplicate']} already present")
+
+    # 5. Verify growth unlock should trigger
     total_completed = await db.jobs.count_documents({
         "assigned_contractor_id": handyman_id,
         "status": "completed"
     })
 
-    print(f"\n4. Verification:")
+    print(f"\n5. Verification:")
     print(f"   Total completed jobs for handyman: {total_completed}")
     print(f"   Growth unlock threshold: 3 jobs")
     print(f"   Growth center should be: {'✓ UNLOCKED' if total_completed >= 3 else '✗ LOCKED'}")
 
-    print(f"\n5. Test Credentials:")
+    print(f"\n6. Test Credentials:")
     print(f"   Handyman Email: {handyman_email}")
     print(f"   Handyman Password: testpassword123")
     print(f"   Handyman ID: {handyman_id}")
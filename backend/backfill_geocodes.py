@@ -0,0 +1,61 @@
+"""
+Geocode every address without coordinates.
+
+Addresses that only exist in users' embedded addresses are imported into
+the addresses collection first; coordinates are written through the
+address repository, so users.addresses and job copies get them too. Lookups
+go through GeocodingService (cache, coalescing, rate limit) with the
+configured maps provider, so re-running only pays for addresses that are
+still missing.
+
+Usage:
+    python backend/backfill_geocodes.py [--limit N] [--dry-run] [--rate R]
+"""
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import argparse
+import logging
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+# Load environment variables
+env_path = os.path.join(os.path.dirname(__file__), 'providers', 'providers.env')
+load_dotenv(env_path)
+
+from providers import MAPS_PROVIDERS
+from services.geocoding_service import GeocodingService, GEOCODE_RATE_PER_SECOND, GEOCODE_MAX_CONCURRENCY
+
+MONGO_URL = os.getenv('MONGO_URL')
+DB_NAME = os.getenv('DB_NAME', 'handyman_db')
+
+
+async def main(limit, dry_run, rate, concurrency):
+    client = AsyncIOMotorClient(MONGO_URL)
+    db = client[DB_NAME]
+
+    try:
+        maps_provider = MAPS_PROVIDERS[os.getenv("ACTIVE_MAPS_PROVIDER", "google")]()
+        service = GeocodingService(db, maps_provider, rate_per_second=rate, max_concurrency=concurrency)
+
+        print(f"\nGeocoding missing coordinates ({rate}/s, {concurrency} concurrent){' - dry run' if dry_run else ''}")
+        stats = await service.backfill(limit=limit, dry_run=dry_run)
+
+        print(f"\nembedded-only addresses {'found' if dry_run else 'imported'}: {stats['embedded_only']}")
+        print(f"addresses: {stats['addresses_geocoded']} geocoded, "
+              f"{stats['addresses_not_found']} not found, {stats['addresses_seen']} seen")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Geocode addresses without coordinates")
+    parser.add_argument("--limit", type=int, default=None, help="Max addresses to geocode")
+    parser.add_argument("--dry-run", action="store_true", help="Geocode without writing coordinates")
+    parser.add_argument("--rate", type=float, default=GEOCODE_RATE_PER_SECOND, help="Provider calls per second")
+    parser.add_argument("--concurrency", type=int, default=GEOCODE_MAX_CONCURRENCY, help="Concurrent provider calls")
+    args = parser.parse_args()
+    asyncio.run(main(args.limit, args.dry_run, args.rate, args.concurrency))
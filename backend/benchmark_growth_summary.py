@@ -0,0 +1,92 @@
+"""
+Benchmark: Growth Summary Update Cost
+
+Measures the time to emit one growth event for users with growing event
+histories. The incremental summary update should stay flat as history
+grows; the full rebuild (rebuild_summary) is timed alongside for contrast.
+
+Runs against the database in providers.env (MONGO_URL / DB_NAME).
+Throwaway events and summaries are removed again afterwards.
+
+Usage:
+    python backend/benchmark_growth_summary.py [samples]
+"""
+
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import time
+import uuid
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from models import GrowthEvent, GrowthEventType, ContractorGrowthRole, UserRole
+from services.growth_service import GrowthService
+
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), "providers", "providers.env"))
+
+HISTORY_SIZES = [0, 1_000, 10_000, 50_000]
+
+
+async def seed_history(db, user_id: str, size: int):
+    """Insert `size` job/revenue events for a user directly"""
+    events = [
+        GrowthEvent(
+            user_id=user_id,
+            role=ContractorGrowthRole.HANDYMAN,
+            type=GrowthEventType.JOB_COMPLETED if i % 2 == 0 else GrowthEventType.REVENUE_EARNED,
+            value=1.0 if i % 2 == 0 else 100.0
+        ).model_dump()
+        for i in range(size)
+    ]
+    for start in range(0, len(events), 5_000):
+        await db.growth_events.insert_many(events[start:start + 5_000])
+
+
+async def timed(coro_factory, samples: int) -> float:
+    """Average milliseconds per call"""
+    started = time.perf_counter()
+    for _ in range(samples):
+        await coro_factory()
+    return (time.perf_counter() - started) * 1000 / samples
+
+
+async def main(samples: int):
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+    db = client[os.environ["DB_NAME"]]
+    growth_service = GrowthService(db)
+    user_ids = []
+
+    print("\n" + "=" * 60)
+    print(f"GROWTH SUMMARY BENCHMARK - {samples} samples per size")
+    print("=" * 60)
+    print(f"{'history':>10} {'emit_event ms':>15} {'rebuild ms':>12}")
+
+    try:
+        for size in HISTORY_SIZES:
+            user_id = f"growth-benchmark-{uuid.uuid4()}"
+            user_ids.append(user_id)
+            await seed_history(db, user_id, size)
+
+            emit_ms = await timed(
+                lambda: growth_service.emit_event(
+                    user_id, UserRole.HANDYMAN, GrowthEventType.REVENUE_EARNED, 50.0
+                ),
+                samples
+            )
+            rebuild_ms = await timed(
+                lambda: growth_service.rebuild_summary(user_id, ContractorGrowthRole.HANDYMAN),
+                max(1, samples // 10)
+            )
+            print(f"{size:>10} {emit_ms:>15.2f} {rebuild_ms:>12.2f}")
+    finally:
+        await db.growth_events.delete_many({"user_id": {"$in": user_ids}})
+        await db.growth_summary.delete_many({"user_id": {"$in": user_ids}})
+        client.close()
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    asyncio.run(main(n))
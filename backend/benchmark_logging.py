@@ -0,0 +1,126 @@
+"""
+Benchmark: Hot-Path Logging CPU
+
+Simulates the per-candidate logging of get_available_jobs over N
+candidate jobs and measures CPU time spent on the request thread:
+
+1. before: basicConfig-style stream handler, five f-string INFO lines
+   per candidate (the previous code)
+2. default: per-candidate lines at DEBUG with %-style arguments, logger
+   at INFO (the new default) - records are never created
+3. sampled: DEBUG enabled, LOG_SAMPLING=0.01, queue handler
+4. full: DEBUG enabled for every candidate, JSON through the queue
+
+Output goes to /dev/null so terminal speed doesn't skew the numbers.
+Sampling saves formatting and writing, not record creation, so its gain
+shows in the total CPU rather than on the request thread.
+Fails if the default configuration costs more than
+CPU_BUDGET_US_PER_CANDIDATE on the request thread.
+
+Usage:
+    python backend/benchmark_logging.py [candidates]
+"""
+
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import logging
+import time
+
+from utils.logging_config import configure_logging, TEXT_FORMAT
+
+CPU_BUDGET_US_PER_CANDIDATE = 1.0
+
+CANDIDATE_LOGGER = "bench.available_jobs"
+
+
+def make_candidates(count: int):
+    return [
+        {"id": f"job-{i:06d}-0000-0000", "service_category": "plumbing", "distance": 3.0 + i % 40}
+        for i in range(count)
+    ]
+
+
+def log_before(logger, candidates, max_distance=50, skills=("plumbing", "drywall")):
+    for job in candidates:
+        job_id = job["id"][:12]
+        logger.info(f"[AVAILABLE_JOBS DEBUG] Processing job {job_id}")
+        logger.info(f"[AVAILABLE_JOBS DEBUG] Job {job_id} has address: {True}")
+        logger.info(f"[AVAILABLE_JOBS DEBUG] Job {job_id} at distance {job['distance']:.1f} miles (max={max_distance})\n")
+        logger.info(f"[AVAILABLE_JOBS DEBUG] Job {job_id} category={job['service_category']}\n")
+        logger.info(f"[AVAILABLE_JOBS] Found job {job['id']} - {job['service_category']} at {job['distance']:.1f} miles")
+
+
+def log_after(logger, candidates, max_distance=50, skills=("plumbing", "drywall")):
+    for job in candidates:
+        job_id = job["id"][:12]
+        if job["distance"] > max_distance:
+            logger.debug("Job %s at %.1f miles exceeds max=%s - skipping", job_id, job["distance"], max_distance)
+            continue
+        logger.debug("Found job %s - %s at %.1f miles", job["id"], job["service_category"], job["distance"])
+
+
+def measure(scenario, candidates, setup, run) -> float:
+    """Request-thread CPU microseconds per candidate (process CPU is printed too)"""
+    logger, listener = setup()
+    run(logger, candidates[:200])  # warm up
+
+    thread_started, process_started = time.thread_time(), time.process_time()
+    run(logger, candidates)
+    thread_elapsed = time.thread_time() - thread_started
+
+    # Stopping the listener drains the queue, so process CPU includes the writes
+    if listener:
+        listener.stop()
+    process_elapsed = time.process_time() - process_started
+
+    per_candidate = thread_elapsed / len(candidates) * 1e6
+    print(f"{scenario:<10} {per_candidate:8.2f} µs/candidate on the request thread, "
+          f"{process_elapsed / len(candidates) * 1e6:8.2f} µs/candidate total")
+    return per_candidate
+
+
+def main(count: int) -> bool:
+    devnull = open(os.devnull, "w")
+    candidates = make_candidates(count)
+
+    def before():
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        handler = logging.StreamHandler(devnull)
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+        return logging.getLogger(CANDIDATE_LOGGER), None
+
+    def configured(levels: str, sampling: str, log_format: str):
+        def setup():
+            logger = logging.getLogger(CANDIDATE_LOGGER)
+            logger.filters.clear()
+            logger.setLevel(logging.NOTSET)
+            listener = configure_logging(level="INFO", log_format=log_format, levels=levels,
+                                         sampling=sampling, use_queue=True, stream=devnull)
+            return logger, listener
+        return setup
+
+    print("\n" + "=" * 60)
+    print(f"HOT-PATH LOGGING BENCHMARK - {count} candidates")
+    print("=" * 60)
+
+    measure("before", candidates, before, log_before)
+    default = measure("default", candidates, configured("", "", "text"), log_after)
+    measure("sampled", candidates, configured(f"{CANDIDATE_LOGGER}=DEBUG", f"{CANDIDATE_LOGGER}=0.01", "json"), log_after)
+    measure("full", candidates, configured(f"{CANDIDATE_LOGGER}=DEBUG", "", "json"), log_after)
+
+    passed = default <= CPU_BUDGET_US_PER_CANDIDATE
+    print(f"\nBudget: {CPU_BUDGET_US_PER_CANDIDATE} µs/candidate with the default configuration")
+    print("✅ PASS" if passed else "❌ FAIL - default logging over CPU budget")
+    return passed
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    ok = main(n)
+    sys.exit(0 if ok else 1)
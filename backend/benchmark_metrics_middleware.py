@@ -0,0 +1,126 @@
+"""
+Benchmark: Metrics Middleware Overhead
+
+Measures what MetricsMiddleware + DbProfilerMiddleware add to a request.
+
+1. Baseline: median latency of an in-process FastAPI endpoint returning
+   50 job-like items (roughly a feed page), without instrumentation.
+2. Middleware cost: the instrumented middleware stack around a no-op ASGI
+   app, minus the no-op app alone, over many iterations.
+
+Timing the middleware in isolation keeps run-to-run noise (which is
+larger than the overhead itself on shared machines) out of the result.
+No network or database is involved, so the baseline is a fast request:
+any real handler makes the relative overhead smaller.
+
+Usage:
+    python backend/benchmark_metrics_middleware.py [iterations]
+"""
+
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import gc
+import asyncio
+import statistics
+import time
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from utils.metrics import MetricsMiddleware
+from utils.db_profiler import DbProfiler, DbProfilerMiddleware
+
+MAX_OVERHEAD_PERCENT = 2.0
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/jobs/{job_id}/similar")
+    async def similar_jobs(job_id: str):
+        await asyncio.sleep(0)
+        return [
+            {
+                "id": f"{job_id}-{i}",
+                "title": "Fix leaking kitchen faucet",
+                "service_category": "plumbing",
+                "status": "posted",
+                "address": {"city": "Baltimore", "state": "MD", "zip": "21201"},
+                "budget_max": 250.0 + i,
+            }
+            for i in range(50)
+        ]
+
+    return app
+
+
+class _Route:
+    path = "/api/jobs/{job_id}/similar"
+
+
+async def noop_app(scope, receive, send):
+    """Stands in for the routed app: sets the matched route and responds"""
+    scope["route"] = _Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"[]"})
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(message):
+    pass
+
+
+async def time_asgi(app, iterations: int) -> float:
+    """Mean seconds per call of an ASGI app"""
+    gc.collect()
+    scope = {"type": "http", "method": "GET", "path": "/api/jobs/job-1/similar", "headers": []}
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await app(dict(scope), _receive, _send)
+    return (time.perf_counter() - started) / iterations
+
+
+async def time_endpoint(client: AsyncClient, count: int) -> float:
+    """Mean seconds per request against the real endpoint"""
+    gc.collect()
+    started = time.perf_counter()
+    for i in range(count):
+        response = await client.get(f"/api/jobs/job-{i}/similar")
+        response.raise_for_status()
+    return (time.perf_counter() - started) / count
+
+
+async def main(iterations: int) -> bool:
+    print("\n" + "=" * 60)
+    print(f"METRICS MIDDLEWARE BENCHMARK - {iterations} iterations")
+    print("=" * 60)
+
+    async with AsyncClient(transport=ASGITransport(app=build_app()), base_url="http://bench") as client:
+        await time_endpoint(client, 200)
+        baseline = statistics.median([await time_endpoint(client, 200) for _ in range(5)])
+
+    instrumented = MetricsMiddleware(DbProfilerMiddleware(noop_app, profiler=DbProfiler(enabled=True)))
+    bare_times, instrumented_times = [], []
+    for _ in range(5):
+        bare_times.append(await time_asgi(noop_app, iterations))
+        instrumented_times.append(await time_asgi(instrumented, iterations))
+    middleware_cost = statistics.median(instrumented_times) - statistics.median(bare_times)
+
+    overhead = middleware_cost / baseline * 100
+    print(f"Endpoint baseline: {baseline * 1e6:8.1f} µs/request")
+    print(f"Middleware cost:   {middleware_cost * 1e6:8.1f} µs/request")
+    print(f"Overhead:          {overhead:8.2f}% (budget {MAX_OVERHEAD_PERCENT}%)")
+
+    passed = overhead < MAX_OVERHEAD_PERCENT
+    print("\n✅ PASS" if passed else "\n❌ FAIL - metrics overhead over budget")
+    return passed
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    ok = asyncio.run(main(n))
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,87 @@
+"""
+Build data/zip_centroids.npy, the offline ZIP -> centroid table.
+
+Input is the Census Bureau ZCTA Gazetteer file (public domain), e.g.
+2023_Gaz_zcta_national.zip from
+https://www.census.gov/geographies/reference-files/time-series/geo/gazetteer-files.html
+(the .zip or the extracted .txt). Any tab- or comma-separated file with
+zip/lat/lon columns also works: GEOID|zip|zip_code, INTPTLAT|lat|latitude,
+INTPTLONG|lon|lng|longitude.
+
+Usage:
+    python backend/build_zip_centroids.py <gazetteer file> [output.npy]
+"""
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import io
+import csv
+import zipfile
+
+from utils.zip_centroids import ZIP_CENTROIDS_PATH, ZipCentroids, parse_zip, write_zip_centroids
+
+ZIP_COLUMNS = ("geoid", "zip", "zip_code", "zipcode")
+LAT_COLUMNS = ("intptlat", "lat", "latitude")
+LON_COLUMNS = ("intptlong", "lon", "lng", "longitude")
+
+
+def open_source(path: str) -> io.TextIOBase:
+    """Text stream of the gazetteer, reading the first file inside a .zip"""
+    if path.endswith(".zip"):
+        archive = zipfile.ZipFile(path)
+        return io.TextIOWrapper(archive.open(archive.namelist()[0]), encoding="utf-8")
+    return open(path, encoding="utf-8", newline="")
+
+
+def find_column(header, names) -> int:
+    normalized = [column.strip().lower() for column in header]
+    for name in names:
+        if name in normalized:
+            return normalized.index(name)
+    raise ValueError(f"None of the columns {names} found in header {header}")
+
+
+def read_records(path: str):
+    with open_source(path) as source:
+        first_line = source.readline()
+        delimiter = "\t" if "\t" in first_line else ","
+        header = next(csv.reader([first_line], delimiter=delimiter))
+        zip_index, lat_index, lon_index = (
+            find_column(header, ZIP_COLUMNS), find_column(header, LAT_COLUMNS), find_column(header, LON_COLUMNS)
+        )
+
+        skipped = 0
+        for row in csv.reader(source, delimiter=delimiter):
+            try:
+                zip_number = parse_zip(row[zip_index])
+                lat, lon = float(row[lat_index]), float(row[lon_index])
+            except (IndexError, ValueError):
+                skipped += 1
+                continue
+            if zip_number is None:
+                skipped += 1
+                continue
+            yield zip_number, lat, lon
+
+        if skipped:
+            print(f"Skipped {skipped} malformed rows")
+
+
+def main(source_path: str, output_path: str):
+    print(f"\nReading {source_path}")
+    count = write_zip_centroids(list(read_records(source_path)), output_path)
+    size_kb = os.path.getsize(output_path) / 1024
+    print(f"✓ Wrote {count} ZIP centroids to {output_path} ({size_kb:.0f} KB)")
+
+    table = ZipCentroids(output_path)
+    sample = table.table[len(table.table) // 2]
+    zip_code = f"{int(sample['zip']):05d}"
+    print(f"✓ Check: {zip_code} -> {table.lookup(zip_code)}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print(__doc__)
+        sys.exit(2)
+    main(sys.argv[1], sys.argv[2] if len(sys.argv) == 3 else ZIP_CENTROIDS_PATH)
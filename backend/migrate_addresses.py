@@ -0,0 +1,53 @@
+"""
+Converge address copies onto the canonical addresses collection.
+
+Imports addresses that only exist in users.addresses, rebuilds every
+user's users.addresses from the collection and refreshes
+jobs.address_snapshot / jobs.address for jobs with an address_id.
+Safe to re-run: converged documents are left alone.
+
+Usage:
+    python backend/migrate_addresses.py [--dry-run] [--batch-size N]
+"""
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import argparse
+import logging
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+# Load environment variables
+env_path = os.path.join(os.path.dirname(__file__), 'providers', 'providers.env')
+load_dotenv(env_path)
+
+from services.address_repository import AddressRepository, ADDRESS_MIGRATION_BATCH_SIZE
+
+MONGO_URL = os.getenv('MONGO_URL')
+DB_NAME = os.getenv('DB_NAME', 'handyman_db')
+
+
+async def main(dry_run, batch_size):
+    client = AsyncIOMotorClient(MONGO_URL)
+    db = client[DB_NAME]
+
+    try:
+        print(f"\nConverging addresses (batches of {batch_size}){' - dry run' if dry_run else ''}")
+        stats = await AddressRepository(db).migrate(dry_run=dry_run, batch_size=batch_size)
+
+        print(f"\nusers: {stats['users_seen']} seen, {stats['addresses_imported']} addresses imported, "
+              f"{stats['users_rewritten']} users.addresses rebuilt")
+        print(f"jobs:  {stats['jobs_seen']} seen, {stats['jobs_refreshed']} address copies refreshed")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Converge address copies onto the addresses collection")
+    parser.add_argument("--dry-run", action="store_true", help="Count changes without writing them")
+    parser.add_argument("--batch-size", type=int, default=ADDRESS_MIGRATION_BATCH_SIZE, help="Documents per batch")
+    args = parser.parse_args()
+    asyncio.run(main(args.dry_run, args.batch_size))
@@ -71,8 +71,10 @@ class GrowthSummary(BaseModel):
     total_jobs_completed: int = 0
     total_revenue: float = 0.0
 
-    # Rating metrics
+    # Rating metrics (average_rating = rating_sum / rating_count)
     average_rating: float = 0.0
+    rating_sum: float = 0.0
+    rating_count: int = 0
     five_star_count: int = 0
     four_star_count: int = 0
 
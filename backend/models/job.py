@@ -29,17 +29,20 @@ class JobStatus(str, Enum):
     @classmethod
     def from_string(cls, status_str: str) -> "JobStatus":
         """Backward compatibility: map old status strings to new enum values"""
-        mapping = {
-            "published": cls.POSTED,
-            "proposal_selected": cls.POSTED,  # Falls back to posted for feed visibility
-            "scheduled": cls.ACCEPTED,
-            "in_progress": cls.IN_PROGRESS,
-            "completed_pending_review": cls.IN_REVIEW,
-            "completed": cls.COMPLETED,
-            "cancelled_by_customer": cls.CANCELLED_AFTER_ACCEPT,
-            "cancelled_by_contractor": cls.CANCELLED_AFTER_ACCEPT,
-        }
-        return mapping.get(status_str, cls(status_str))
+        return LEGACY_STATUS_MAP.get(status_str) or cls(status_str)
+
+
+# Old status strings still present on some job documents
+LEGACY_STATUS_MAP = {
+    "published": JobStatus.POSTED,
+    "proposal_selected": JobStatus.POSTED,  # Falls back to posted for feed visibility
+    "scheduled": JobStatus.ACCEPTED,
+    "in_progress": JobStatus.IN_PROGRESS,
+    "completed_pending_review": JobStatus.IN_REVIEW,
+    "completed": JobStatus.COMPLETED,
+    "cancelled_by_customer": JobStatus.CANCELLED_AFTER_ACCEPT,
+    "cancelled_by_contractor": JobStatus.CANCELLED_AFTER_ACCEPT,
+}
 
 
 def serialize_mongo_doc(doc: dict) -> dict:
@@ -62,6 +62,7 @@ class User(BaseModel):
     portfolio_photos: List[str] = []  # Portfolio photo URLs
     profile_photo: Optional[str] = None  # Profile picture/logo URL
     banking_info: Optional[dict] = None  # Banking information for payouts
+    payout_account_id: Optional[str] = None  # Payment provider destination (e.g. Stripe connected account), set by admins
 
     # Business growth tracking
     has_llc: bool = False  # Whether they've formed an LLC
@@ -52,6 +52,13 @@ class PaymentIntent(BaseModel):
     status: str
     client_secret: Optional[str] = None
     
+class Transfer(BaseModel):
+    id: str
+    amount: int  # in cents
+    currency: str = "usd"
+    destination: Optional[str] = None
+    status: str
+
 class PaymentProvider(ABC):
     @abstractmethod
     async def create_payment_intent(self, amount: int, currency: str = "usd", metadata: Dict[str, Any] = None) -> PaymentIntent:
@@ -65,6 +72,10 @@ class PaymentProvider(ABC):
     async def refund_payment(self, payment_intent_id: str, amount: Optional[int] = None) -> Dict[str, Any]:
         pass
 
+    @abstractmethod
+    async def create_transfer(self, amount: int, destination: Optional[str], currency: str = "usd", metadata: Dict[str, Any] = None, idempotency_key: Optional[str] = None) -> Transfer:
+        pass
+
 # Maps Provider Interface
 class GeocodeResult(BaseModel):
     latitude: float
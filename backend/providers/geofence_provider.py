@@ -1,59 +1,323 @@
 """
 Geofence Provider - Issue #40 fix
 Handles geolocation validation and boundary checking for service areas
+
+Service areas are GeoJSON polygons grouped by market and stored in the
+service_area_polygons collection (one document per market holding a
+FeatureCollection). They are loaded into an in-memory index:
+
+- a uniform grid (GEOFENCE_CELL_DEGREES) mapping each cell to the
+  polygons whose bounding box overlaps it
+- per polygon ring, edges bucketed into latitude bands, so the
+  point-in-polygon ray cast only visits the edges of one band
+
+A check is a cell lookup, a bounding box test and a few edge tests:
+microseconds even for polygons with thousands of vertices.
+
+Reloading builds a new index and swaps it in, so checks never see a
+partial state. Admin edits bump updated_at on the market document; each
+worker picks the change up in refresh_if_changed() (run periodically) or
+immediately through reload().
+
+With no areas configured every location is accepted, as before.
 """
 
 import os
+import math
 import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple, Iterable
 
 logger = logging.getLogger(__name__)
 
+GEOFENCE_CELL_DEGREES = float(os.getenv("GEOFENCE_CELL_DEGREES", "0.25"))
+
+# Upper bound on latitude bands per ring
+MAX_RING_BANDS = 256
+
+Edge = Tuple[float, float, float, float]  # lon1, lat1, lon2, lat2
+
+
+class GeofenceError(ValueError):
+    """Invalid service area definition"""
+
+
+class _Ring:
+    """Closed ring with edges bucketed by latitude band"""
+
+    def __init__(self, coordinates: List[List[float]]):
+        points = [(float(point[0]), float(point[1])) for point in coordinates]
+        if len(points) < 3:
+            raise GeofenceError("A polygon ring needs at least 3 positions")
+        if points[0] != points[-1]:
+            points.append(points[0])
+
+        lats = [lat for _, lat in points]
+        self.min_lat, self.max_lat = min(lats), max(lats)
+        edge_count = len(points) - 1
+        self.band_count = max(1, min(MAX_RING_BANDS, edge_count // 4))
+        self.band_height = (self.max_lat - self.min_lat) / self.band_count or 1.0
+
+        self.bands: List[List[Edge]] = [[] for _ in range(self.band_count)]
+        for (lon1, lat1), (lon2, lat2) in zip(points, points[1:]):
+            if lat1 == lat2:
+                continue  # Horizontal edges never cross a horizontal ray
+            first = self._band(min(lat1, lat2))
+            last = self._band(max(lat1, lat2))
+            for band in range(first, last + 1):
+                self.bands[band].append((lon1, lat1, lon2, lat2))
+
+    def _band(self, lat: float) -> int:
+        return min(self.band_count - 1, max(0, int((lat - self.min_lat) / self.band_height)))
+
+    def contains(self, lon: float, lat: float) -> bool:
+        """Even-odd ray cast towards +lon over the edges of lat's band"""
+        if lat < self.min_lat or lat > self.max_lat:
+            return False
+        inside = False
+        for lon1, lat1, lon2, lat2 in self.bands[self._band(lat)]:
+            if (lat1 > lat) != (lat2 > lat):
+                crossing = lon1 + (lat - lat1) * (lon2 - lon1) / (lat2 - lat1)
+                if crossing > lon:
+                    inside = not inside
+        return inside
+
+
+class ServiceArea:
+    """One polygon (outer ring and holes) of a market"""
+
+    def __init__(self, market: str, name: str, rings: List[List[List[float]]]):
+        if not rings:
+            raise GeofenceError(f"Service area {name!r} has no rings")
+        self.market = market
+        self.name = name
+        self.outer = _Ring(rings[0])
+        self.holes = [_Ring(ring) for ring in rings[1:]]
+
+        lons = [float(point[0]) for point in rings[0]]
+        self.min_lon, self.max_lon = min(lons), max(lons)
+        self.min_lat, self.max_lat = self.outer.min_lat, self.outer.max_lat
+
+    def contains(self, lat: float, lon: float) -> bool:
+        if not (self.min_lat <= lat <= self.max_lat and self.min_lon <= lon <= self.max_lon):
+            return False
+        return self.outer.contains(lon, lat) and not any(hole.contains(lon, lat) for hole in self.holes)
+
+
+def parse_service_areas(market: str, geojson: Dict[str, Any]) -> List[ServiceArea]:
+    """
+    Polygons from a GeoJSON FeatureCollection, Feature, Polygon or MultiPolygon.
+
+    Raises:
+        GeofenceError: if the document holds no valid polygons
+    """
+    def geometries(obj: Dict[str, Any], name: Optional[str]) -> Iterable[Tuple[str, Dict[str, Any]]]:
+        kind = obj.get("type") if isinstance(obj, dict) else None
+        if kind == "FeatureCollection":
+            for index, feature in enumerate(obj.get("features") or []):
+                yield from geometries(feature, None if name is None else f"{name}-{index}")
+        elif kind == "Feature":
+            properties = obj.get("properties") or {}
+            yield from geometries(obj.get("geometry") or {}, properties.get("name") or obj.get("id") or name)
+        elif kind in ("Polygon", "MultiPolygon"):
+            yield name or market, obj
+        else:
+            raise GeofenceError(f"Unsupported GeoJSON type: {kind}")
+
+    areas = []
+    try:
+        for name, geometry in geometries(geojson, None):
+            polygons = geometry["coordinates"] if geometry["type"] == "MultiPolygon" else [geometry["coordinates"]]
+            for index, rings in enumerate(polygons):
+                label = name if len(polygons) == 1 else f"{name}-{index}"
+                areas.append(ServiceArea(market, str(label), rings))
+    except (KeyError, TypeError, IndexError, ValueError) as e:
+        if isinstance(e, GeofenceError):
+            raise
+        raise GeofenceError(f"Invalid GeoJSON for market {market!r}: {e}")
+
+    if not areas:
+        raise GeofenceError(f"No polygons for market {market!r}")
+    return areas
+
+
+class GeofenceIndex:
+    """Immutable grid index over service areas"""
+
+    def __init__(self, areas: List[ServiceArea], cell_degrees: float = GEOFENCE_CELL_DEGREES):
+        self.areas = areas
+        self.cell_degrees = cell_degrees
+        self.grid: Dict[Tuple[int, int], List[ServiceArea]] = {}
+        for area in areas:
+            min_row, min_col = self._cell(area.min_lat, area.min_lon)
+            max_row, max_col = self._cell(area.max_lat, area.max_lon)
+            for row in range(min_row, max_row + 1):
+                for col in range(min_col, max_col + 1):
+                    self.grid.setdefault((row, col), []).append(area)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def find(self, lat: float, lon: float) -> Optional[ServiceArea]:
+        """First service area containing the point, or None"""
+        for area in self.grid.get(self._cell(lat, lon), ()):
+            if area.contains(lat, lon):
+                return area
+        return None
+
 
 class GeoFenceProvider:
     """Provider for geofence validation and area checking"""
 
-    def __init__(self):
+    def __init__(self, db=None):
+        self.db = db
         self.api_key = os.getenv("GEO_API_KEY")
-        if not self.api_key:
-            logger.warning("GEO_API_KEY not configured in environment - geofence features will be limited")
+        self._index = GeofenceIndex([])
+        self._signature: Optional[tuple] = None
+        self.loaded_at: Optional[datetime] = None
+
+    @property
+    def configured(self) -> bool:
+        """Whether any service areas are loaded"""
+        return bool(self._index.areas)
 
     def verify_key(self) -> dict:
         """
-        Verify that the API key is valid
+        Verify that the geofence is usable
         Returns: {"valid": bool, "message": str}
         """
-        if not self.api_key:
+        if not self.configured:
             return {
                 "valid": False,
-                "message": "GEO_API_KEY not configured in environment"
+                "message": "No service areas loaded"
             }
 
-        # Stub implementation - real validation would check with external service
         return {
-            "valid": False,
-            "message": "Geofence provider stub - real validation not yet implemented"
+            "valid": True,
+            "message": f"{len(self._index.areas)} service areas loaded"
+        }
+
+    def load(self, markets: Dict[str, Dict[str, Any]]):
+        """
+        Replace all service areas.
+
+        Args:
+            markets: {market: GeoJSON}
+
+        Raises:
+            GeofenceError: if any market's GeoJSON is invalid (nothing is replaced)
+        """
+        areas = []
+        for market, geojson in markets.items():
+            areas.extend(parse_service_areas(market, geojson))
+        self._index = GeofenceIndex(areas)
+        self.loaded_at = datetime.utcnow()
+        logger.info(f"Geofence loaded: {len(areas)} areas in {len(markets)} markets, {len(self._index.grid)} grid cells")
+
+    async def _markets_signature(self) -> tuple:
+        cursor = self.db.service_area_polygons.find({}, {"_id": 0, "market": 1, "updated_at": 1})
+        return tuple(sorted([(doc["market"], str(doc.get("updated_at"))) async for doc in cursor]))
+
+    async def reload(self) -> dict:
+        """Load service areas from the database and swap the index in"""
+        signature = await self._markets_signature()
+        markets = {
+            doc["market"]: doc["geojson"]
+            async for doc in self.db.service_area_polygons.find({}, {"_id": 0, "market": 1, "geojson": 1})
+        }
+        self.load(markets)
+        self._signature = signature
+        return self.summary()
+
+    async def refresh_if_changed(self):
+        """Reload when a market was added, changed or removed since the last load"""
+        if await self._markets_signature() != self._signature:
+            await self.reload()
+
+    async def save_market(self, market: str, geojson: Dict[str, Any]) -> dict:
+        """
+        Validate and store a market's areas, then reload.
+
+        Raises:
+            GeofenceError: if the GeoJSON is invalid
+        """
+        parse_service_areas(market, geojson)
+        await self.db.service_area_polygons.update_one(
+            {"market": market},
+            {"$set": {"geojson": geojson, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+        return await self.reload()
+
+    async def delete_market(self, market: str) -> bool:
+        result = await self.db.service_area_polygons.delete_one({"market": market})
+        await self.reload()
+        return result.deleted_count > 0
+
+    def summary(self) -> dict:
+        markets: Dict[str, List[str]] = {}
+        for area in self._index.areas:
+            markets.setdefault(area.market, []).append(area.name)
+        return {
+            "markets": markets,
+            "areas": len(self._index.areas),
+            "grid_cells": len(self._index.grid),
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
         }
 
+    def find_area(self, latitude: float, longitude: float) -> Optional[ServiceArea]:
+        """Service area containing a location, or None"""
+        return self._index.find(latitude, longitude)
+
+    def check_many(self, points: Iterable[Tuple[float, float]]) -> List[Optional[Dict[str, str]]]:
+        """
+        Batch check for routing and feed filtering.
+
+        Args:
+            points: (latitude, longitude) pairs
+
+        Returns:
+            Per point, {"market", "area"} of the containing area or None.
+            With no areas configured every point maps to {} (accepted).
+        """
+        index = self._index
+        if not index.areas:
+            return [{} for _ in points]
+        results = []
+        for latitude, longitude in points:
+            area = index.find(latitude, longitude)
+            results.append({"market": area.market, "area": area.name} if area else None)
+        return results
+
     def check_service_area(self, latitude: float, longitude: float, service_radius_miles: float = 25.0) -> dict:
         """
         Check if a location is within the service area
         Args:
             latitude: Location latitude
             longitude: Location longitude
-            service_radius_miles: Service radius in miles (default 25)
-        Returns: {"in_area": bool, "distance_miles": float, "message": str}
+            service_radius_miles: Unused; areas are defined by polygons
+        Returns: {"in_area": bool, "market": str, "area": str, "message": str}
         """
-        if not self.api_key:
-            logger.warning("GEO_API_KEY not configured - service area check unavailable")
+        if not self.configured:
             return {
                 "in_area": True,  # Default to allowing service when not configured
-                "distance_miles": 0.0,
-                "message": "Service area validation unavailable"
+                "market": None,
+                "area": None,
+                "message": "No service areas configured"
+            }
+
+        area = self.find_area(latitude, longitude)
+        if area is None:
+            return {
+                "in_area": False,
+                "market": None,
+                "area": None,
+                "message": "Location is outside all service areas"
             }
 
-        # Stub implementation - real logic would calculate distance from service center
         return {
             "in_area": True,
-            "distance_miles": 0.0,
-            "message": "Geofence provider stub - real distance calculation not yet implemented"
+            "market": area.market,
+            "area": area.name,
+            "message": f"Location is in {area.name} ({area.market})"
         }
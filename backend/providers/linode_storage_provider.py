@@ -11,6 +11,8 @@ import uuid
 from datetime import datetime
 import logging
 
+from utils.metrics import track_provider_call, instrument_boto3_client
+
 logger = logging.getLogger(__name__)
 
 class LinodeObjectStorage:
@@ -44,6 +46,7 @@ class LinodeObjectStorage:
                 read_timeout=60      # Increased from 9 to 60 seconds
             )
         )
+        instrument_boto3_client(self.s3_client)
         logger.info(f"🔧 Linode bucket={self.bucket_name} region={self.region} endpoint={self.endpoint_url}")
         self.s3_client.head_bucket(Bucket=self.bucket_name)
         logger.info("✅ HEAD bucket ok")
@@ -95,14 +98,15 @@ class LinodeObjectStorage:
 
             # Upload using requests library (bypasses boto3 response reading bug)
             # Must include ACL header to match presigned URL signature
-            response = requests.put(
-                presigned_url,
-                data=file_data,
-                headers={
-                    'Content-Type': content_type,
-                    'x-amz-acl': 'public-read'
-                }
-            )
+            with track_provider_call("s3", "PresignedPutObject"):
+                response = requests.put(
+                    presigned_url,
+                    data=file_data,
+                    headers={
+                        'Content-Type': content_type,
+                        'x-amz-acl': 'public-read'
+                    }
+                )
 
             if response.status_code not in [200, 204]:
                 raise Exception(f"Upload failed with status {response.status_code}: {response.text[:200]}")
@@ -288,6 +292,19 @@ class LinodeObjectStorage:
             ExpiresIn=expires,
         )
 
+    def upload_export_file(self, fileobj, key: str, content_type: str, expires: int = 3600) -> str:
+        """
+        Upload a generated export from a file object and return a signed URL.
+
+        Blocking (multipart upload in chunks, so the file is never read into
+        memory whole); call it from a worker thread.
+        """
+        self.s3_client.upload_fileobj(
+            fileobj, self.bucket_name, key, ExtraArgs={"ContentType": content_type}
+        )
+        logger.info(f"📦 Export uploaded -> bucket={self.bucket_name} key={key}")
+        return self.generate_signed_url(key, expires=expires)
+
     async def upload_photo_bytes(self, data: bytes, key: str) -> str:
         """Upload raw bytes directly to storage"""
         self.s3_client.put_object(
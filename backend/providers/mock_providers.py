@@ -11,6 +11,7 @@ from .base import (
     EmailMessage,
     SmsMessage,
     PaymentIntent,
+    Transfer,
     GeocodeResult,
     RouteResult,
     AiQuoteSuggestion,
@@ -69,6 +70,7 @@ class MockPaymentProvider(PaymentProvider, MockProviderMixin):
     def __init__(self, **kwargs):
         super().__init__(mock_mode=True, **kwargs)
         self._payment_intents = {}
+        self._transfers = {}
 
     async def create_payment_intent(
         self, amount: int, currency: str = "usd", metadata: Dict[str, Any] = None
@@ -129,6 +131,34 @@ class MockPaymentProvider(PaymentProvider, MockProviderMixin):
         await asyncio.sleep(0.1)
         return refund_data
 
+    async def create_transfer(
+        self,
+        amount: int,
+        destination: Optional[str],
+        currency: str = "usd",
+        metadata: Dict[str, Any] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> Transfer:
+        # Same idempotency key returns the same transfer, like Stripe
+        transfer_id = f"tr_mock_{idempotency_key or len(self._transfers) + 1}"
+        transfer = self._transfers.setdefault(
+            transfer_id,
+            Transfer(
+                id=transfer_id,
+                amount=amount,
+                currency=currency,
+                destination=destination,
+                status="paid",
+            ),
+        )
+
+        self._mock_log(
+            "create_transfer",
+            {"id": transfer_id, "amount": amount, "destination": destination, "metadata": metadata},
+        )
+        await asyncio.sleep(0.1)
+        return transfer
+
 
 class MockMapsProvider(MapsProvider, MockProviderMixin):
     def __init__(self, **kwargs):
@@ -1,14 +1,18 @@
 import asyncio
 import json
+import logging
 import os
 from typing import List
 from dotenv import load_dotenv
 from openai import OpenAI
 from .base import AiProvider, AiQuoteSuggestion, ProviderError
+from utils.metrics import track_provider_call
 
 # Load environment variables from providers.env
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "providers.env"))
 
+logger = logging.getLogger(__name__)
+
 
 class OpenAiProvider(AiProvider):
     """
@@ -66,7 +70,7 @@ class OpenAiProvider(AiProvider):
             """
 
             # Run OpenAI request asynchronously via thread offload
-            response = await asyncio.to_thread(
+            completion = asyncio.to_thread(
                 lambda: self.client.chat.completions.create(
                     model=self.model,
                     messages=[
@@ -95,6 +99,9 @@ class OpenAiProvider(AiProvider):
                 )
             )
 
+            with track_provider_call("openai", "chat_completion"):
+                response = await completion
+
             response_text = response.choices[0].message.content.strip()
 
             # Remove markdown fences if present
@@ -108,25 +115,14 @@ class OpenAiProvider(AiProvider):
             data = json.loads(response_text)
 
             # Map structured response to AiQuoteSuggestion
-            # Add detailed logging for debugging
-            import logging
-            logger = logging.getLogger(__name__)
-
             try:
-                logger.info(f"🔍 Parsing AI response - Raw data keys: {list(data.keys())}")
-                logger.info(f"🔍 estimated_hours raw: {data.get('estimated_hours')}")
-                logger.info(f"🔍 suggested_materials raw: {data.get('suggested_materials')}")
-                logger.info(f"🔍 base_price_suggestion raw: {data.get('base_price_suggestion')}")
+                logger.debug("🔍 Parsing AI response - raw fields: %s", data)
 
                 materials = data.get("suggested_materials", []) or []  # Handle None
-                logger.info(f"🔍 materials after get: type={type(materials)}, value={materials}")
 
-                # Process each field individually with logging
+                # Process each field individually
                 estimated_hours_value = max(0.5, float(data.get("estimated_hours", 2.0)))
-                logger.info(f"✅ estimated_hours processed: {estimated_hours_value}")
-
                 materials_value = (materials if isinstance(materials, list) else [])[:5]
-                logger.info(f"✅ materials sliced: type={type(materials_value)}, value={materials_value}")
 
                 # Handle complexity_rating - convert string descriptors if needed
                 complexity_raw = data.get("complexity_rating", 3)
@@ -139,16 +135,12 @@ class OpenAiProvider(AiProvider):
                         "very high": 5, "expert": 5, "difficult": 5
                     }
                     complexity_value = complexity_map.get(complexity_raw.lower(), 3)
-                    logger.warning(f"⚠️ Complexity was string '{complexity_raw}', mapped to {complexity_value}")
+                    logger.warning("⚠️ Complexity was string '%s', mapped to %s", complexity_raw, complexity_value)
                 else:
                     complexity_value = max(1, min(5, int(complexity_raw)))
-                logger.info(f"✅ complexity_rating processed: {complexity_value}")
 
                 base_price_value = max(50, float(data.get("base_price_suggestion", 150)))
-                logger.info(f"✅ base_price_suggestion processed: {base_price_value}")
-
                 reasoning_value = str(data.get("reasoning", "AI analysis based on service type and description"))[:500]
-                logger.info(f"✅ reasoning processed: length={len(reasoning_value)}")
 
                 # Handle confidence - convert string descriptors if needed
                 confidence_raw = data.get("confidence", 0.7)
@@ -161,12 +153,10 @@ class OpenAiProvider(AiProvider):
                         "very high": 0.95, "excellent": 0.95, "certain": 0.95
                     }
                     confidence_value = confidence_map.get(confidence_raw.lower(), 0.7)
-                    logger.warning(f"⚠️ Confidence was string '{confidence_raw}', mapped to {confidence_value}")
+                    logger.warning("⚠️ Confidence was string '%s', mapped to %s", confidence_raw, confidence_value)
                 else:
                     confidence_value = max(0.1, min(1.0, float(confidence_raw)))
-                logger.info(f"✅ confidence processed: {confidence_value}")
 
-                logger.info("🔧 Creating AiQuoteSuggestion object...")
                 suggestion = AiQuoteSuggestion(
                     estimated_hours=estimated_hours_value,
                     suggested_materials=materials_value,
@@ -175,11 +165,14 @@ class OpenAiProvider(AiProvider):
                     reasoning=reasoning_value,
                     confidence=confidence_value,
                 )
-                logger.info("✅ AiQuoteSuggestion created successfully!")
+                logger.debug(
+                    "✅ AI suggestion: hours=%s complexity=%s base_price=%s confidence=%s",
+                    estimated_hours_value, complexity_value, base_price_value, confidence_value
+                )
 
                 return suggestion
             except Exception as parse_error:
-                logger.error(f"❌ Error during AI response parsing: {type(parse_error).__name__}: {str(parse_error)}")
+                logger.error("❌ Error during AI response parsing: %s: %s", type(parse_error).__name__, parse_error)
                 raise
 
         except Exception as e:
@@ -5,6 +5,8 @@ from sendgrid.helpers.mail import Mail, Email, To, Content
 from datetime import datetime
 import logging
 
+from utils.metrics import track_provider_call
+
 logger = logging.getLogger(__name__)
 
 class QuoteEmailService:
@@ -273,7 +275,8 @@ class QuoteEmailService:
                 html_content=html_content
             )
             
-            response = self.client.send(message)
+            with track_provider_call("sendgrid", "send"):
+                response = self.client.send(message)
             
             if response.status_code in [200, 201, 202]:
                 logger.info(f"Quote email sent successfully to {to_email}")
@@ -321,7 +324,8 @@ class QuoteEmailService:
                 html_content=html
             )
             
-            response = self.client.send(message)
+            with track_provider_call("sendgrid", "send"):
+                response = self.client.send(message)
             return response.status_code in [200, 201, 202]
             
         except Exception as e:
@@ -3,6 +3,7 @@ from typing import Dict, Any, List
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail, Email, To, Content
 from .base import EmailProvider, EmailMessage, ProviderError
+from utils.metrics import track_provider_call
 
 class SendGridEmailProvider(EmailProvider):
     def __init__(self):
@@ -20,7 +21,8 @@ class SendGridEmailProvider(EmailProvider):
             mail = Mail(from_email=from_email, to_emails=to_emails, subject=message.subject, html_content=message.html_content)
             if message.text_content:
                 mail.add_content(Content("text/plain", message.text_content))
-            response = self.client.send(mail)
+            with track_provider_call("sendgrid", "send"):
+                response = self.client.send(mail)
             return response.status_code in [200, 201, 202]
         except Exception as e:
             raise ProviderError(f"SendGrid email failed: {str(e)}")
@@ -32,7 +34,8 @@ class SendGridEmailProvider(EmailProvider):
             mail = Mail(from_email=from_email, to_emails=to_emails)
             mail.template_id = template_id
             mail.dynamic_template_data = data
-            response = self.client.send(mail)
+            with track_provider_call("sendgrid", "send"):
+                response = self.client.send(mail)
             return response.status_code in [200, 201, 202]
         except Exception as e:
             raise ProviderError(f"SendGrid template email failed: {str(e)}")
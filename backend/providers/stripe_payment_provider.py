@@ -1,7 +1,8 @@
 import os
+import asyncio
 from typing import Dict, Any, Optional
 import stripe
-from .base import PaymentProvider, PaymentIntent, ProviderError
+from .base import PaymentProvider, PaymentIntent, Transfer, ProviderError
 
 class StripePaymentProvider(PaymentProvider):
     def __init__(self):
@@ -36,3 +37,20 @@ class StripePaymentProvider(PaymentProvider):
             return {'id': refund.id, 'payment_intent': refund.payment_intent, 'amount': refund.amount, 'status': refund.status, 'created': refund.created}
         except stripe.error.StripeError as e:
             raise ProviderError(f"Stripe refund failed: {str(e)}")
+
+    async def create_transfer(self, amount: int, destination: Optional[str], currency: str = "usd", metadata: Dict[str, Any] = None, idempotency_key: Optional[str] = None) -> Transfer:
+        if not destination:
+            raise ProviderError("No Stripe connected account for transfer")
+        try:
+            # Run the blocking Stripe call in a thread so concurrent transfers overlap
+            transfer = await asyncio.to_thread(
+                stripe.Transfer.create,
+                amount=amount,
+                currency=currency,
+                destination=destination,
+                metadata=metadata or {},
+                idempotency_key=idempotency_key
+            )
+            return Transfer(id=transfer.id, amount=transfer.amount, currency=transfer.currency, destination=transfer.destination, status="paid")
+        except stripe.error.StripeError as e:
+            raise ProviderError(f"Stripe transfer failed: {str(e)}")
@@ -1,11 +1,12 @@
-from fastapi import FastAPI, APIRouter, HTTPException, status, Depends, Body, Request, UploadFile, File, Form
+from fastapi import FastAPI, APIRouter, HTTPException, status, Depends, Body, Query, Request, UploadFile, File, Form
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, HTTPBasic, HTTPBasicCredentials
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from providers import EMAIL_PROVIDERS, AI_PROVIDERS, MAPS_PROVIDERS
-from fastapi.responses import RedirectResponse
+from providers import EMAIL_PROVIDERS, AI_PROVIDERS, MAPS_PROVIDERS, PAYMENT_PROVIDERS
+from fastapi.responses import RedirectResponse, StreamingResponse, PlainTextResponse
 from providers.linode_storage_provider import LinodeObjectStorage
 from providers.quote_email_service import QuoteEmailService
+from providers.geofence_provider import GeoFenceProvider, GeofenceError
 from models.address import Address, AddressInput
 
 
@@ -14,6 +15,7 @@ load_dotenv("backend/providers/providers.env")
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
 import secrets
 import logging
 import httpx
@@ -23,6 +25,19 @@ from datetime import datetime, timedelta, date
 import uuid
 from utils.provider_completeness import compute_provider_completeness
 from utils.provider_status import compute_new_status
+from utils.db_indexes import ensure_indexes
+from utils.logging_config import configure_logging
+from utils.db_profiler import DbProfiler, DbProfilerMiddleware
+from utils.metrics import (
+    registry as metrics_registry,
+    MetricsMiddleware,
+    LoopLagMonitor,
+    MongoPoolListener,
+    watch_executor_queue,
+)
+from utils.loop_watchdog import LoopWatchdog, LOOP_WATCHDOG_ENABLED
+from utils.zip_centroids import check_zip_centroids
+import motor.frameworks.asyncio as motor_asyncio
 
 # Import models
 from models import (
@@ -60,6 +75,7 @@ from models import (
     WalletSummary,
     GrowthSummary,
     GrowthSummaryResponse,
+    ContractorGrowthRole,
     MileageLog,
     MileageCreateRequest,
     TimeLog,
@@ -90,13 +106,29 @@ from auth.auth_handler import (
 
 # Import services
 from services.pricing_engine import PricingEngine
-from services.contractor_routing import ContractorRouter
+from services.contractor_routing import ContractorRouter, get_business_location
+from services.bulk_routing import BulkRoutingEngine
 from services.job_lifecycle import JobLifecycleService
 from services.proposal_service import ProposalService
-from services.job_feed_service import JobFeedService
-from services.job_lifecycle import JobLifecycleService, JobLifecycleError
+from services.job_feed_service import JobFeedService, to_feed_item
+from services.job_feed_push import JobFeedHub
+from services.job_lifecycle import (
+    JobLifecycleService,
+    JobLifecycleError,
+    JobNotFoundError,
+    JobTransitionConflict,
+)
 from services.payout_service import PayoutService
+from services.payout_worker import PayoutWorker, payout_worker_disabled_reason
 from services.growth_service import GrowthService
+from services.report_service import ReportService
+from services.tax_export_service import TaxExportService, EXPORT_FORMATS
+from services.system_stats_service import SystemStatsService
+from services.geocoding_service import GeocodingService, format_address
+from services.location_verification import LocationVerificationService
+from services.address_repository import AddressRepository, AddressScopeMiddleware, job_address_fields
+from services.analytics_service import AnalyticsService, METRICS as ANALYTICS_METRICS, INTERVALS as ANALYTICS_INTERVALS
+from services.job_events import JobEventLog, format_sse
 
 # Import providers
 from providers.openai_provider import OpenAiProvider
@@ -109,22 +141,38 @@ PROJ_ROOT = Path(__file__).parent.parent # This is the Handyman-app-main directo
 load_dotenv(PROJ_ROOT / "backend/providers/providers.env")
 # --- End Environment Loading ---
 
-# MongoDB connection
+# MongoDB connection (commands are profiled per request, see utils/db_profiler.py)
 mongo_url = os.environ["MONGO_URL"]
-client = AsyncIOMotorClient(mongo_url)
+db_profiler = DbProfiler()
+client = AsyncIOMotorClient(mongo_url, event_listeners=[db_profiler, MongoPoolListener()])
 db = client[os.environ["DB_NAME"]]
 
+# Background worker and streaming settings
+JOB_OUTBOX_INTERVAL_SECONDS = int(os.getenv("JOB_OUTBOX_INTERVAL_SECONDS", "30"))
+SSE_HEARTBEAT_SECONDS = int(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+WALLET_RECONCILE_INTERVAL_SECONDS = int(os.getenv("WALLET_RECONCILE_INTERVAL_SECONDS", "86400"))
+PAYOUT_WORKER_INTERVAL_SECONDS = int(os.getenv("PAYOUT_WORKER_INTERVAL_SECONDS", "60"))
+GEOFENCE_REFRESH_SECONDS = int(os.getenv("GEOFENCE_REFRESH_SECONDS", "60"))
+
 # Initialize services and providers
 auth_handler = AuthHandler(db)
 pricing_engine = PricingEngine()
-contractor_router = ContractorRouter(db)
+geofence_provider = GeoFenceProvider(db)
+address_repository = AddressRepository(db)
+contractor_router = ContractorRouter(db, geofence=geofence_provider, addresses=address_repository)
 
 # Initialize Phase 4 services
-job_lifecycle = JobLifecycleService(db)
+job_event_log = JobEventLog(db)
+analytics_service = AnalyticsService(db, job_event_log.bus)
+job_lifecycle = JobLifecycleService(db, event_log=job_event_log)
 proposal_service = ProposalService(db)
-job_feed_service = JobFeedService(db)
-payout_service = PayoutService(db)
+job_feed_service = JobFeedService(db, addresses=address_repository)
+payout_service = PayoutService(db, analytics=analytics_service)
 growth_service = GrowthService(db)
+report_service = ReportService(db)
+bulk_routing_engine = BulkRoutingEngine(db, job_lifecycle, geofence=geofence_provider)
+job_feed_hub = JobFeedHub(db, job_event_log.bus, heartbeat_seconds=SSE_HEARTBEAT_SECONDS)
+system_stats_service = SystemStatsService(db, job_event_log.bus)
 
 # Initialize providers based on feature flags
 active_ai = (
@@ -135,7 +183,12 @@ active_ai = (
 ai_provider = AI_PROVIDERS[active_ai]()
 email_provider = EMAIL_PROVIDERS[os.getenv("ACTIVE_EMAIL_PROVIDER", "mock")]()
 maps_provider = MAPS_PROVIDERS[os.getenv("ACTIVE_MAPS_PROVIDER", "google")]()
+geocoding_service = GeocodingService(db, maps_provider, addresses=address_repository)
+location_verification = LocationVerificationService(db)
+payment_provider = PAYMENT_PROVIDERS[os.getenv("ACTIVE_PAYMENT_PROVIDER") or "mock"]()
+payout_worker = PayoutWorker(db, payment_provider, payout_service)
 storage_provider = LinodeObjectStorage()
+tax_export_service = TaxExportService(db, storage_provider)
 quote_email_service = QuoteEmailService()
 
 # Admin email for notifications
@@ -154,12 +207,14 @@ api_router = APIRouter(prefix="/api")
 # Security
 security = HTTPBearer()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# Configure logging (LOG_FORMAT, LOG_LEVEL, LOG_LEVELS, LOG_SAMPLING; see utils/logging_config.py)
+log_listener = configure_logging()
 logger = logging.getLogger(__name__)
 
+# Per-candidate lines of the available jobs scan; enable with
+# LOG_LEVELS=server.available_jobs=DEBUG and sample with LOG_SAMPLING
+available_jobs_logger = logging.getLogger(f"{__name__}.available_jobs")
+
 # ==================== AUTHENTICATION ROUTES ====================
 
 @api_router.post("/auth/register", response_model=Token)
@@ -550,7 +605,8 @@ async def verify_customer_location(
     """
     Verify customer location against their profile address.
 
-    Compares device GPS coordinates to address coordinates.
+    Compares device GPS coordinates to the default address coordinates
+    (great-circle distance within LOCATION_VERIFY_TOLERANCE_METERS).
     Updates verification status: "verified", "unverified", or "mismatch".
 
     Required: device_lat, device_lon
@@ -565,62 +621,22 @@ async def verify_customer_location(
     device_lat = verification_data.get("device_lat")
     device_lon = verification_data.get("device_lon")
 
-    if not device_lat or not device_lon:
+    if device_lat is None or device_lon is None:
         raise HTTPException(
             status_code=400,
             detail="device_lat and device_lon are required"
         )
 
-    # Get user's default address
-    user_doc = await db.users.find_one({"id": current_user.id})
-    if not user_doc:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    addresses = user_doc.get("addresses", [])
-    default_address = next((addr for addr in addresses if addr.get("is_default")), None)
-
-    # Determine verification status
-    status_value = "unverified"
-
-    if default_address:
-        address_lat = default_address.get("latitude")
-        address_lon = default_address.get("longitude")
-
-        if address_lat and address_lon:
-            # Calculate distance (simple Euclidean distance for now)
-            # For production, use Haversine formula for accurate distance
-            lat_diff = abs(float(device_lat) - float(address_lat))
-            lon_diff = abs(float(device_lon) - float(address_lon))
-
-            # ~0.01 degrees ≈ ~1km tolerance
-            # Adjust threshold as needed
-            TOLERANCE = 0.05  # ~5km tolerance
+    try:
+        device_lat, device_lon = float(device_lat), float(device_lon)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="device_lat and device_lon must be numbers")
 
-            if lat_diff <= TOLERANCE and lon_diff <= TOLERANCE:
-                status_value = "verified"
-            else:
-                status_value = "mismatch"
-        else:
-            # Address has no coordinates - cannot verify
-            status_value = "unverified"
-    else:
-        # No default address - cannot verify
-        status_value = "unverified"
-
-    # Create or update verification object
-    verification = {
-        "status": status_value,
-        "device_lat": float(device_lat),
-        "device_lon": float(device_lon),
-        "verified_at": datetime.utcnow() if status_value == "verified" else None,
-        "auto_verify_enabled": user_doc.get("verification", {}).get("auto_verify_enabled", True)
-    }
+    if not (-90 <= device_lat <= 90 and -180 <= device_lon <= 180):
+        raise HTTPException(status_code=400, detail="device_lat or device_lon out of range")
 
-    # Update user document
-    await db.users.update_one(
-        {"id": current_user.id},
-        {"$set": {"verification": verification, "updated_at": datetime.utcnow()}}
-    )
+    # current_user is loaded fresh for this request; no second read needed
+    verification = await location_verification.verify(current_user, device_lat, device_lon)
 
     return {
         "success": True,
@@ -741,25 +757,18 @@ async def upload_photo_immediately(
     This uploads right away, not waiting for quote submission
     """
     try:
-        # Log incoming request details
-        logger.info(f"📥 Received upload request: customer_id={customer_id}")
-        logger.info(f"📄 File object: filename={file.filename}, content_type={file.content_type}")
-        
         # Validate it's an image
         if not file.content_type or not file.content_type.startswith('image/'):
-            logger.warning(f"⚠️ Invalid content type: {file.content_type}")
+            logger.warning("⚠️ Invalid content type: %s", file.content_type)
             raise HTTPException(status_code=400, detail="File must be an image")
         
         # Read the file data
-        logger.info("📖 Reading file data...")
         file_data = await file.read()
         file_size = len(file_data)
-        logger.info(f"📸 Photo upload: filename={file.filename}, content_type={file.content_type}, size={file_size} bytes")
-        
-        if file_size > 0:
-            logger.info(f"📊 First 20 bytes (hex): {file_data[:20].hex()}")
-        else:
-            logger.error("⚠️ File data is completely EMPTY!")
+        logger.info(
+            "📸 Photo upload: customer_id=%s filename=%s content_type=%s size=%d bytes",
+            customer_id, file.filename, file.content_type, file_size
+        )
 
         if file_size == 0:
             logger.error("⚠️ Empty file received - no data!")
@@ -781,7 +790,7 @@ async def upload_photo_immediately(
             content_type=file.content_type
         )
         
-        logger.info(f"Photo uploaded immediately: {url}")
+        logger.info("Photo uploaded immediately: %s", url)
         
         return {
             "success": True,
@@ -808,7 +817,7 @@ async def request_quote(
         if not quote_request.address_id:
             raise HTTPException(status_code=400, detail="address_id is required")
 
-        address = await get_address_by_id(quote_request.address_id)
+        address = await address_repository.get(quote_request.address_id)
         if not address:
             raise HTTPException(status_code=404, detail="Address not found")
 
@@ -919,6 +928,12 @@ async def request_quote(
         
         await db.quotes.insert_one(quote_dict)
         logger.info(f"Quote {quote_id} created and saved to database")
+        await analytics_service.record(
+            "quote_created",
+            category=quote_request.service_category,
+            zip_code=address.zip_code,
+            value=total_amount
+        )
 
         # Step 4b: Create a published Job so contractors/handymen can see it
         job_id = str(uuid.uuid4())
@@ -946,6 +961,7 @@ async def request_quote(
             "updated_at": datetime.utcnow().isoformat(),
         }
         await db.jobs.insert_one(job_doc)
+        await job_event_log.record(job_doc, current_user.id, current_user.role.value)
         logger.info(f"Job {job_id} published for quote {quote_id}")
 
         # Step 5: Send immediate confirmation email to customer
@@ -1151,7 +1167,7 @@ async def respond_to_quote(
     if response.accept:
         try:
             # Build embedded address from quote data
-            address = await get_address_by_id(quote["address_id"])
+            address = await address_repository.get(quote["address_id"])
             
             # Create JobAddress for embedded storage
             if address and address.latitude and address.longitude:
@@ -1226,6 +1242,7 @@ async def respond_to_quote(
                 job_doc["completed_at"] = job_doc["completed_at"].isoformat()
 
             await db.jobs.insert_one(job_doc)
+            await job_event_log.record(job_doc, current_user.id, current_user.role.value)
             job_id = job.id
 
             logger.info(f"Job {job_id} created from accepted quote {quote_id}")
@@ -1550,7 +1567,7 @@ async def create_job(
 
     if address_id:
         # Validate canonical address exists
-        address = await get_address_by_id(address_id)
+        address = await address_repository.get(address_id)
         if not address:
             raise HTTPException(status_code=404, detail="Address not found")
     else:
@@ -1565,12 +1582,11 @@ async def create_job(
                     "zip_code": job_data.address.zip,
                     "latitude": getattr(job_data.address, "lat", None),
                     "longitude": getattr(job_data.address, "lon", None),
-                    "is_default": True,
+                    # Only becomes the profile default if the customer has none
+                    "is_default": not current_user.addresses,
                 },
             )
-            # Insert into addresses collection
-            await db.addresses.insert_one(created.model_dump())
-            address = created
+            address = await address_repository.insert(created)
             address_id = created.id
         else:
             raise HTTPException(status_code=400, detail="Address info required")
@@ -1603,6 +1619,7 @@ async def create_job(
         job_doc["completed_date"] = job_doc["completed_date"].isoformat()
 
     await db.jobs.insert_one(job_doc)
+    await job_event_log.record(job_doc, current_user.id, current_user.role.value)
 
     logger.info(f"Job {job.id} created by customer {current_user.id} - {job_data.service_category}")
 
@@ -1649,6 +1666,67 @@ async def get_job(
     return Job(**job)
 
 
+def can_see_job_event(event: dict, user: User) -> bool:
+    """Admins see every job event, others only events for their own jobs"""
+    return user.role == UserRole.ADMIN or \
+        user.id in (event.get("customer_id"), event.get("provider_id"))
+
+
+@api_router.get("/jobs/events/stream")
+async def stream_job_events(
+    request: Request,
+    current_user: User = Depends(get_current_user_dependency)
+):
+    """
+    Stream job lifecycle events over Server-Sent Events.
+
+    Customers and providers receive events for their own jobs; admins
+    receive all events. A comment line is sent as a heartbeat when idle.
+    """
+    queue = job_event_log.bus.subscribe()
+
+    async def event_stream():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if can_see_job_event(event, current_user):
+                    yield format_sse("job_event", event)
+        finally:
+            job_event_log.bus.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@api_router.get("/jobs/{job_id}/events")
+async def get_job_events(
+    job_id: str,
+    current_user: User = Depends(get_current_user_dependency)
+):
+    """Get the recorded status history of a job"""
+    job = await db.jobs.find_one(
+        {"id": job_id},
+        {"_id": 0, "customer_id": 1, "assigned_provider_id": 1, "assigned_contractor_id": 1, "contractor_id": 1}
+    )
+    if not job:
+        raise HTTPException(404, detail="Job not found")
+
+    from services.job_lifecycle import get_assigned_provider_id
+    if current_user.role != UserRole.ADMIN and \
+            current_user.id not in (job.get("customer_id"), get_assigned_provider_id(job)):
+        raise HTTPException(403, detail="Not authorized to view this job")
+
+    return await job_event_log.get_events(job_id)
+
+
 @api_router.get("/jobs", response_model=List[Job])
 async def list_jobs(
     status: Optional[str] = None,
@@ -1923,7 +2001,7 @@ async def get_available_jobs(
     - max_distance: Maximum distance in miles (default: 50)
     - category: Filter by service category (optional)
     """
-    logger.info(f"[AVAILABLE_JOBS] User {current_user.id} role={current_user.role} skills={current_user.skills}")
+    logger.info("[AVAILABLE_JOBS] User %s role=%s skills=%s", current_user.id, current_user.role, current_user.skills)
     
     # Only contractors and handymen can access this endpoint
     if current_user.role not in (UserRole.CONTRACTOR, UserRole.HANDYMAN):
@@ -1948,7 +2026,7 @@ async def get_available_jobs(
         )
 
     contractor_location = (business_address.latitude, business_address.longitude)
-    logger.info(f"[AVAILABLE_JOBS] Contractor location: {contractor_location}, max_distance={max_distance}")
+    logger.info("[AVAILABLE_JOBS] Contractor location: %s, max_distance=%s", contractor_location, max_distance)
 
 
     from geopy.distance import geodesic
@@ -1964,28 +2042,41 @@ async def get_available_jobs(
         "status": "posted"
     }
     
-    # Debug: Count jobs matching query before iterating
-    jobs_count = await db.jobs.count_documents(query)
-    logger.info(f"[AVAILABLE_JOBS DEBUG] Query matched {jobs_count} jobs with status='posted'")
-    
-    pending_jobs_cursor = db.jobs.find(query)
+    # The extra count query only runs when candidate logging is on
+    if available_jobs_logger.isEnabledFor(logging.DEBUG):
+        jobs_count = await db.jobs.count_documents(query)
+        available_jobs_logger.debug("Query matched %d jobs with status='posted'", jobs_count)
     
-    async for job_doc in pending_jobs_cursor:
+    pending_jobs = await db.jobs.find(query).to_list(None)
+
+    # Quotes open for bids from customers
+    try:
+        open_quotes = await db.quotes.find({
+            "status": "pending",
+            "contractor_id": {"$exists": False}
+        }).to_list(None)
+    except Exception as e:
+        logger.warning(f"Error fetching quotes for contractor: {e}")
+        open_quotes = []
+
+    # Addresses of jobs without an embedded address and of all open quotes,
+    # resolved in one query
+    addresses = await address_repository.get_many(
+        [job_doc.get("address_id") for job_doc in pending_jobs if not job_doc.get("address")]
+        + [quote_doc.get("address_id") for quote_doc in open_quotes]
+    )
+
+    for job_doc in pending_jobs:
         job_id = job_doc.get('id', 'unknown')[:12]
-        logger.info(f"[AVAILABLE_JOBS DEBUG] Processing job {job_id}")
 
-        # Use embedded address when available, fall back to customer lookup
+        # Use embedded address when available, fall back to the canonical address
         job_address = job_doc.get("address")
-        logger.info(f"[AVAILABLE_JOBS DEBUG] Job {job_id} has address: {bool(job_address)}")
 
         if not job_address:
-            customer = await db.users.find_one({"id": job_doc["customer_id"]})
-            if not customer or not customer.get("addresses"):
+            address = addresses.get(job_doc.get("address_id"))
+            if not address:
                 continue
-            job_address = next(
-                (addr for addr in customer["addresses"] if addr["id"] == job_doc.get("address_id")),
-                None
-            )
+            job_address = job_address_fields(address)
 
         if not job_address or not job_address.get("lat") or not job_address.get("lon"):
             continue
@@ -1993,16 +2084,14 @@ async def get_available_jobs(
         # Calculate distance
         job_location = (job_address["lat"], job_address["lon"])
         distance = geodesic(contractor_location, job_location).miles
-        logger.info(f"[AVAILABLE_JOBS DEBUG] Job {job_id} at distance {distance:.1f} miles (max={max_distance})\n")
 
         # Only include jobs within specified distance
         if distance > max_distance:
-            logger.info(f"[AVAILABLE_JOBS DEBUG] Job {job_id} exceeds distance - skipping\n")
+            available_jobs_logger.debug("Job %s at %.1f miles exceeds max=%s - skipping", job_id, distance, max_distance)
             continue
         
         # Check if contractor has matching skill
         service_category = job_doc.get("service_category", "")
-        logger.info(f"[AVAILABLE_JOBS DEBUG] Job {job_id} category={service_category}\n")
         
         # If category filter specified, match it
         if category and service_category.lower() != category.lower():
@@ -2012,7 +2101,7 @@ async def get_available_jobs(
         contractor_skills = current_user.skills or []
         contractor_skills_lower = [s.lower() for s in contractor_skills]
         if contractor_skills and service_category.lower() not in contractor_skills_lower:
-            logger.info(f"[AVAILABLE_JOBS DEBUG] Job {job_id} skills mismatch - contractor has {contractor_skills}\n")
+            available_jobs_logger.debug("Job %s category=%s skills mismatch - contractor has %s", job_id, service_category, contractor_skills)
             continue
 
         # All checks passed - include job
@@ -2032,17 +2121,12 @@ async def get_available_jobs(
         job_doc["total_amount"] = job_doc.get("agreed_amount") or job_doc.get("budget_max", 0)
         job_doc["category"] = job_doc.get("service_category", "")  # Frontend expects 'category'
         available_jobs.append(job_doc)
-        logger.info(f"[AVAILABLE_JOBS] Found job {job_doc.get('id')} - {service_category} at {distance:.1f} miles")
+        available_jobs_logger.debug("Found job %s - %s at %.1f miles", job_doc.get("id"), service_category, distance)
     
-    # ALSO FETCH QUOTES (open for bids from customers)
+    # ALSO INCLUDE QUOTES (open for bids from customers)
     try:
-        quotes_cursor = db.quotes.find({
-            "status": "pending",
-            "contractor_id": {"$exists": False}
-        })
-        
-        async for quote_doc in quotes_cursor:
-            address = await get_address_by_id(quote_doc.get("address_id"))
+        for quote_doc in open_quotes:
+            address = addresses.get(quote_doc.get("address_id"))
             if not address or not address.latitude or not address.longitude:
                 continue
             
@@ -2086,7 +2170,7 @@ async def get_available_jobs(
     # Sort by distance (closest first)
     available_jobs.sort(key=lambda x: x.get("distance_miles", 0))
 
-    logger.info(f"[AVAILABLE_JOBS] Returning {len(available_jobs)} jobs for contractor {current_user.id}")
+    logger.info("[AVAILABLE_JOBS] Returning %d jobs for contractor %s", len(available_jobs), current_user.id)
 
     return {
         "jobs": available_jobs,
@@ -2105,52 +2189,27 @@ async def get_available_jobs(
 
 def create_address_for_user(user_id: str, address_data: dict) -> Address:
     """
-    Create a canonical Address document in the addresses collection.
-    Keeps compatibility with embedded user.addresses if needed.
+    Build a canonical Address for the addresses collection.
+    Store it with address_repository.insert(), which also updates user.addresses.
     """
     address = Address(
         user_id=user_id,
         street=address_data.get("street", "").strip(),
-        unit_number=address_data.get("unit_number") or None,
+        line2=address_data.get("line2") or address_data.get("unit_number") or None,
         city=address_data.get("city", "").strip(),
         state=address_data.get("state", "").strip(),
         zip_code=address_data.get("zip_code", "").strip(),
+        country=address_data.get("country") or "US",
         is_default=address_data.get("is_default", False),
         latitude=address_data.get("latitude"),
         longitude=address_data.get("longitude"),
+        place_id=address_data.get("place_id"),
+        formatted_address=address_data.get("formatted_address"),
     )
 
     return address
 
 
-async def get_address_by_id(address_id: str) -> Optional[Address]:
-    """Get address by ID from addresses collection"""
-    doc = await db.addresses.find_one({"id": address_id})
-    if not doc:
-        return None
-    return Address(**doc)
-
-
-async def list_addresses_for_user(user_id: str) -> list:
-    """List all addresses for a user from addresses collection"""
-    docs = await db.addresses.find({"user_id": user_id}).sort("created_at", 1).to_list(100)
-    return [Address(**doc) for doc in docs]
-
-
-async def set_default_address(user_id: str, address_id: str) -> None:
-    """Set an address as default and unset all others"""
-    # Unset all defaults
-    await db.addresses.update_many(
-        {"user_id": user_id},
-        {"$set": {"is_default": False}}
-    )
-    # Set the chosen default
-    await db.addresses.update_one(
-        {"user_id": user_id, "id": address_id},
-        {"$set": {"is_default": True, "updated_at": datetime.utcnow()}}
-    )
-
-
 # ==================== USER PROFILE ROUTES ====================
 
 @api_router.post("/address/verify")
@@ -2169,18 +2228,35 @@ async def verify_address(address_data: dict):
         if not all([street, city, state, zip_code]):
             return {"success": False, "message": "Missing required address fields"}
 
-        # Use maps provider if available
+        # Use maps provider if available; precision "zip" answers from the
+        # offline ZIP centroid table without a network call
         if maps_provider:
             try:
-                full_address = f"{street}, {city}, {state} {zip_code}"
-                geocode_result = await maps_provider.geocode(full_address)
+                precision = address_data.get("precision", "address")
+                geocode_result = await geocoding_service.locate(
+                    format_address(street, city, state, zip_code),
+                    zip_code,
+                    precision=precision
+                )
+
+                if geocode_result and precision != "zip" and geocode_result["precision"] == "zip":
+                    # Provider unavailable: only the ZIP is known, the street was not checked
+                    return {
+                        "success": False,
+                        "status": "zip_only",
+                        "message": "Address could not be verified right now; only the ZIP code was located.",
+                        "latitude": geocode_result["latitude"],
+                        "longitude": geocode_result["longitude"],
+                        "precision": "zip"
+                    }
 
                 if geocode_result and geocode_result.get("latitude") and geocode_result.get("longitude"):
                     return {
                         "success": True,
                         "message": "Address verified successfully",
                         "latitude": geocode_result["latitude"],
-                        "longitude": geocode_result["longitude"]
+                        "longitude": geocode_result["longitude"],
+                        "precision": geocode_result["precision"]
                     }
                 else:
                     return {
@@ -2210,24 +2286,19 @@ async def add_address(
     address: AddressInput, current_user: User = Depends(get_current_user_dependency)
 ):
     """
-    Add or update address in user profile.
+    Add address to user profile.
 
-    Now writes to BOTH:
-    1. addresses collection (canonical source of truth)
-    2. user.addresses array (backward compatibility)
+    Writes to the addresses collection (canonical source of truth); the
+    address repository mirrors it into user.addresses.
 
-    If address.is_default is True:
-    - Updates the existing default address (prevents duplicates)
-    - Unsets is_default on all other addresses
-
-    If address.is_default is False:
-    - Adds new address without affecting existing defaults
+    If address.is_default is True, is_default is unset on all other
+    addresses. Otherwise existing defaults are unaffected.
     """
     # Geocode address if maps provider is available
     if maps_provider:
         try:
-            geocode_result = await maps_provider.geocode(
-                f"{address.street}, {address.city}, {address.state} {address.zip_code}"
+            geocode_result = await geocoding_service.geocode(
+                format_address(address.street, address.city, address.state, address.zip_code)
             )
             if geocode_result:
                 address.latitude = geocode_result["latitude"]
@@ -2251,55 +2322,10 @@ async def add_address(
         "formatted_address": getattr(address, "formatted_address", None),  # Full formatted address
     }
 
-    # Create canonical address in addresses collection
+    # Create canonical address; the repository unsets other defaults and
+    # rewrites user.addresses from the collection
     new_address = create_address_for_user(current_user.id, address_payload)
-    await db.addresses.insert_one(new_address.model_dump())
-
-    # Set as default in addresses collection if needed
-    if new_address.is_default:
-        await set_default_address(current_user.id, new_address.id)
-
-    # Also update embedded user.addresses for backward compatibility
-    user = await db.users.find_one({"id": current_user.id})
-    existing_addresses = user.get("addresses", [])
-
-    if address.is_default:
-        # Find existing default address
-        existing_default = next(
-            (addr for addr in existing_addresses if addr.get("is_default")),
-            None
-        )
-
-        if existing_default:
-            # UPDATE existing default address (replace it completely)
-            logger.info(f"Updating existing default address for user {current_user.id}")
-            # Use address_payload (not address) and add new_address.id for sync
-            updated_address = address_payload.copy()
-            updated_address["id"] = new_address.id
-            await db.users.update_one(
-                {"id": current_user.id, "addresses.is_default": True},
-                {"$set": {
-                    "addresses.$": updated_address  # Replace the matched address
-                }}
-            )
-        else:
-            # No default exists, add this as the first default
-            logger.info(f"Adding first default address for user {current_user.id}")
-            # Use address_payload and add new_address.id
-            new_address_doc = address_payload.copy()
-            new_address_doc["id"] = new_address.id
-            await db.users.update_one(
-                {"id": current_user.id},
-                {"$push": {"addresses": new_address_doc}}
-            )
-    else:
-        # Not a default address, just add it
-        new_address_doc = address_payload.copy()
-        new_address_doc["id"] = new_address.id
-        await db.users.update_one(
-            {"id": current_user.id},
-            {"$push": {"addresses": new_address_doc}}
-        )
+    await address_repository.insert(new_address)
 
     return {"message": "Address saved successfully", "address_id": new_address.id}
 
@@ -2312,8 +2338,8 @@ async def update_business_address(
     # Geocode address if maps provider is available
     if maps_provider:
         try:
-            geocode_result = await maps_provider.geocode(
-                f"{address.street}, {address.city}, {address.state} {address.zip_code}"
+            geocode_result = await geocoding_service.geocode(
+                format_address(address.street, address.city, address.state, address.zip_code)
             )
             if geocode_result:
                 address.latitude = geocode_result["latitude"]
@@ -2323,19 +2349,16 @@ async def update_business_address(
             logger.warning(f"Geocoding failed: {e}")
 
     # Replace first address or add if no addresses exist
-    if current_user.addresses and len(current_user.addresses) > 0:
+    # sync_user first imports addresses that so far only exist in user.addresses
+    existing_addresses = await address_repository.sync_user(current_user.id)
+    address_fields = address.model_dump(exclude={"id", "user_id", "is_default", "created_at", "updated_at"})
+    if existing_addresses:
         # Update first address (business address)
-        await db.users.update_one(
-            {"id": current_user.id},
-            {"$set": {"addresses.0": address.model_dump()}}
-        )
+        await address_repository.update(existing_addresses[0].id, address_fields)
         logger.info(f"Updated business address for user {current_user.id}")
     else:
         # No addresses exist, add the first one
-        await db.users.update_one(
-            {"id": current_user.id},
-            {"$push": {"addresses": address.model_dump()}}
-        )
+        await address_repository.insert(Address(**address_fields, user_id=current_user.id, is_default=True))
         logger.info(f"Added first business address for user {current_user.id}")
 
     return {"message": "Business address updated successfully", "address": address.model_dump()}
@@ -2348,7 +2371,7 @@ async def get_addresses(current_user: User = Depends(get_current_user_dependency
     Falls back to embedded addresses if collection is empty (for backward compatibility).
     """
     # Try to get from addresses collection first
-    addresses = await list_addresses_for_user(current_user.id)
+    addresses = await address_repository.list_for_user(current_user.id)
 
     # Fallback to embedded addresses if collection is empty
     if not addresses and current_user.addresses:
@@ -2486,8 +2509,7 @@ async def update_contractor_profile(
     # Supports Google Places Autocomplete fields (place_id, lat/lng, formatted_address)
     if "business_address" in profile_data:
         addr_data = profile_data["business_address"]
-        new_address = {
-            "id": str(uuid.uuid4()),
+        new_address = create_address_for_user(current_user.id, {
             "street": addr_data.get("street", ""),
             "line2": addr_data.get("line2"),  # apt/suite/unit
             "city": addr_data.get("city", ""),
@@ -2499,9 +2521,20 @@ async def update_contractor_profile(
             "place_id": addr_data.get("place_id"),  # Google Places ID
             "formatted_address": addr_data.get("formatted_address"),
             "is_default": True
-        }
-        # Add address to addresses array (replace any existing default address)
-        update_fields["addresses"] = [new_address]
+        })
+        # Replace the default (business) address in place; only the first
+        # one is inserted. sync_user imports embedded-only addresses first.
+        existing_default = next(
+            (existing for existing in await address_repository.sync_user(current_user.id) if existing.is_default),
+            None
+        )
+        if existing_default:
+            await address_repository.update(
+                existing_default.id,
+                new_address.model_dump(exclude={"id", "user_id", "is_default", "created_at", "updated_at"})
+            )
+        else:
+            await address_repository.insert(new_address)
 
     # Handle banking_info (for Stripe Connect or similar)
     if "banking_info" in profile_data:
@@ -2519,7 +2552,7 @@ async def update_contractor_profile(
     if "insurance_policy_number" in profile_data:
         update_fields["insurance_policy_number"] = profile_data["insurance_policy_number"]
 
-    if not update_fields:
+    if not update_fields and "business_address" not in profile_data:
         raise HTTPException(400, detail="No fields to update")
 
     update_fields["updated_at"] = datetime.utcnow().isoformat()
@@ -3109,6 +3142,15 @@ async def get_contractor_job(
     return job
 
 
+def lifecycle_http_error(error: JobLifecycleError) -> HTTPException:
+    """Map JobLifecycleService errors to HTTP errors"""
+    if isinstance(error, JobNotFoundError):
+        return HTTPException(404, detail=str(error))
+    if isinstance(error, JobTransitionConflict):
+        return HTTPException(409, detail=str(error))
+    return HTTPException(400, detail=str(error))
+
+
 @api_router.post("/contractor/jobs/{job_id}/accept")
 async def accept_contractor_job(
     job_id: str,
@@ -3134,33 +3176,19 @@ async def accept_contractor_job(
             }
         )
 
-    # Fetch job
-    job = await db.jobs.find_one({"id": job_id})
-    if not job:
-        raise HTTPException(404, detail="Job not found")
-
-    # Check if job is available (posted status)
-    current_status = job.get("status", "draft")
-    if current_status != "posted":
-        raise HTTPException(
-            400,
-            detail=f"Job cannot be accepted. Current status: {current_status}"
+    # Use lifecycle service to transition to accepted and set assignment.
+    # The transition only matches a posted, unassigned job, so concurrent
+    # accepts of the same job cannot both succeed.
+    try:
+        updated_job = await job_lifecycle.apply_transition(
+            job_id=job_id,
+            new_status=JobStatus.ACCEPTED,
+            actor_id=current_user.id,
+            actor_role=current_user.role.value,
+            additional_data={"provider_id": current_user.id}
         )
-
-    # Check if already assigned using helper
-    from services.job_lifecycle import get_assigned_provider_id
-    existing_assignment = get_assigned_provider_id(job)
-    if existing_assignment:
-        raise HTTPException(400, detail="Job already assigned to another provider")
-
-    # Use lifecycle service to transition to accepted and set assignment
-    updated_job = await job_lifecycle.apply_transition(
-        job_id=job_id,
-        new_status=JobStatus.ACCEPTED,
-        actor_id=current_user.id,
-        actor_role=current_user.role.value,
-        additional_data={"provider_id": current_user.id}
-    )
+    except JobLifecycleError as e:
+        raise lifecycle_http_error(e)
 
     logger.info(f"Job {job_id} accepted by {current_user.role.value} {current_user.id}")
 
@@ -3218,13 +3246,16 @@ async def update_contractor_job_status(
         raise HTTPException(400, detail=f"Invalid status: {new_status_str}")
 
     # Use lifecycle service to apply transition
-    updated_job = await job_lifecycle.apply_transition(
-        job_id=job_id,
-        new_status=new_status,
-        actor_id=current_user.id,
-        actor_role=current_user.role.value,
-        additional_data=status_update
-    )
+    try:
+        updated_job = await job_lifecycle.apply_transition(
+            job_id=job_id,
+            new_status=new_status,
+            actor_id=current_user.id,
+            actor_role=current_user.role.value,
+            additional_data=status_update
+        )
+    except JobLifecycleError as e:
+        raise lifecycle_http_error(e)
 
     logger.info(f"Job {job_id} status updated to {new_status_str} by {current_user.role.value} {current_user.id}")
 
@@ -3286,16 +3317,19 @@ async def cancel_job(
         )
 
     # Use lifecycle service to apply transition
-    updated_job = await job_lifecycle.apply_transition(
-        job_id=job_id,
-        new_status=new_status,
-        actor_id=current_user.id,
-        actor_role=current_user.role.value,
-        additional_data={
-            "cancellation_reason": cancel_request.get("reason", ""),
-            "cancelled_by": current_user.id
-        }
-    )
+    try:
+        updated_job = await job_lifecycle.apply_transition(
+            job_id=job_id,
+            new_status=new_status,
+            actor_id=current_user.id,
+            actor_role=current_user.role.value,
+            additional_data={
+                "cancellation_reason": cancel_request.get("reason", ""),
+                "cancelled_by": current_user.id
+            }
+        )
+    except JobLifecycleError as e:
+        raise lifecycle_http_error(e)
 
     logger.info(f"Job {job_id} cancelled to {new_status.value} by {current_user.role.value} {current_user.id}")
 
@@ -3662,68 +3696,14 @@ async def get_time_logs(
 @api_router.get("/contractor/reports/monthly")
 async def get_monthly_report(
     year: int,
-    month: int,
+    month: int = Query(..., ge=1, le=12),
     current_user: User = Depends(get_current_user_dependency)
 ):
     """Get monthly report for contractor"""
     if current_user.role != UserRole.CONTRACTOR:
         raise HTTPException(403, detail="Only contractors can access reports")
 
-    # Query jobs for the month
-    start_date = f"{year}-{month:02d}-01"
-    if month == 12:
-        end_date = f"{year + 1}-01-01"
-    else:
-        end_date = f"{year}-{month + 1:02d}-01"
-
-    jobs = await db.jobs.find({
-        "contractor_id": current_user.id,
-        "created_at": {"$gte": start_date, "$lt": end_date}
-    }).to_list(1000)
-
-    completed_jobs = [j for j in jobs if j.get('status') == 'completed']
-
-    # Calculate totals
-    total_revenue = sum(j.get('contractor_invoice_amount', 0) for j in completed_jobs)
-
-    # Get expenses for the month
-    expenses = await db.expenses.find({
-        "contractor_id": current_user.id,
-        "date": {"$gte": start_date, "$lt": end_date}
-    }).to_list(1000)
-
-    total_expenses = sum(e.get('amount', 0) for e in expenses)
-
-    # Get mileage for the month
-    mileage_logs = await db.mileage_logs.find({
-        "contractor_id": current_user.id,
-        "date": {"$gte": start_date, "$lt": end_date}
-    }).to_list(1000)
-
-    total_mileage = sum(m.get('miles', 0) for m in mileage_logs)
-
-    # Get time logs for the month
-    time_logs = await db.time_logs.find({
-        "contractor_id": current_user.id,
-        "start_time": {"$gte": start_date, "$lt": end_date}
-    }).to_list(1000)
-
-    total_hours = sum(t.get('duration_minutes', 0) for t in time_logs) / 60
-
-    report = {
-        "year": year,
-        "month": month,
-        "contractor_id": current_user.id,
-        "total_jobs": len(jobs),
-        "completed_jobs": len(completed_jobs),
-        "total_revenue": total_revenue,
-        "total_expenses": total_expenses,
-        "total_mileage": total_mileage,
-        "total_hours": total_hours,
-        "net_income": total_revenue - total_expenses
-    }
-
-    return report
+    return await report_service.get_monthly_report(current_user.id, year, month)
 
 
 @api_router.get("/contractor/reports/yearly")
@@ -3731,76 +3711,11 @@ async def get_yearly_report(
     year: int,
     current_user: User = Depends(get_current_user_dependency)
 ):
-    """Get yearly report for contractor"""
+    """Get yearly report for contractor, with a per-month breakdown"""
     if current_user.role != UserRole.CONTRACTOR:
         raise HTTPException(403, detail="Only contractors can access reports")
 
-    start_date = f"{year}-01-01"
-    end_date = f"{year + 1}-01-01"
-
-    # Get all jobs for the year
-    jobs = await db.jobs.find({
-        "contractor_id": current_user.id,
-        "created_at": {"$gte": start_date, "$lt": end_date}
-    }).to_list(10000)
-
-    completed_jobs = [j for j in jobs if j.get('status') == 'completed']
-    total_revenue = sum(j.get('contractor_invoice_amount', 0) for j in completed_jobs)
-
-    # Get expenses
-    expenses = await db.expenses.find({
-        "contractor_id": current_user.id,
-        "date": {"$gte": start_date, "$lt": end_date}
-    }).to_list(10000)
-
-    total_expenses = sum(e.get('amount', 0) for e in expenses)
-
-    # Get mileage
-    mileage_logs = await db.mileage_logs.find({
-        "contractor_id": current_user.id,
-        "date": {"$gte": start_date, "$lt": end_date}
-    }).to_list(10000)
-
-    total_mileage = sum(m.get('miles', 0) for m in mileage_logs)
-
-    # Get time logs
-    time_logs = await db.time_logs.find({
-        "contractor_id": current_user.id,
-        "start_time": {"$gte": start_date, "$lt": end_date}
-    }).to_list(10000)
-
-    total_hours = sum(t.get('duration_minutes', 0) for t in time_logs) / 60
-
-    # Build monthly breakdown (stub for now)
-    monthly_breakdown = []
-    for month in range(1, 13):
-        monthly_breakdown.append({
-            "year": year,
-            "month": month,
-            "contractor_id": current_user.id,
-            "total_jobs": 0,
-            "completed_jobs": 0,
-            "total_revenue": 0,
-            "total_expenses": 0,
-            "total_mileage": 0,
-            "total_hours": 0,
-            "net_income": 0
-        })
-
-    report = {
-        "year": year,
-        "contractor_id": current_user.id,
-        "total_jobs": len(jobs),
-        "completed_jobs": len(completed_jobs),
-        "total_revenue": total_revenue,
-        "total_expenses": total_expenses,
-        "total_mileage": total_mileage,
-        "total_hours": total_hours,
-        "net_income": total_revenue - total_expenses,
-        "monthly_breakdown": monthly_breakdown
-    }
-
-    return report
+    return await report_service.get_yearly_report(current_user.id, year)
 
 
 @api_router.get("/contractor/reports/tax")
@@ -3813,76 +3728,43 @@ async def get_tax_report(
     if current_user.role != UserRole.CONTRACTOR:
         raise HTTPException(403, detail="Only contractors can access reports")
 
-    # Get completed jobs
-    jobs = await db.jobs.find({
-        "contractor_id": current_user.id,
-        "completed_at": {"$gte": start_date, "$lte": end_date},
-        "status": "completed"
-    }).to_list(10000)
-
-    total_revenue = sum(j.get('contractor_invoice_amount', 0) for j in jobs)
-
-    # Get expenses
-    expenses = await db.expenses.find({
-        "contractor_id": current_user.id,
-        "date": {"$gte": start_date, "$lte": end_date}
-    }).to_list(10000)
-
-    total_expenses = sum(e.get('amount', 0) for e in expenses)
-
-    # Get mileage
-    mileage_logs = await db.mileage_logs.find({
-        "contractor_id": current_user.id,
-        "date": {"$gte": start_date, "$lte": end_date}
-    }).to_list(10000)
-
-    total_mileage = sum(m.get('miles', 0) for m in mileage_logs)
-
-    # IRS standard mileage rate (2024: $0.67/mile)
-    IRS_MILEAGE_RATE = 0.67
-    mileage_deduction = total_mileage * IRS_MILEAGE_RATE
-
-    total_deductions = total_expenses + mileage_deduction
-
-    # Determine tax year from start_date
-    tax_year = int(start_date.split('-')[0])
-
-    report = {
-        "contractor_id": current_user.id,
-        "start_date": start_date,
-        "end_date": end_date,
-        "total_revenue": total_revenue,
-        "total_expenses": total_expenses,
-        "total_mileage": total_mileage,
-        "mileage_deduction": mileage_deduction,
-        "total_deductions": total_deductions,
-        "net_income": total_revenue - total_deductions,
-        "tax_year": tax_year,
-        "disclaimer": "For informational purposes only. Not official tax documentation. Consult your tax professional."
-    }
-
-    return report
+    try:
+        return await report_service.get_tax_report(current_user.id, start_date, end_date)
+    except ValueError:
+        raise HTTPException(400, detail="start_date and end_date must be YYYY-MM-DD")
 
 
 @api_router.get("/contractor/reports/tax/pdf")
-async def export_tax_report_pdf(
+@api_router.get("/contractor/reports/tax/export")
+async def export_tax_report(
     start_date: str,
     end_date: str,
+    export_format: str = Query("pdf", alias="format", pattern="^(pdf|csv)$"),
     current_user: User = Depends(get_current_user_dependency)
 ):
-    """Export tax report as PDF (stub - returns JSON for now)"""
+    """
+    Export every job, expense, mileage and time log in the period as PDF or CSV.
+
+    Periods up to a year are streamed in the response; longer periods are
+    written to object storage and a signed download URL is returned.
+    """
     if current_user.role != UserRole.CONTRACTOR:
         raise HTTPException(403, detail="Only contractors can access reports")
 
-    # For now, return the same data as the JSON endpoint
-    # In production, this would generate a PDF using a library like reportlab
-    report = await get_tax_report(start_date, end_date, current_user)
+    try:
+        stream = tax_export_service.should_stream(start_date, end_date)
+    except ValueError:
+        raise HTTPException(400, detail="start_date and end_date must be YYYY-MM-DD")
 
-    return {
-        "message": "PDF export not yet implemented",
-        "data": report,
-        "note": "Use the JSON endpoint for now"
-    }
+    if not stream:
+        return await tax_export_service.export_to_storage(current_user.id, start_date, end_date, export_format)
+
+    filename = tax_export_service.filename(start_date, end_date, export_format)
+    return StreamingResponse(
+        tax_export_service.iter_export(current_user.id, start_date, end_date, export_format),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 # ==================== WARRANTY SYSTEM ROUTES ====================
@@ -4333,65 +4215,147 @@ async def admin_list_all_jobs(
 
 @api_router.get("/admin/stats")
 async def admin_get_system_stats(
+    fresh: bool = False,
     current_user: User = Depends(require_admin)
 ):
-    """Get system-wide statistics (admin only)"""
-    # Count users by role
-    total_users = await db.users.count_documents({})
-    customers = await db.users.count_documents({"role": UserRole.CUSTOMER})
-    contractors = await db.users.count_documents({"role": UserRole.CONTRACTOR})
-
-    # Count jobs by status
-    total_jobs = await db.jobs.count_documents({})
-    pending_jobs = await db.jobs.count_documents({"status": "pending"})
-    in_progress_jobs = await db.jobs.count_documents({"status": "in_progress"})
-    completed_jobs = await db.jobs.count_documents({"status": "completed"})
-
-    # Calculate revenue (sum of completed job amounts)
-    completed_job_docs = await db.jobs.find({"status": "completed"}).to_list(10000)
-    total_revenue = sum(job.get("contractor_invoice_amount", 0) for job in completed_job_docs)
-
-    # Count quotes
-    total_quotes = await db.quotes.count_documents({})
-    pending_quotes = await db.quotes.count_documents({"status": QuoteStatus.DRAFT})
-
-    # Count warranty requests
-    total_warranties = await db.warranty_requests.count_documents({})
-    pending_warranties = await db.warranty_requests.count_documents({"status": "pending"})
-
-    # Count change orders
-    total_change_orders = await db.change_orders.count_documents({})
-    pending_change_orders = await db.change_orders.count_documents({"status": "pending"})
+    """
+    Get system-wide statistics (admin only).
 
-    return {
-        "users": {
-            "total": total_users,
-            "customers": customers,
-            "contractors": contractors
-        },
-        "jobs": {
-            "total": total_jobs,
-            "pending": pending_jobs,
-            "in_progress": in_progress_jobs,
-            "completed": completed_jobs
-        },
-        "revenue": {
-            "total": total_revenue,
-            "completed_jobs_count": len(completed_job_docs)
-        },
-        "quotes": {
-            "total": total_quotes,
-            "pending": pending_quotes
-        },
-        "warranties": {
-            "total": total_warranties,
-            "pending": pending_warranties
-        },
-        "change_orders": {
-            "total": total_change_orders,
-            "pending": pending_change_orders
-        }
-    }
+    Served from the materialized snapshot (see "freshness" for its age);
+    ?fresh=1 computes them live.
+    """
+    return await system_stats_service.get_stats(fresh=fresh)
+
+
+@api_router.get("/admin/analytics/series")
+async def admin_get_analytics_series(
+    metric: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    interval: str = "day",
+    group_by: Optional[str] = Query(None, pattern="^(category|zip)$"),
+    top: int = Query(10, ge=1, le=100),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Bucketed analytics series from daily rollups (admin only).
+
+    E.g. jobs posted per day per category (metric=job_posted,
+    group_by=category), time-to-accept (metric=job_accepted, avg seconds),
+    revenue per zip (metric=job_completed, group_by=zip, sum).
+    Defaults to the last 30 days.
+    """
+    if metric not in ANALYTICS_METRICS:
+        raise HTTPException(400, detail=f"metric must be one of {', '.join(ANALYTICS_METRICS)}")
+    if interval not in ANALYTICS_INTERVALS:
+        raise HTTPException(400, detail=f"interval must be one of {', '.join(ANALYTICS_INTERVALS)}")
+
+    try:
+        end = date.fromisoformat(end_date) if end_date else datetime.utcnow().date()
+        start = date.fromisoformat(start_date) if start_date else end - timedelta(days=29)
+    except ValueError:
+        raise HTTPException(400, detail="start_date and end_date must be YYYY-MM-DD")
+
+    return await analytics_service.get_series(metric, start, end, interval, group_by, top)
+
+
+@api_router.get("/admin/service-areas")
+async def admin_get_service_areas(current_user: User = Depends(require_admin)):
+    """Loaded service areas by market (admin only)"""
+    return geofence_provider.summary()
+
+
+@api_router.put("/admin/service-areas/{market}")
+async def admin_save_service_areas(
+    market: str,
+    geojson: dict,
+    current_user: User = Depends(require_admin)
+):
+    """
+    Create or replace a market's service areas from GeoJSON (admin only).
+
+    Accepts a FeatureCollection, Feature, Polygon or MultiPolygon. Takes
+    effect immediately on this worker and within GEOFENCE_REFRESH_SECONDS
+    on the others.
+    """
+    try:
+        return await geofence_provider.save_market(market, geojson)
+    except GeofenceError as e:
+        raise HTTPException(400, detail=str(e))
+
+
+@api_router.delete("/admin/service-areas/{market}")
+async def admin_delete_service_areas(market: str, current_user: User = Depends(require_admin)):
+    """Remove a market's service areas (admin only)"""
+    if not await geofence_provider.delete_market(market):
+        raise HTTPException(404, detail="Market not found")
+    return geofence_provider.summary()
+
+
+@api_router.post("/admin/service-areas/reload")
+async def admin_reload_service_areas(current_user: User = Depends(require_admin)):
+    """Reload service areas from the database without a restart (admin only)"""
+    try:
+        return await geofence_provider.reload()
+    except GeofenceError as e:
+        raise HTTPException(400, detail=str(e))
+
+
+@api_router.post("/service-areas/check")
+async def check_service_areas(
+    points: List[Dict[str, float]],
+    current_user: User = Depends(get_current_user_dependency)
+):
+    """
+    Check which service area each point falls in.
+
+    Body: [{"latitude": ..., "longitude": ...}, ...] (up to 1000 points)
+    """
+    if len(points) > 1000:
+        raise HTTPException(400, detail="At most 1000 points per request")
+    try:
+        coordinates = [(point["latitude"], point["longitude"]) for point in points]
+    except KeyError:
+        raise HTTPException(400, detail="Each point needs latitude and longitude")
+
+    return [
+        {"in_area": result is not None, **(result or {})}
+        for result in geofence_provider.check_many(coordinates)
+    ]
+
+
+@api_router.post("/admin/routing/backlog")
+async def admin_route_backlog(
+    dry_run: bool = False,
+    limit: Optional[int] = None,
+    current_user: User = Depends(require_admin)
+):
+    """
+    Assign all posted, unassigned jobs to contractors in one batch (admin only).
+
+    Solves the assignment globally (skills, 50-mile radius, capacity) and
+    reports travel miles saved compared with first-come assignment.
+    Use dry_run=true to preview the assignments without writing them.
+    """
+    return await bulk_routing_engine.route_backlog(
+        actor_id=current_user.id,
+        actor_role=current_user.role.value,
+        dry_run=dry_run,
+        limit=limit
+    )
+
+
+@api_router.post("/admin/customers/reverify-locations")
+async def admin_reverify_customer_locations(
+    dry_run: bool = False,
+    current_user: User = Depends(require_admin)
+):
+    """
+    Re-verify all customers with auto_verify_enabled against their current
+    default address (admin only). Use dry_run=true to count changes without
+    writing them.
+    """
+    return await location_verification.reverify_all(dry_run=dry_run)
 
 
 @api_router.get("/admin/provider-gate/status")
@@ -4454,31 +4418,72 @@ async def get_jobs_feed(
     )
 
     # Transform job data to match frontend expectations
-    result = []
-    for job in jobs:
-        job_dict = job.model_dump()
-        # Transform snake_case to camelCase for frontend compatibility
-        transformed = {
-            "id": job_dict.get("id"),
-            "customerId": job_dict.get("customer_id"),
-            "status": job_dict.get("status"),
-            "title": job_dict.get("title") or job_dict.get("description", "Untitled Job"),
-            "description": job_dict.get("description", ""),
-            "category": job_dict.get("service_category", ""),
-            "location": {
-                "city": job_dict.get("address", {}).get("city", ""),
-                "state": job_dict.get("address", {}).get("state", ""),
-                "zipCode": job_dict.get("address", {}).get("zip", ""),
-                "latitude": job_dict.get("address", {}).get("lat"),
-                "longitude": job_dict.get("address", {}).get("lon"),
-            },
-            "quotedAmount": job_dict.get("agreed_amount"),
-            "finalAmount": job_dict.get("budget_max"),
-            "item_type": "job",
-        }
-        result.append(transformed)
-    
-    return result
+    return [to_feed_item(job.model_dump()) for job in jobs]
+
+
+@api_router.get("/handyman/jobs/feed/stream")
+async def stream_jobs_feed(
+    request: Request,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    radius_miles: float = 50,
+    skills: Optional[str] = None,
+    current_user: User = Depends(require_technician_or_admin)
+):
+    """
+    Push job feed updates over Server-Sent Events.
+
+    Sends job_posted, job_taken and job_cancelled events for jobs within
+    radius_miles of (lat, lon) matching skills (comma-separated). Location
+    and skills default to the provider's business address and profile.
+    Clients load /handyman/jobs/feed once, then apply these events.
+    """
+    if lat is None or lon is None:
+        default_address = await address_repository.default_for_user(current_user.id)
+        location = get_business_location(
+            current_user.model_dump(),
+            default_address.model_dump() if default_address else None
+        )
+        if not location:
+            raise HTTPException(
+                400,
+                detail="No geocoded business address on file. Pass lat and lon or update your address."
+            )
+        lat, lon = location["latitude"], location["longitude"]
+
+    skill_list = skills.split(",") if skills else (current_user.skills or [])
+    contractor_type = (
+        "handyman" if current_user.role == UserRole.HANDYMAN
+        else "licensed" if current_user.role == UserRole.CONTRACTOR
+        else None
+    )
+
+    subscription = job_feed_hub.subscribe(
+        user_id=current_user.id,
+        lat=lat,
+        lon=lon,
+        radius_miles=radius_miles,
+        skills=[skill.strip() for skill in skill_list if skill.strip()],
+        contractor_type=contractor_type
+    )
+
+    async def event_stream():
+        try:
+            while not await request.is_disconnected():
+                message = await subscription.queue.get()
+                if message is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                event_type, payload = message
+                yield format_sse(event_type, payload)
+        finally:
+            job_feed_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @api_router.get("/handyman/jobs/active")
@@ -4556,18 +4561,15 @@ async def update_job_status(
 
     # Apply transition
     try:
-        from services.job_lifecycle import JobLifecycleError
-        updated_job = await job_lifecycle.apply_transition(
-            job=job,
+        return await job_lifecycle.apply_transition(
+            job_id=job_id,
             new_status=status_update.status,
             actor_id=current_user.id,
             actor_role=actor_role,
             additional_data=additional_data if additional_data else None
         )
-
-        return updated_job.model_dump()
     except JobLifecycleError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise lifecycle_http_error(e)
 
 
 # ==================== PROPOSALS ====================
@@ -4639,6 +4641,30 @@ async def get_proposals_for_job(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@api_router.get("/jobs/{job_id}/proposals/context")
+async def get_proposals_with_context(
+    job_id: str,
+    status: Optional[List[ProposalStatus]] = Query(None),
+    current_user: User = Depends(get_current_user_dependency)
+):
+    """
+    Get proposals for a job with contractor name, rating, completed
+    job count and distance (customer only). Optionally filter by status.
+    """
+    if current_user.role != UserRole.CUSTOMER:
+        raise HTTPException(status_code=403, detail="Only customers can view proposals")
+
+    try:
+        from services.proposal_service import ProposalError
+        return await proposal_service.get_proposals_with_context(
+            job_id=job_id,
+            customer_id=current_user.id,
+            statuses=status
+        )
+    except ProposalError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @api_router.post("/proposals/{proposal_id}/accept")
 async def accept_proposal(
     proposal_id: str,
@@ -4675,24 +4701,23 @@ async def accept_proposal(
 
     # Apply transition using lifecycle service
     try:
-        from services.job_lifecycle import JobLifecycleError
         updated_job = await job_lifecycle.apply_transition(
-            job=job,
+            job_id=job.id,
             new_status=JobStatus.ACCEPTED,
             actor_id=current_user.id,
             actor_role=current_user.role.value,
             additional_data={
                 "accepted_proposal_id": proposal.id,
-                "assigned_contractor_id": proposal.contractor_id
+                "provider_id": proposal.contractor_id
             }
         )
 
         return {
             "message": "Proposal accepted",
-            "job": updated_job.model_dump()
+            "job": updated_job
         }
     except JobLifecycleError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise lifecycle_http_error(e)
 
 
 @api_router.post("/proposals/{proposal_id}/withdraw")
@@ -4748,6 +4773,78 @@ async def get_payouts(
     return [payout.model_dump() for payout in payouts]
 
 
+@api_router.post("/admin/wallets/reconcile")
+async def reconcile_wallets(
+    fix: bool = False,
+    current_user: User = Depends(require_admin)
+):
+    """
+    Recompute wallet balances from payouts and report mismatches.
+    With fix=true, mismatched wallets are corrected.
+    """
+    return await payout_service.reconcile_wallets(fix=fix)
+
+
+@api_router.put("/admin/contractors/{contractor_id}/payout-account")
+async def set_contractor_payout_account(
+    contractor_id: str,
+    payout_account: dict = Body(...),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Set the payment provider destination for a contractor's payouts
+    (admin only), e.g. {"payout_account_id": "acct_..."}. Payouts held for
+    a missing account are picked up on the worker's next pass.
+    """
+    payout_account_id = (payout_account.get("payout_account_id") or "").strip() or None
+
+    result = await db.users.update_one(
+        {"id": contractor_id, "role": {"$in": [UserRole.CONTRACTOR.value, UserRole.HANDYMAN.value]}},
+        {"$set": {"payout_account_id": payout_account_id, "updated_at": datetime.utcnow()}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(404, detail="Contractor not found")
+
+    if payout_account_id:
+        # Release held payouts now instead of waiting out the retry delay
+        await db.payouts.update_many(
+            {
+                "contractor_id": contractor_id,
+                "status": PayoutStatus.QUEUED_FOR_TRANSFER.value,
+                "hold_reason": {"$ne": None},
+                "lease_token": None
+            },
+            {"$set": {"lease_expires_at": None}}
+        )
+
+    return {"contractor_id": contractor_id, "payout_account_id": payout_account_id}
+
+
+@api_router.get("/admin/payouts/worker")
+async def get_payout_worker_metrics(
+    current_user: User = Depends(require_admin)
+):
+    """Payout worker throughput, provider latency and queue lag"""
+    return await payout_worker.get_metrics()
+
+
+@api_router.get("/admin/metrics/db", response_class=PlainTextResponse)
+async def get_db_metrics(
+    current_user: User = Depends(require_admin)
+):
+    """MongoDB round trips, time and documents per route (Prometheus text format)"""
+    return db_profiler.render_prometheus()
+
+
+@api_router.get("/admin/loop/blocking")
+async def get_loop_blocking_report(
+    top: int = Query(10, ge=1, le=100),
+    current_user: User = Depends(require_admin)
+):
+    """Top event loop blocking call sites per endpoint"""
+    return loop_watchdog.get_report(top)
+
+
 # ==================== GROWTH TRACKING ====================
 
 
@@ -4790,6 +4887,26 @@ async def get_growth_events(
     return [event.model_dump() for event in events]
 
 
+@api_router.post("/admin/growth/{user_id}/rebuild")
+async def rebuild_growth_summary(
+    user_id: str,
+    current_user: User = Depends(require_admin)
+):
+    """
+    Rebuild a contractor's growth summary from all of their growth events.
+    Repair tool - summaries are normally kept up to date incrementally.
+    """
+    user = await db.users.find_one({"id": user_id}, {"_id": 0, "role": 1})
+    if not user:
+        raise HTTPException(404, detail="User not found")
+
+    role = ContractorGrowthRole.HANDYMAN if user.get("role") == UserRole.HANDYMAN.value else ContractorGrowthRole.CONTRACTOR
+    await growth_service.rebuild_summary(user_id, role)
+
+    summary = await growth_service.get_summary(user_id)
+    return summary.model_dump()
+
+
 # ==================== UTILITY ROUTES ====================
 
 
@@ -4855,6 +4972,19 @@ async def health_check(_: bool = Depends(n8n_basic_auth)):
     }
 
 
+# Prometheus scrape endpoint (same basic auth as /api/health)
+loop_lag_monitor = LoopLagMonitor()
+loop_watchdog = LoopWatchdog()
+watch_executor_queue("motor", lambda: motor_asyncio._EXECUTOR)
+watch_executor_queue("default", lambda: asyncio.get_running_loop()._default_executor)
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(_: bool = Depends(n8n_basic_auth)):
+    """Request, event loop, Mongo pool, provider and DB profiler metrics"""
+    return metrics_registry.render() + db_profiler.render_prometheus()
+
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -4865,8 +4995,33 @@ app.add_middleware(
     allow_origins=["*"],  # In production, replace with specific origins
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Round-Trips", "X-DB-Time-Ms", "X-DB-Documents", "X-DB-Slowest"],
 )
 
+# Per-request MongoDB profiling
+app.add_middleware(DbProfilerMiddleware, profiler=db_profiler)
+
+# Per-request address identity map
+app.add_middleware(AddressScopeMiddleware, repository=address_repository)
+
+# Request count, latency and in-flight metrics
+app.add_middleware(MetricsMiddleware)
+
+
+# Background workers started on startup and cancelled on shutdown
+background_tasks: List[asyncio.Task] = []
+
+
+
+async def run_periodically(name: str, interval_seconds: float, job):
+    """Run a background job forever at a fixed interval, logging failures"""
+    while True:
+        try:
+            await job()
+        except Exception as e:
+            logger.error(f"Background job {name} failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
 
 # Event handlers
 @app.on_event("startup")
@@ -4874,46 +5029,21 @@ async def startup_event():
     """Initialize app on startup"""
     logger.info("Starting The Real Johnson Handyman Services API...")
 
-    # Create indexes for better performance
+    # Offline ZIP table (generated at deploy time by build_zip_centroids.py);
+    # logs an error if missing, refuses to start only with ZIP_CENTROIDS_REQUIRED
+    check_zip_centroids()
+
+    # Create indexes for better performance (declared in utils/db_indexes.py)
     try:
-        # Existing indexes
-        await db.users.create_index("email", unique=True)
-        await db.quotes.create_index("customer_id")
-        await db.quotes.create_index("status")
-        await db.services.create_index("category")
-
-        # Phase 4: Jobs indexes
-        await db.jobs.create_index("status")
-        await db.jobs.create_index("service_category")
-        await db.jobs.create_index([("address.zip", 1)])
-        await db.jobs.create_index([("address.lat", "2dsphere"), ("address.lon", "2dsphere")])
-        await db.jobs.create_index("assigned_contractor_id")
-        await db.jobs.create_index("customer_id")
-
-        # Phase 4: Proposals indexes
-        await db.proposals.create_index("job_id")
-        await db.proposals.create_index("contractor_id")
-        await db.proposals.create_index("status")
-
-        # Phase 4: Payouts indexes
-        await db.payouts.create_index("contractor_id")
-        await db.payouts.create_index("status")
-        await db.payouts.create_index("job_id")
-
-        # Phase 4: Growth Events indexes
-        await db.growth_events.create_index("user_id")
-        await db.growth_events.create_index("type")
-        await db.growth_events.create_index([("user_id", 1), ("created_at", -1)])
-
-        # Phase 4: Growth Summary indexes
-        await db.growth_summary.create_index("user_id", unique=True)
-
-        # Addresses collection indexes
-        await db.addresses.create_index("user_id")
-        await db.addresses.create_index([("user_id", 1), ("is_default", 1)])
-        await db.addresses.create_index("id", unique=True)
-
-        logger.info("Database indexes created successfully")
+        # One default address per user, so its partial unique index can build
+        await address_repository.dedupe_defaults()
+        await ensure_indexes(db)
+
+        # Job lifecycle event log (TTL)
+        await job_event_log.ensure_indexes()
+
+        # Analytics time-series collection
+        await analytics_service.ensure_collection()
     except Exception as e:
         logger.warning(f"Index creation warning: {e}")
 
@@ -4922,12 +5052,71 @@ async def startup_event():
     if service_count == 0:
         await seed_default_services()
 
+    await loop_lag_monitor.start()
+    if LOOP_WATCHDOG_ENABLED:
+        await loop_watchdog.start()
+
+    # Publish job lifecycle events to in-process subscribers
+    await job_event_log.start()
+    await job_feed_hub.start()
+
+    # Keep the admin statistics snapshot current
+    await system_stats_service.start()
+
+    # Record lifecycle transitions for analytics
+    await analytics_service.start()
+
+    # Build wallet balances from existing payouts on first deploy
+    try:
+        await payout_service.ensure_wallet_balances()
+    except Exception as e:
+        logger.error(f"Failed to build wallet balances: {e}")
+
+    # Report wallet balance drift
+    background_tasks.append(asyncio.create_task(
+        run_periodically("wallet_reconcile", WALLET_RECONCILE_INTERVAL_SECONDS, payout_service.reconcile_wallets)
+    ))
+
+    # Send queued payouts to the payment provider (opt-in, never through
+    # the mock provider outside dev/test)
+    payout_worker_blocked = payout_worker_disabled_reason(payment_provider, os.getenv("ACTIVE_PAYMENT_PROVIDER"))
+    if payout_worker_blocked:
+        logger.warning(f"Payout worker not started: {payout_worker_blocked}")
+    else:
+        background_tasks.append(asyncio.create_task(
+            run_periodically("payout_worker", PAYOUT_WORKER_INTERVAL_SECONDS, payout_worker.run_once)
+        ))
+
+    # Retry job completion side effects left in the outbox
+    background_tasks.append(asyncio.create_task(
+        run_periodically("job_outbox", JOB_OUTBOX_INTERVAL_SECONDS, job_lifecycle.process_outbox)
+    ))
+
+    # Service area polygons; picks up edits made through other workers
+    try:
+        await geofence_provider.reload()
+    except Exception as e:
+        logger.error(f"Failed to load service areas: {e}")
+    background_tasks.append(asyncio.create_task(
+        run_periodically("geofence_refresh", GEOFENCE_REFRESH_SECONDS, geofence_provider.refresh_if_changed)
+    ))
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("Shutting down API...")
+    for task in background_tasks:
+        task.cancel()
+    await job_feed_hub.stop()
+    await system_stats_service.stop()
+    await analytics_service.stop()
+    await job_event_log.stop()
+    await loop_lag_monitor.stop()
+    await loop_watchdog.stop()
     client.close()
+    if log_listener:
+        log_listener.stop()
 
 
 # Helper function to seed default services
@@ -0,0 +1,460 @@
+"""
+Address repository - the single read and write path for addresses.
+
+The addresses collection is canonical. Copies are kept for older readers:
+
+- users.addresses: the user's addresses, in the embedded Address shape
+- jobs.address_snapshot: the canonical address when the job was created
+- jobs.address: JobAddress (street, city, state, zip, lat, lon)
+
+Reads go through get_many(): one $in query for any number of ids. During
+an HTTP request, AddressScopeMiddleware installs an identity map, so an
+address is loaded at most once per request however many call sites ask
+for it, and batching callers resolve all their addresses in one query.
+
+Writes go to the canonical collection first and then through to the
+copies. migrate() converges existing data: addresses only present in
+users.addresses are imported, users.addresses is rebuilt from the
+collection and job copies are refreshed.
+
+A user has at most one default address, enforced by a partial unique
+index on addresses.user_id where is_default is true. Switching the
+default is one ordered bulk_write (clear the old default, then set the
+new one), so readers never see a user without a default between two
+round trips. Default lookups for routing and feeds are served from a
+short-lived per-process cache (DEFAULT_ADDRESS_CACHE_TTL_SECONDS),
+invalidated by this process's writes.
+"""
+
+import os
+import logging
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Iterable
+from cachetools import TTLCache
+from pymongo import InsertOne, UpdateMany, UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from models import Address
+
+logger = logging.getLogger(__name__)
+
+ADDRESS_MIGRATION_BATCH_SIZE = int(os.getenv("ADDRESS_MIGRATION_BATCH_SIZE", "500"))
+DEFAULT_ADDRESS_CACHE_SIZE = int(os.getenv("DEFAULT_ADDRESS_CACHE_SIZE", "10000"))
+DEFAULT_ADDRESS_CACHE_TTL_SECONDS = int(os.getenv("DEFAULT_ADDRESS_CACHE_TTL_SECONDS", "60"))
+
+# Retries when a concurrent default switch for the same user wins the race
+DEFAULT_SWITCH_ATTEMPTS = 3
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Canonical-only fields, not copied into users.addresses
+_CANONICAL_ONLY = {"user_id", "created_at", "updated_at"}
+
+# Canonical field -> jobs.address (JobAddress) field
+_JOB_ADDRESS_FIELDS = {
+    "street": "street",
+    "city": "city",
+    "state": "state",
+    "zip_code": "zip",
+    "latitude": "lat",
+    "longitude": "lon",
+}
+
+# address id -> Address (None when known not to exist) for the current request
+_identity_map: ContextVar[Optional[Dict[str, Optional[Address]]]] = ContextVar("address_identity_map", default=None)
+
+
+def embedded_address(address: Address) -> Dict[str, Any]:
+    """The users.addresses form of a canonical address"""
+    return address.model_dump(exclude=_CANONICAL_ONLY)
+
+
+def job_address_fields(address: Address) -> Dict[str, Any]:
+    """jobs.address fields from a canonical address (unset coordinates are left out)"""
+    values = address.model_dump(include=set(_JOB_ADDRESS_FIELDS))
+    return {
+        _JOB_ADDRESS_FIELDS[field]: value
+        for field, value in values.items()
+        if value is not None or field not in ("latitude", "longitude")
+    }
+
+
+class AddressRepository:
+    """Canonical address store with batched, request-cached reads"""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        # user id -> default Address
+        self._defaults = TTLCache(maxsize=DEFAULT_ADDRESS_CACHE_SIZE, ttl=DEFAULT_ADDRESS_CACHE_TTL_SECONDS)
+
+    # ----- Request scope -----
+
+    def begin_request(self):
+        """Install an empty identity map; returns a token for end_request"""
+        return _identity_map.set({})
+
+    def end_request(self, token):
+        _identity_map.reset(token)
+
+    def _remember(self, address: Address):
+        identity_map = _identity_map.get()
+        if identity_map is not None:
+            identity_map[address.id] = address
+
+    def _forget(self, address_id: str):
+        identity_map = _identity_map.get()
+        if identity_map is not None:
+            identity_map.pop(address_id, None)
+
+    # ----- Reads -----
+
+    async def get_many(self, address_ids: Iterable[Optional[str]]) -> Dict[str, Address]:
+        """
+        Load addresses by id in at most one query.
+
+        Args:
+            address_ids: Ids to resolve; None and duplicates are ignored
+
+        Returns:
+            {id: Address} for the ids that exist
+        """
+        identity_map = _identity_map.get()
+        if identity_map is None:
+            identity_map = {}
+
+        wanted = [address_id for address_id in dict.fromkeys(address_ids) if address_id]
+        missing = [address_id for address_id in wanted if address_id not in identity_map]
+        if missing:
+            for address_id in missing:
+                identity_map[address_id] = None
+            async for doc in self.db.addresses.find({"id": {"$in": missing}}, {"_id": 0}):
+                identity_map[doc["id"]] = Address(**doc)
+
+        return {address_id: identity_map[address_id] for address_id in wanted if identity_map[address_id]}
+
+    async def get(self, address_id: Optional[str]) -> Optional[Address]:
+        """Address by id, or None"""
+        return (await self.get_many([address_id])).get(address_id)
+
+    async def list_for_user(self, user_id: str) -> List[Address]:
+        """A user's addresses, oldest first"""
+        docs = await self.db.addresses.find({"user_id": user_id}, {"_id": 0}).sort("created_at", 1).to_list(100)
+        addresses = [Address(**doc) for doc in docs]
+        for address in addresses:
+            self._remember(address)
+        return addresses
+
+    # ----- Default address -----
+
+    async def defaults_for_users(self, user_ids: Iterable[str]) -> Dict[str, Address]:
+        """
+        Default addresses of many users, from the cache or one query.
+
+        Users without a default are left out (and not cached, so a new
+        default shows up immediately).
+
+        Returns:
+            {user_id: Address}
+        """
+        wanted = list(dict.fromkeys(user_id for user_id in user_ids if user_id))
+        found = {user_id: self._defaults[user_id] for user_id in wanted if user_id in self._defaults}
+        missing = [user_id for user_id in wanted if user_id not in found]
+        if missing:
+            async for doc in self.db.addresses.find({"user_id": {"$in": missing}, "is_default": True}, {"_id": 0}):
+                address = Address(**doc)
+                self._defaults[address.user_id] = found[address.user_id] = address
+                self._remember(address)
+        return found
+
+    async def default_for_user(self, user_id: str) -> Optional[Address]:
+        """A user's default address, or None"""
+        return (await self.defaults_for_users([user_id])).get(user_id)
+
+    async def _switch_default(self, user_id: str, operation):
+        """
+        Clear the user's current default and apply operation in one ordered
+        bulk_write. operation sets (or inserts) the new default; the partial
+        unique index rejects it if a concurrent switch got there first, in
+        which case the switch is retried.
+        """
+        for attempt in range(DEFAULT_SWITCH_ATTEMPTS):
+            try:
+                await self.db.addresses.bulk_write([
+                    UpdateMany({"user_id": user_id, "is_default": True}, {"$set": {"is_default": False}}),
+                    operation,
+                ], ordered=True)
+                break
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                conflict = errors and all(error.get("code") == DUPLICATE_KEY_ERROR for error in errors)
+                if not conflict or attempt == DEFAULT_SWITCH_ATTEMPTS - 1:
+                    raise
+                logger.info(f"Concurrent default address switch for user {user_id}, retrying")
+        self._defaults.pop(user_id, None)
+
+    async def dedupe_defaults(self, dry_run: bool = False) -> int:
+        """
+        Keep one default per user (the most recently updated), so the
+        partial unique index can be built over existing data.
+
+        Args:
+            dry_run: Count without writing
+
+        Returns:
+            Number of users that had more than one default
+        """
+        pipeline = [
+            {"$match": {"is_default": True}},
+            {"$sort": {"updated_at": -1, "created_at": -1}},
+            {"$group": {"_id": "$user_id", "ids": {"$push": "$id"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+        ]
+        duplicates = await self.db.addresses.aggregate(pipeline).to_list(None)
+        if not duplicates or dry_run:
+            return len(duplicates)
+
+        await self.db.addresses.bulk_write([
+            UpdateMany({"id": {"$in": group["ids"][1:]}}, {"$set": {"is_default": False}})
+            for group in duplicates
+        ], ordered=False)
+        for group in duplicates:
+            self._defaults.pop(group["_id"], None)
+            await self.sync_user(group["_id"])
+
+        logger.warning(f"Cleared duplicate default addresses for {len(duplicates)} users")
+        return len(duplicates)
+
+    # ----- Writes -----
+
+    async def sync_user(self, user_id: str) -> List[Address]:
+        """
+        Converge one user: import addresses that only exist in
+        users.addresses (written before the repository, e.g. contractor
+        business addresses), then rebuild users.addresses from the
+        collection. Nothing embedded is lost even before migrate() has run.
+
+        Returns:
+            The user's addresses, oldest first
+        """
+        user = await self.db.users.find_one({"id": user_id}, {"_id": 0, "id": 1, "addresses": 1})
+        if not user:
+            return await self.list_for_user(user_id)
+
+        stats = {"users_seen": 0, "addresses_imported": 0, "users_rewritten": 0}
+        canonical = await self._migrate_users([user], stats, dry_run=False)
+        addresses = [Address(**doc) for doc in canonical[user_id]]
+        for address in addresses:
+            self._remember(address)
+        return addresses
+
+    async def insert(self, address: Address) -> Address:
+        """
+        Store a new address (made the user's default if is_default is set).
+
+        Returns:
+            The stored address
+        """
+        if address.is_default:
+            await self._switch_default(address.user_id, InsertOne(address.model_dump()))
+        else:
+            await self.db.addresses.insert_one(address.model_dump())
+        self._remember(address)
+        await self.sync_user(address.user_id)
+        return address
+
+    async def set_default(self, user_id: str, address_id: str) -> bool:
+        """
+        Make one of a user's addresses the default and unset all others.
+
+        Returns:
+            False if the user has no such address (the default is unchanged)
+        """
+        address = await self.get(address_id)
+        if not address:
+            # May still be embedded-only; import it and look again
+            self._forget(address_id)
+            address = next((a for a in await self.sync_user(user_id) if a.id == address_id), None)
+        if not address or address.user_id != user_id:
+            return False
+
+        await self._switch_default(user_id, UpdateOne(
+            {"user_id": user_id, "id": address_id},
+            {"$set": {"is_default": True, "updated_at": datetime.utcnow()}}
+        ))
+        self._forget(address_id)
+        await self.sync_user(user_id)
+        return True
+
+    async def update(self, address_id: str, fields: Dict[str, Any]) -> Optional[Address]:
+        """
+        Update an address and write the change through to its copies.
+
+        Args:
+            address_id: Address to update
+            fields: Canonical fields to set (is_default goes through set_default)
+
+        Returns:
+            The updated address, or None if it doesn't exist
+        """
+        fields = {key: value for key, value in fields.items() if key not in _CANONICAL_ONLY | {"id", "is_default"}}
+        doc = await self.db.addresses.find_one_and_update(
+            {"id": address_id},
+            {"$set": {**fields, "updated_at": datetime.utcnow()}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        if not doc:
+            self._forget(address_id)
+            return None
+
+        address = Address(**doc)
+        self._remember(address)
+        self._defaults.pop(address.user_id, None)
+
+        await self.db.users.update_one(
+            {"id": address.user_id, "addresses.id": address_id},
+            {"$set": {f"addresses.$.{key}": value for key, value in embedded_address(address).items()}}
+        )
+        await self.db.jobs.update_many(
+            {"address_id": address_id},
+            {"$set": {
+                "address_snapshot": address.model_dump(),
+                **{f"address.{key}": value for key, value in job_address_fields(address).items()},
+            }}
+        )
+        return address
+
+    # ----- Migration -----
+
+    async def migrate(self, dry_run: bool = False, batch_size: int = ADDRESS_MIGRATION_BATCH_SIZE) -> Dict[str, int]:
+        """
+        Converge users.addresses and job copies onto the addresses collection.
+
+        0. Users with several default addresses keep only the latest one
+        1. Addresses only in users.addresses are imported into the collection
+        2. users.addresses is rebuilt from the collection for every user
+        3. jobs.address_snapshot / jobs.address are refreshed where they differ
+
+        Returns:
+            Counts of imported addresses, rewritten users and refreshed jobs
+        """
+        stats = {
+            "duplicate_defaults": await self.dedupe_defaults(dry_run=dry_run),
+            "users_seen": 0, "addresses_imported": 0, "users_rewritten": 0, "jobs_seen": 0, "jobs_refreshed": 0,
+        }
+
+        batch: List[dict] = []
+        async for user in self.db.users.find({}, {"_id": 0, "id": 1, "addresses": 1}).batch_size(batch_size):
+            batch.append(user)
+            if len(batch) >= batch_size:
+                await self._migrate_users(batch, stats, dry_run)
+                batch = []
+        if batch:
+            await self._migrate_users(batch, stats, dry_run)
+
+        batch = []
+        cursor = self.db.jobs.find(
+            {"address_id": {"$type": "string"}},
+            {"_id": 0, "id": 1, "address_id": 1, "address": 1, "address_snapshot": 1}
+        ).batch_size(batch_size)
+        async for job in cursor:
+            batch.append(job)
+            if len(batch) >= batch_size:
+                await self._migrate_jobs(batch, stats, dry_run)
+                batch = []
+        if batch:
+            await self._migrate_jobs(batch, stats, dry_run)
+
+        logger.info(f"Address migration{' (dry run)' if dry_run else ''}: {stats}")
+        return stats
+
+    async def _migrate_users(self, users: List[dict], stats: Dict[str, int], dry_run: bool) -> Dict[str, List[dict]]:
+        """Import embedded-only addresses and rebuild users.addresses; returns {user_id: canonical docs}"""
+        stats["users_seen"] += len(users)
+        user_ids = [user["id"] for user in users]
+
+        canonical: Dict[str, List[dict]] = {user_id: [] for user_id in user_ids}
+        known_ids = set()
+        has_default = set()
+        async for doc in self.db.addresses.find({"user_id": {"$in": user_ids}}, {"_id": 0}).sort("created_at", 1):
+            canonical[doc["user_id"]].append(doc)
+            known_ids.add(doc["id"])
+            if doc.get("is_default"):
+                has_default.add(doc["user_id"])
+
+        imports = []
+        for user in users:
+            for embedded in user.get("addresses") or []:
+                if embedded.get("id") in known_ids:
+                    continue
+                try:
+                    address = Address(**{**embedded, "user_id": user["id"]})
+                except ValueError as e:
+                    logger.warning(f"Skipping invalid embedded address for user {user['id']}: {e}")
+                    continue
+                # At most one default per user (partial unique index)
+                if address.is_default and user["id"] in has_default:
+                    address.is_default = False
+                if address.is_default:
+                    has_default.add(user["id"])
+                known_ids.add(address.id)
+                imports.append(address.model_dump())
+                canonical[user["id"]].append(imports[-1])
+
+        operations = []
+        for user in users:
+            rebuilt = [embedded_address(Address(**doc)) for doc in canonical[user["id"]]]
+            if rebuilt != (user.get("addresses") or []):
+                operations.append(UpdateOne({"id": user["id"]}, {"$set": {"addresses": rebuilt}}))
+
+        stats["addresses_imported"] += len(imports)
+        stats["users_rewritten"] += len(operations)
+        if dry_run:
+            return canonical
+        if imports:
+            await self.db.addresses.insert_many(imports, ordered=False)
+        if operations:
+            await self.db.users.bulk_write(operations, ordered=False)
+        return canonical
+
+    async def _migrate_jobs(self, jobs: List[dict], stats: Dict[str, int], dry_run: bool):
+        stats["jobs_seen"] += len(jobs)
+        addresses = await self.get_many(job["address_id"] for job in jobs)
+
+        operations = []
+        for job in jobs:
+            address = addresses.get(job["address_id"])
+            if address is None:
+                continue
+            snapshot = address.model_dump()
+            job_address = {**(job.get("address") or {}), **job_address_fields(address)}
+            if job.get("address_snapshot") != snapshot or job.get("address") != job_address:
+                operations.append(UpdateOne(
+                    {"id": job["id"]},
+                    {"$set": {"address_snapshot": snapshot, "address": job_address}}
+                ))
+
+        stats["jobs_refreshed"] += len(operations)
+        if operations and not dry_run:
+            await self.db.jobs.bulk_write(operations, ordered=False)
+
+
+class AddressScopeMiddleware:
+    """ASGI middleware giving each HTTP request its own address identity map"""
+
+    def __init__(self, app, repository: AddressRepository):
+        self.app = app
+        self.repository = repository
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = self.repository.begin_request()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.repository.end_request(token)
@@ -0,0 +1,319 @@
+"""
+AnalyticsService - Time-series analytics for jobs, quotes and payouts.
+
+Compact rows (metric, category, zip, value) are written to the
+analytics_events time-series collection when:
+
+- a job lifecycle event arrives on the bus (posted, accepted, completed,
+  cancelled); only events recorded by this process are taken, so each
+  transition is counted once however many workers receive it
+- a quote is created
+- a payout is paid
+
+Every write also $inc's daily rollups in analytics_rollups, one document
+per (metric, dimension, key, day) where dimension is "all", "category"
+or "zip". Dashboard queries read only rollups: a year of one metric is
+at most 365 documents per key, regardless of event volume.
+rebuild_rollups() recomputes them from analytics_events.
+
+Values per metric:
+- job_accepted: seconds from job creation to acceptance (time-to-accept)
+- job_completed: contractor invoice amount (revenue)
+- quote_created: quote total
+- payout_paid: net payout amount
+"""
+
+import os
+import asyncio
+import logging
+from datetime import datetime, date, timedelta
+from typing import Dict, Any, Optional, List, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+from models import JobStatus
+from services.job_events import JobEventBus, EVENT_ORIGIN
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_RETENTION_DAYS = int(os.getenv("ANALYTICS_RETENTION_DAYS", "730"))
+
+METRICS = ["job_posted", "job_accepted", "job_completed", "job_cancelled", "quote_created", "payout_paid"]
+DIMENSIONS = ["all", "category", "zip"]
+INTERVALS = ["day", "week", "month"]
+
+# Job statuses that produce an analytics row
+STATUS_METRICS = {
+    JobStatus.POSTED.value: "job_posted",
+    JobStatus.ACCEPTED.value: "job_accepted",
+    JobStatus.COMPLETED.value: "job_completed",
+    JobStatus.CANCELLED_BEFORE_ACCEPT.value: "job_cancelled",
+    JobStatus.CANCELLED_AFTER_ACCEPT.value: "job_cancelled",
+    JobStatus.CANCELLED_IN_PROGRESS.value: "job_cancelled",
+}
+
+
+def bucket_start(day: date, interval: str) -> date:
+    """First day of the day, week (starting Monday) or month bucket holding day"""
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    return day
+
+
+def analytics_row(
+    metric: str,
+    category: Optional[str] = None,
+    zip_code: Optional[str] = None,
+    value: Optional[float] = None,
+    ts: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """Build one analytics_events row"""
+    return {
+        "ts": ts or datetime.utcnow(),
+        "meta": {"metric": metric, "category": category, "zip": zip_code},
+        "value": value,
+    }
+
+
+def _to_datetime(value: Any) -> Optional[datetime]:
+    """Job timestamps are stored as datetimes or ISO strings"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+        except ValueError:
+            return None
+    return None
+
+
+def _day(ts: datetime) -> datetime:
+    return datetime(ts.year, ts.month, ts.day)
+
+
+def rollup_operations(rows: List[Dict[str, Any]]) -> List[UpdateOne]:
+    """Fold rows into one $inc upsert per (metric, dimension, key, day)"""
+    totals: Dict[Tuple[str, str, Optional[str], datetime], List[float]] = {}
+    for row in rows:
+        meta = row["meta"]
+        keys = {"all": None, "category": meta.get("category"), "zip": meta.get("zip")}
+        for dimension, key in keys.items():
+            if dimension != "all" and key is None:
+                continue
+            total = totals.setdefault((meta["metric"], dimension, key, _day(row["ts"])), [0, 0.0, 0])
+            total[0] += 1
+            if row.get("value") is not None:
+                total[1] += row["value"]
+                total[2] += 1
+
+    return [
+        UpdateOne(
+            {"metric": metric, "dimension": dimension, "key": key, "day": day},
+            {"$inc": {"count": count, "sum": value_sum, "value_count": value_count}},
+            upsert=True
+        )
+        for (metric, dimension, key, day), (count, value_sum, value_count) in totals.items()
+    ]
+
+
+class AnalyticsService:
+    """Writes analytics rows with their rollups and serves bucketed series"""
+
+    def __init__(self, db: AsyncIOMotorDatabase, bus: Optional[JobEventBus] = None):
+        self.db = db
+        self.bus = bus
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure_collection(self):
+        """Create analytics_events as a time-series collection (MongoDB 5.0+)"""
+        try:
+            await self.db.create_collection(
+                "analytics_events",
+                timeseries={"timeField": "ts", "metaField": "meta", "granularity": "hours"},
+                expireAfterSeconds=ANALYTICS_RETENTION_DAYS * 24 * 3600
+            )
+        except CollectionInvalid:
+            pass  # Already exists
+        except OperationFailure as e:
+            # Older servers: a regular collection works the same, minus compression
+            logger.warning(f"Time-series collection unavailable, using a regular collection: {e}")
+
+    async def record(
+        self,
+        metric: str,
+        category: Optional[str] = None,
+        zip_code: Optional[str] = None,
+        value: Optional[float] = None,
+        ts: Optional[datetime] = None
+    ):
+        """Record one analytics row"""
+        await self.record_many([analytics_row(metric, category, zip_code, value, ts)])
+
+    async def record_many(self, rows: List[Dict[str, Any]]):
+        """
+        Insert rows and update their rollups.
+
+        Best effort: analytics failures are logged, never raised, so they
+        can't fail the request or job that produced them.
+        """
+        if not rows:
+            return
+        try:
+            await self.db.analytics_events.insert_many(rows, ordered=False)
+            await self.db.analytics_rollups.bulk_write(rollup_operations(rows), ordered=False)
+        except Exception as e:
+            logger.error(f"Failed to record {len(rows)} analytics rows: {e}")
+
+    async def record_job_event(self, event: dict):
+        """Record the analytics row for a job lifecycle event, if it has one"""
+        metric = STATUS_METRICS.get(event.get("status"))
+        if metric is None:
+            return
+
+        value = None
+        if metric in ("job_accepted", "job_completed"):
+            job = await self.db.jobs.find_one(
+                {"id": event["job_id"]},
+                {"_id": 0, "created_at": 1, "accepted_at": 1, "contractor_invoice_amount": 1}
+            ) or {}
+            if metric == "job_accepted":
+                created_at, accepted_at = _to_datetime(job.get("created_at")), _to_datetime(job.get("accepted_at"))
+                if created_at and accepted_at:
+                    value = max(0.0, (accepted_at - created_at).total_seconds())
+            else:
+                value = job.get("contractor_invoice_amount")
+
+        location = event.get("location") or {}
+        await self.record(
+            metric,
+            category=event.get("service_category"),
+            zip_code=location.get("zip"),
+            value=value,
+            ts=_to_datetime(event.get("created_at"))
+        )
+
+    async def start(self):
+        """Start recording job lifecycle events from the bus"""
+        if self.bus is not None:
+            self._task = asyncio.create_task(self._consume(self.bus.subscribe()))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _consume(self, queue: asyncio.Queue):
+        try:
+            while True:
+                event = await queue.get()
+                if event.get("origin") != EVENT_ORIGIN:
+                    continue
+                try:
+                    await self.record_job_event(event)
+                except Exception as e:
+                    logger.error(f"Analytics for job event {event.get('id')} failed: {e}")
+        finally:
+            self.bus.unsubscribe(queue)
+
+    async def rebuild_rollups(self, start: date, end: date) -> int:
+        """
+        Recompute rollups for days in [start, end) from analytics_events.
+
+        Returns:
+            Number of rollup documents written
+        """
+        start_dt = datetime.combine(start, datetime.min.time())
+        end_dt = datetime.combine(end, datetime.min.time())
+        await self.db.analytics_rollups.delete_many({"day": {"$gte": start_dt, "$lt": end_dt}})
+
+        written = 0
+        batch: List[Dict[str, Any]] = []
+        cursor = self.db.analytics_events.find(
+            {"ts": {"$gte": start_dt, "$lt": end_dt}}, {"_id": 0}
+        ).batch_size(5000)
+        async for row in cursor:
+            batch.append(row)
+            if len(batch) >= 5000:
+                operations = rollup_operations(batch)
+                await self.db.analytics_rollups.bulk_write(operations, ordered=False)
+                written += len(operations)
+                batch = []
+        if batch:
+            operations = rollup_operations(batch)
+            await self.db.analytics_rollups.bulk_write(operations, ordered=False)
+            written += len(operations)
+
+        logger.info(f"Rebuilt analytics rollups {start} to {end}: {written} upserts")
+        return written
+
+    async def get_series(
+        self,
+        metric: str,
+        start: date,
+        end: date,
+        interval: str = "day",
+        group_by: Optional[str] = None,
+        top: int = 10
+    ) -> Dict[str, Any]:
+        """
+        Bucketed series for one metric from the daily rollups.
+
+        Args:
+            metric: One of METRICS
+            start: First day
+            end: Last day (inclusive)
+            interval: day, week (starting Monday) or month
+            group_by: None for one series, or "category" / "zip" for one
+                series per key
+            top: Keep the keys with the most events
+
+        Returns:
+            Dict with one series per key; each point has count, sum and avg
+            (avg over rows carrying a value)
+        """
+        dimension = group_by or "all"
+        cursor = self.db.analytics_rollups.find(
+            {
+                "metric": metric,
+                "dimension": dimension,
+                "day": {
+                    "$gte": datetime.combine(start, datetime.min.time()),
+                    "$lt": datetime.combine(end + timedelta(days=1), datetime.min.time()),
+                },
+            },
+            {"_id": 0, "key": 1, "day": 1, "count": 1, "sum": 1, "value_count": 1}
+        )
+
+        # Daily rollups are folded into buckets here rather than with
+        # $dateTrunc, which needs MongoDB 5.0 (ensure_collection supports older)
+        buckets: Dict[Tuple[Optional[str], date], Dict[str, float]] = {}
+        async for row in cursor:
+            totals = buckets.setdefault(
+                (row["key"], bucket_start(row["day"].date(), interval)),
+                {"count": 0, "sum": 0.0, "value_count": 0}
+            )
+            totals["count"] += row.get("count", 0)
+            totals["sum"] += row.get("sum", 0.0)
+            totals["value_count"] += row.get("value_count", 0)
+
+        series: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        for (key, bucket), totals in sorted(buckets.items(), key=lambda item: item[0][1]):
+            series.setdefault(key, []).append({
+                "t": bucket.isoformat(),
+                "count": totals["count"],
+                "sum": round(totals["sum"], 2),
+                "avg": round(totals["sum"] / totals["value_count"], 2) if totals["value_count"] else None,
+            })
+
+        ranked = sorted(series.items(), key=lambda item: -sum(point["count"] for point in item[1]))
+        return {
+            "metric": metric,
+            "interval": interval,
+            "group_by": group_by,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "series": [{"key": key, "points": points} for key, points in ranked[:top]],
+        }
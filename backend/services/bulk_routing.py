@@ -0,0 +1,340 @@
+"""
+Bulk routing engine for backlog job assignment.
+
+ContractorRouter assigns one job at a time as quotes are accepted. After an
+outage, or when ROUTING_ENABLED is switched on, many posted jobs can be
+waiting for manual assignment. This engine assigns the whole backlog at once:
+
+1. Load all posted, unassigned jobs with geocoded addresses, dropping
+   jobs outside every service area (one geofence batch check), which
+   are left for manual review as in single-job routing
+2. Load all eligible contractors for the categories involved (one query)
+3. Load current capacity for every contractor (one aggregation)
+4. Solve the assignment globally with a greedy distance-weighted matching
+   that respects skills, the 50-mile radius and capacity
+5. Commit the results with a single bulk write
+
+The report compares travel miles against first-come assignment (oldest
+job takes its closest contractor with capacity), which is what running
+ContractorRouter on each job in turn would produce. The two plans can
+assign different numbers of jobs, so each reports its assigned count and
+miles per job, and miles_saved only covers jobs assigned in both.
+"""
+
+import math
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorDatabase
+import logging
+from geopy.distance import geodesic
+
+from models import JobStatus
+from services.contractor_routing import (
+    get_business_location,
+    MAX_DISTANCE_MILES,
+    ACTIVE_JOB_STATUSES,
+    MAX_CONCURRENT_JOBS,
+)
+from services.job_lifecycle import JobLifecycleService
+from utils.geo import MILES_PER_DEGREE_LAT
+
+logger = logging.getLogger(__name__)
+
+
+def get_job_location(job: dict) -> Optional[Tuple[float, float]]:
+    """
+    Get (latitude, longitude) for a job.
+
+    Uses the embedded job address, falling back to the address snapshot.
+    """
+    address = job.get("address") or {}
+    if address.get("lat") and address.get("lon"):
+        return (address["lat"], address["lon"])
+
+    snapshot = job.get("address_snapshot") or {}
+    if snapshot.get("latitude") and snapshot.get("longitude"):
+        return (snapshot["latitude"], snapshot["longitude"])
+
+    return None
+
+
+class BulkRoutingEngine:
+    """Assigns the backlog of posted jobs to contractors in one pass"""
+
+    def __init__(self, database: AsyncIOMotorDatabase, job_lifecycle: JobLifecycleService, geofence=None):
+        self.db = database
+        self.job_lifecycle = job_lifecycle
+        self.geofence = geofence
+
+    async def route_backlog(
+        self,
+        actor_id: str,
+        actor_role: str,
+        dry_run: bool = False,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Assign all posted, unassigned jobs to the best available contractors.
+
+        Args:
+            actor_id: ID of user triggering the run (for the lifecycle update)
+            actor_role: Role of user triggering the run
+            dry_run: Compute and report assignments without writing them
+            limit: Optional cap on the number of jobs considered (oldest first)
+
+        Returns:
+            Report with assignments, unassigned jobs and travel miles
+            compared with first-come assignment (miles_saved is over the
+            jobs_compared jobs assigned by both)
+        """
+        jobs = await self._load_backlog(limit)
+        jobs, outside_service_area = self._filter_service_areas(jobs)
+        categories = sorted({job["service_category"] for job in jobs})
+        contractors = await self._load_contractors(categories)
+        capacity = await self._load_capacity([c["id"] for c in contractors])
+
+        candidates = self._build_candidates(jobs, contractors)
+
+        assignments = self._solve_greedy(candidates, capacity)
+        baseline = self._solve_first_come(jobs, candidates, capacity)
+
+        total_miles = sum(distance for _, distance in assignments.values())
+        baseline_miles = sum(distance for _, distance in baseline.values())
+
+        # Savings only over jobs both plans assign, so the counts match
+        compared = assignments.keys() & baseline.keys()
+        compared_miles = sum(assignments[job_id][1] for job_id in compared)
+        compared_baseline_miles = sum(baseline[job_id][1] for job_id in compared)
+
+        assigned_count = len(assignments)
+        if not dry_run and assignments:
+            assigned_count = await self.job_lifecycle.bulk_accept(
+                {job_id: contractor_id for job_id, (contractor_id, _) in assignments.items()},
+                actor_id=actor_id,
+                actor_role=actor_role
+            )
+            if assigned_count < len(assignments):
+                logger.warning(
+                    f"Bulk routing: {len(assignments) - assigned_count} jobs were "
+                    f"claimed or changed before the bulk write and were skipped"
+                )
+
+        logger.info(
+            f"Bulk routing {'(dry run) ' if dry_run else ''}assigned {assigned_count} of "
+            f"{len(jobs)} jobs ({len(baseline)} first-come), {compared_miles:.1f} miles vs "
+            f"{compared_baseline_miles:.1f} first-come over the {len(compared)} jobs both assign"
+        )
+
+        return {
+            "dry_run": dry_run,
+            "jobs_considered": len(jobs),
+            "contractors_considered": len(contractors),
+            "assigned": assigned_count,
+            "unassigned": [job["id"] for job in jobs if job["id"] not in assignments],
+            "outside_service_area": outside_service_area,
+            "assignments": [
+                {
+                    "job_id": job_id,
+                    "contractor_id": contractor_id,
+                    "distance_miles": round(distance, 2)
+                }
+                for job_id, (contractor_id, distance) in assignments.items()
+            ],
+            "total_miles": round(total_miles, 2),
+            "miles_per_job": round(total_miles / len(assignments), 2) if assignments else None,
+            "first_come": {
+                "assigned": len(baseline),
+                "total_miles": round(baseline_miles, 2),
+                "miles_per_job": round(baseline_miles / len(baseline), 2) if baseline else None
+            },
+            "jobs_compared": len(compared),
+            "miles_saved": round(compared_baseline_miles - compared_miles, 2),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    async def _load_backlog(self, limit: Optional[int]) -> List[Dict]:
+        """Load posted, unassigned jobs with a known location, oldest first"""
+        cursor = self.db.jobs.find(
+            {
+                "status": JobStatus.POSTED.value,
+                "assigned_provider_id": None,
+                "assigned_contractor_id": None,
+                "contractor_id": None
+            },
+            {
+                "_id": 0,
+                "id": 1,
+                "service_category": 1,
+                "created_at": 1,
+                "address": 1,
+                "address_snapshot": 1
+            }
+        ).sort("created_at", 1)
+        if limit:
+            cursor = cursor.limit(limit)
+
+        jobs = []
+        async for job in cursor:
+            location = get_job_location(job)
+            if not location:
+                logger.warning(f"Bulk routing: job {job['id']} skipped - not geocoded")
+                continue
+            jobs.append({
+                "id": job["id"],
+                "service_category": job.get("service_category", ""),
+                "location": location
+            })
+
+        return jobs
+
+    def _filter_service_areas(self, jobs: List[Dict]) -> Tuple[List[Dict], List[str]]:
+        """
+        Split jobs by whether any service area contains them.
+
+        Returns:
+            (jobs inside a service area, IDs of jobs outside all of them)
+        """
+        if not self.geofence or not jobs:
+            return jobs, []
+
+        areas = self.geofence.check_many([job["location"] for job in jobs])
+        inside = [job for job, area in zip(jobs, areas) if area is not None]
+        outside = [job["id"] for job, area in zip(jobs, areas) if area is None]
+        if outside:
+            logger.warning(f"Bulk routing: {len(outside)} jobs outside all service areas left for manual review")
+        return inside, outside
+
+    async def _load_contractors(self, categories: List[str]) -> List[Dict]:
+        """Load all active contractors with any of the categories as a skill"""
+        if not categories:
+            return []
+
+        cursor = self.db.users.find(
+            {
+                "role": "contractor",
+                "is_active": True,
+                "skills": {"$in": categories}
+            },
+            {"_id": 0, "id": 1, "skills": 1, "addresses": 1}
+        )
+
+        contractors = []
+        async for contractor in cursor:
+            location = get_business_location(contractor)
+            if not location:
+                continue
+            contractors.append({
+                "id": contractor["id"],
+                "skills": set(contractor.get("skills", [])),
+                "location": (location["latitude"], location["longitude"])
+            })
+
+        return contractors
+
+    async def _load_capacity(self, contractor_ids: List[str]) -> Dict[str, int]:
+        """Remaining job slots per contractor, from one aggregation"""
+        if not contractor_ids:
+            return {}
+
+        pipeline = [
+            {"$match": {
+                "contractor_id": {"$in": contractor_ids},
+                "status": {"$in": ACTIVE_JOB_STATUSES}
+            }},
+            {"$group": {"_id": "$contractor_id", "count": {"$sum": 1}}}
+        ]
+        active_counts = {
+            row["_id"]: row["count"]
+            async for row in self.db.jobs.aggregate(pipeline)
+        }
+
+        return {
+            contractor_id: max(MAX_CONCURRENT_JOBS - active_counts.get(contractor_id, 0), 0)
+            for contractor_id in contractor_ids
+        }
+
+    def _build_candidates(
+        self,
+        jobs: List[Dict],
+        contractors: List[Dict]
+    ) -> Dict[str, List[Tuple[float, str]]]:
+        """
+        Build the feasible (distance, contractor_id) pairs for each job.
+
+        A bounding box rejects far-away contractors before the geodesic
+        distance is computed. Each job's list is sorted closest first.
+        """
+        by_skill: Dict[str, List[Dict]] = {}
+        for contractor in contractors:
+            for skill in contractor["skills"]:
+                by_skill.setdefault(skill, []).append(contractor)
+
+        lat_margin = MAX_DISTANCE_MILES / MILES_PER_DEGREE_LAT
+
+        candidates = {}
+        for job in jobs:
+            job_lat, job_lon = job["location"]
+            lon_margin = lat_margin / max(math.cos(math.radians(job_lat)), 0.01)
+
+            pairs = []
+            for contractor in by_skill.get(job["service_category"], []):
+                contractor_lat, contractor_lon = contractor["location"]
+                if abs(contractor_lat - job_lat) > lat_margin or \
+                   abs(contractor_lon - job_lon) > lon_margin:
+                    continue
+
+                distance = geodesic(job["location"], contractor["location"]).miles
+                if distance <= MAX_DISTANCE_MILES:
+                    pairs.append((distance, contractor["id"]))
+
+            pairs.sort()
+            candidates[job["id"]] = pairs
+
+        return candidates
+
+    def _solve_greedy(
+        self,
+        candidates: Dict[str, List[Tuple[float, str]]],
+        capacity: Dict[str, int]
+    ) -> Dict[str, Tuple[str, float]]:
+        """
+        Global greedy matching: take the shortest feasible pair overall,
+        assign it if the job is open and the contractor has capacity, repeat.
+        """
+        remaining = dict(capacity)
+        pairs = sorted(
+            (distance, job_id, contractor_id)
+            for job_id, job_pairs in candidates.items()
+            for distance, contractor_id in job_pairs
+        )
+
+        assignments = {}
+        for distance, job_id, contractor_id in pairs:
+            if job_id in assignments or remaining.get(contractor_id, 0) <= 0:
+                continue
+            assignments[job_id] = (contractor_id, distance)
+            remaining[contractor_id] -= 1
+
+        return assignments
+
+    def _solve_first_come(
+        self,
+        jobs: List[Dict],
+        candidates: Dict[str, List[Tuple[float, str]]],
+        capacity: Dict[str, int]
+    ) -> Dict[str, Tuple[str, float]]:
+        """
+        Baseline: oldest job first, each takes its closest contractor
+        with capacity (same result as routing jobs one at a time).
+        """
+        remaining = dict(capacity)
+
+        assignments = {}
+        for job in jobs:
+            for distance, contractor_id in candidates.get(job["id"], []):
+                if remaining.get(contractor_id, 0) > 0:
+                    assignments[job["id"]] = (contractor_id, distance)
+                    remaining[contractor_id] -= 1
+                    break
+
+        return assignments
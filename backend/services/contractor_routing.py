@@ -8,22 +8,82 @@ Routes jobs to contractors based on:
 """
 
 import os
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from motor.motor_asyncio import AsyncIOMotorDatabase
 import logging
 from geopy.distance import geodesic
 
+from services.address_repository import AddressRepository
+from utils.zip_centroids import zip_centroid
+
 logger = logging.getLogger(__name__)
 
 ROUTING_ENABLED = os.getenv("ROUTING_ENABLED", "false").lower() == "true"
 ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@therealjohnson.com")
 
+MAX_DISTANCE_MILES = 50
+
+# Statuses that count against a contractor's capacity
+ACTIVE_JOB_STATUSES = ["posted", "accepted", "in_progress"]
+
+# TODO: Make max concurrent jobs configurable per contractor
+MAX_CONCURRENT_JOBS = 5
+
+
+def address_location(address: Optional[dict]) -> Optional[Tuple[float, float]]:
+    """
+    Coordinates of an address: geocoded if available, else its ZIP centroid.
+
+    Returns:
+        (latitude, longitude), or None
+    """
+    if not address:
+        return None
+    if address.get("latitude") and address.get("longitude"):
+        return address["latitude"], address["longitude"]
+    return zip_centroid(address.get("zip_code") or address.get("zip"))
+
+
+def get_business_location(contractor: dict, default_address: Optional[dict] = None) -> Optional[Dict[str, Any]]:
+    """
+    Get a contractor's business location (default address, else first address).
+
+    Addresses that were never geocoded fall back to their ZIP centroid.
+
+    Args:
+        contractor: Contractor user document
+        default_address: The default address if already looked up
+            (AddressRepository.defaults_for_users); otherwise it is taken
+            from the embedded addresses
+
+    Returns:
+        Dict with latitude, longitude and a short address label,
+        or None if the address is missing or can't be located
+    """
+    addresses = contractor.get("addresses", [])
+    business_address = default_address or next(
+        (addr for addr in addresses if addr.get("is_default")),
+        addresses[0] if addresses else None
+    )
+
+    location = address_location(business_address)
+    if not location:
+        return None
+
+    return {
+        "latitude": location[0],
+        "longitude": location[1],
+        "address": f"{business_address.get('city', '')}, {business_address.get('state', '')}"
+    }
+
 
 class ContractorRouter:
     """Routes jobs to appropriate contractors"""
 
-    def __init__(self, database: AsyncIOMotorDatabase):
+    def __init__(self, database: AsyncIOMotorDatabase, geofence=None, addresses: Optional[AddressRepository] = None):
         self.db = database
+        self.geofence = geofence
+        self.addresses = addresses or AddressRepository(database)
 
     async def find_best_contractor(
         self,
@@ -49,28 +109,20 @@ class ContractorRouter:
             return None
 
         # Get customer address with coordinates
-        customer_user = await self.db.users.find_one({"id": customer_id})
-        if not customer_user or not customer_user.get("addresses"):
-            logger.warning(f"Customer {customer_id} has no addresses")
-            return None
-
-        customer_address = next(
-            (addr for addr in customer_user["addresses"] if addr["id"] == customer_address_id),
-            None
-        )
-
-        if not customer_address:
+        customer_address = await self.addresses.get(customer_address_id)
+        if not customer_address or customer_address.user_id != customer_id:
             logger.warning(f"Address {customer_address_id} not found for customer {customer_id}")
             return None
 
-        if not customer_address.get("latitude") or not customer_address.get("longitude"):
+        customer_location = address_location(customer_address.model_dump())
+        if not customer_location:
             logger.warning(f"Customer address {customer_address_id} not geocoded")
             return None
 
-        customer_location = (
-            customer_address["latitude"],
-            customer_address["longitude"]
-        )
+        # Outside every configured service area: leave to manual routing
+        if self.geofence and self.geofence.check_many([customer_location])[0] is None:
+            logger.warning(f"Job {job_id} at {customer_location} is outside all service areas")
+            return None
 
         # Find contractors with matching skills
         matching_contractors = await self._find_matching_skills(service_category)
@@ -118,25 +170,16 @@ class ContractorRouter:
             }
         })
 
-        contractors = []
-        async for contractor in cursor:
-            # Get contractor's business address (default or first address)
-            addresses = contractor.get("addresses", [])
-            business_address = None
-
-            # Find default address or use first one
-            for addr in addresses:
-                if addr.get("is_default"):
-                    business_address = addr
-                    break
+        contractor_docs = await cursor.to_list(None)
+        defaults = await self.addresses.defaults_for_users(contractor["id"] for contractor in contractor_docs)
 
-            if not business_address and addresses:
-                business_address = addresses[0]
+        contractors = []
+        for contractor in contractor_docs:
+            default_address = defaults.get(contractor["id"])
+            location = get_business_location(contractor, default_address.model_dump() if default_address else None)
 
             # Skip contractor if no geocoded address
-            if not business_address or \
-               not business_address.get("latitude") or \
-               not business_address.get("longitude"):
+            if not location:
                 logger.warning(
                     f"Contractor {contractor['id']} skipped - no geocoded address"
                 )
@@ -145,11 +188,7 @@ class ContractorRouter:
             contractors.append({
                 "id": contractor["id"],
                 "skills": contractor.get("skills", []),
-                "location": {
-                    "latitude": business_address["latitude"],
-                    "longitude": business_address["longitude"],
-                    "address": f"{business_address.get('city', '')}, {business_address.get('state', '')}"
-                }
+                "location": location
             })
 
         logger.info(
@@ -174,8 +213,6 @@ class ContractorRouter:
         Returns:
             List of contractors within 50 miles, sorted by distance
         """
-        MAX_DISTANCE_MILES = 50
-
         contractors_with_distance = []
 
         for contractor in contractors:
@@ -212,16 +249,11 @@ class ContractorRouter:
     async def _has_capacity(self, contractor_id: str) -> bool:
         """Check if contractor has capacity for new job"""
         # Count active jobs (posted, accepted, in_progress)
-        active_statuses = ["posted", "accepted", "in_progress"]
-
         active_jobs = await self.db.jobs.count_documents({
             "contractor_id": contractor_id,
-            "status": {"$in": active_statuses}
+            "status": {"$in": ACTIVE_JOB_STATUSES}
         })
 
-        # TODO: Make max concurrent jobs configurable per contractor
-        MAX_CONCURRENT_JOBS = 5
-
         return active_jobs < MAX_CONCURRENT_JOBS
 
 
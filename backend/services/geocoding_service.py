@@ -0,0 +1,332 @@
+"""
+GeocodingService - Cached, coalesced and rate-limited geocoding.
+
+Sits in front of the maps provider so the same address is only sent to
+the provider once:
+
+1. In-process LRU (GEOCODE_MEMORY_CACHE_SIZE entries, expiring after
+   GEOCODE_MEMORY_TTL_SECONDS so misses are retried eventually)
+2. geocode_cache collection, keyed by the normalized address and shared
+   by all workers. Results expire after GEOCODE_CACHE_TTL_DAYS, misses
+   after GEOCODE_NEGATIVE_TTL_HOURS (TTL index on expires_at)
+3. The provider, at most GEOCODE_RATE_PER_SECOND calls per second and
+   GEOCODE_MAX_CONCURRENCY at a time
+
+Concurrent lookups of the same normalized address share one in-flight
+lookup. Provider errors are not cached.
+
+locate() adds the offline ZIP centroid table: ZIP precision without a
+network call, or as the fallback when the provider errors. An address the
+provider reports as not found is not located.
+
+backfill() geocodes every address that has no coordinates and writes
+them through AddressRepository, so users.addresses and job copies get
+them too (see backfill_geocodes.py).
+"""
+
+import os
+import re
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List
+from cachetools import TTLCache
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from services.address_repository import AddressRepository
+from utils.metrics import registry
+from utils.zip_centroids import zip_centroid
+
+logger = logging.getLogger(__name__)
+
+GEOCODE_MEMORY_CACHE_SIZE = int(os.getenv("GEOCODE_MEMORY_CACHE_SIZE", "10000"))
+GEOCODE_MEMORY_TTL_SECONDS = int(os.getenv("GEOCODE_MEMORY_TTL_SECONDS", "3600"))
+GEOCODE_CACHE_TTL_DAYS = int(os.getenv("GEOCODE_CACHE_TTL_DAYS", "180"))
+GEOCODE_NEGATIVE_TTL_HOURS = int(os.getenv("GEOCODE_NEGATIVE_TTL_HOURS", "24"))
+GEOCODE_RATE_PER_SECOND = float(os.getenv("GEOCODE_RATE_PER_SECOND", "10"))
+GEOCODE_MAX_CONCURRENCY = int(os.getenv("GEOCODE_MAX_CONCURRENCY", "5"))
+
+# Documents read and written per backfill batch
+BACKFILL_BATCH_SIZE = 100
+
+geocode_requests_total = registry.counter(
+    "geocode_requests_total", "Geocode lookups by where the answer came from", ("source",))
+
+# Common USPS suffix and direction abbreviations
+_ABBREVIATIONS = {
+    "street": "st", "avenue": "ave", "road": "rd", "drive": "dr", "boulevard": "blvd",
+    "lane": "ln", "court": "ct", "place": "pl", "terrace": "ter", "circle": "cir",
+    "highway": "hwy", "parkway": "pkwy", "square": "sq", "trail": "trl",
+    "north": "n", "south": "s", "east": "e", "west": "w",
+    "northeast": "ne", "northwest": "nw", "southeast": "se", "southwest": "sw",
+    "apartment": "apt", "suite": "ste", "unit": "unit",
+}
+
+_MISSING = object()
+
+
+def normalize_address(address: str) -> str:
+    """
+    Cache key for an address: case, punctuation, spacing, common
+    abbreviations and ZIP+4 differences are ignored.
+    """
+    text = re.sub(r"[.,#]", " ", address.lower())
+    text = re.sub(r"\b(\d{5})-\d{4}\b", r"\1", text)
+    words = [_ABBREVIATIONS.get(word, word) for word in text.split()]
+    return " ".join(words)
+
+
+def format_address(street: str, city: str, state: str, zip_code: str) -> str:
+    """Single-line address as sent to the provider"""
+    return f"{street}, {city}, {state} {zip_code}"
+
+
+def _to_result(raw: Any) -> Optional[Dict[str, Any]]:
+    """Provider result (dict or GeocodeResult) as a plain dict"""
+    if raw is None:
+        return None
+    if hasattr(raw, "model_dump"):
+        raw = raw.model_dump()
+    if raw.get("latitude") is None or raw.get("longitude") is None:
+        return None
+    return {
+        "latitude": raw["latitude"],
+        "longitude": raw["longitude"],
+        "formatted_address": raw.get("formatted_address"),
+    }
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across all callers"""
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1 / rate_per_second if rate_per_second > 0 else 0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class GeocodingService:
+    """Geocodes addresses through the caches, then the maps provider"""
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        maps_provider,
+        rate_per_second: float = GEOCODE_RATE_PER_SECOND,
+        max_concurrency: int = GEOCODE_MAX_CONCURRENCY,
+        addresses: Optional[AddressRepository] = None
+    ):
+        self.db = db
+        self.maps_provider = maps_provider
+        self.addresses = addresses or AddressRepository(db)
+        self._memory = TTLCache(maxsize=GEOCODE_MEMORY_CACHE_SIZE, ttl=GEOCODE_MEMORY_TTL_SECONDS)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._limiter = RateLimiter(rate_per_second)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def geocode(self, address: str) -> Optional[Dict[str, Any]]:
+        """
+        Geocode a single-line address.
+
+        Returns:
+            Dict with latitude, longitude and formatted_address, or None if
+            the provider found nothing
+
+        Raises:
+            Whatever the provider raises (errors are not cached)
+        """
+        key = normalize_address(address)
+
+        result = self._memory.get(key, _MISSING)
+        if result is not _MISSING:
+            geocode_requests_total.inc("memory")
+            return result
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            geocode_requests_total.inc("coalesced")
+        else:
+            task = asyncio.ensure_future(self._lookup(key, address))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        # Shielded: a cancelled caller must not cancel the lookup for the others
+        return await asyncio.shield(task)
+
+    async def locate(self, address: str, zip_code: Optional[str], precision: str = "address") -> Optional[Dict[str, Any]]:
+        """
+        Coordinates at address or ZIP precision.
+
+        Args:
+            address: Single-line address
+            zip_code: The address's ZIP
+            precision: "address" geocodes and falls back to the ZIP centroid
+                only if the provider errors; "zip" uses the ZIP centroid (no
+                network call) and only geocodes unknown ZIPs
+
+        Returns:
+            Dict with latitude, longitude and precision ("address" or "zip"),
+            or None if the provider found nothing (or errored and the ZIP is
+            unknown). A "zip" result for an "address" request means the
+            address itself was not checked.
+        """
+        centroid = zip_centroid(zip_code)
+        if precision == "zip" and centroid:
+            geocode_requests_total.inc("zip_centroid")
+            return {"latitude": centroid[0], "longitude": centroid[1], "precision": "zip"}
+
+        try:
+            result = await self.geocode(address)
+        except Exception as e:
+            if not centroid:
+                raise
+            logger.warning(f"Geocoding failed, using ZIP centroid: {e}")
+            geocode_requests_total.inc("zip_centroid")
+            return {"latitude": centroid[0], "longitude": centroid[1], "precision": "zip"}
+
+        if result:
+            return {**result, "precision": "address"}
+        return None
+
+    async def _lookup(self, key: str, address: str) -> Optional[Dict[str, Any]]:
+        cached = await self.db.geocode_cache.find_one({"key": key}, {"_id": 0, "result": 1})
+        if cached is not None:
+            geocode_requests_total.inc("mongo")
+            self._memory[key] = cached["result"]
+            return cached["result"]
+
+        async with self._semaphore:
+            await self._limiter.acquire()
+            geocode_requests_total.inc("provider")
+            result = _to_result(await self.maps_provider.geocode(address))
+
+        now = datetime.utcnow()
+        ttl = timedelta(days=GEOCODE_CACHE_TTL_DAYS) if result else timedelta(hours=GEOCODE_NEGATIVE_TTL_HOURS)
+        await self.db.geocode_cache.update_one(
+            {"key": key},
+            {"$set": {"result": result, "address": address, "cached_at": now, "expires_at": now + ttl}},
+            upsert=True
+        )
+        self._memory[key] = result
+        return result
+
+    async def _geocode_quietly(self, address: str) -> Optional[Dict[str, Any]]:
+        try:
+            return await self.geocode(address)
+        except Exception as e:
+            logger.warning(f"Geocoding failed for {address!r}: {e}")
+            return None
+
+    async def backfill(self, limit: Optional[int] = None, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Geocode every address without coordinates.
+
+        Addresses that only exist in users' embedded `addresses` are first
+        imported into the collection (AddressRepository.sync_user). Every
+        address is then geocoded once, in the collection, and its
+        coordinates are written through AddressRepository.update so that
+        users.addresses and the job copies get them too. Lookups in a batch
+        run concurrently; the rate limit and concurrency cap keep the
+        provider within quota.
+
+        Args:
+            limit: Stop after this many addresses
+            dry_run: Geocode but don't write coordinates (embedded-only
+                addresses are counted, not imported or geocoded)
+
+        Returns:
+            Dict with counts of embedded-only addresses imported and of
+            addresses seen, geocoded and not found
+        """
+        stats = {"embedded_only": 0, "addresses_seen": 0, "addresses_geocoded": 0, "addresses_not_found": 0}
+        missing = {"$or": [{"latitude": None}, {"longitude": None}]}
+
+        # Embedded-only addresses: import them so they are geocoded in one place
+        cursor = self.db.users.find(
+            {"addresses": {"$elemMatch": missing}}, {"_id": 0, "id": 1, "addresses": 1}
+        ).batch_size(BACKFILL_BATCH_SIZE)
+        users: List[dict] = []
+        async for user in cursor:
+            users.append(user)
+            if len(users) >= BACKFILL_BATCH_SIZE:
+                await self._import_embedded_only(users, stats, dry_run)
+                users = []
+        if users:
+            await self._import_embedded_only(users, stats, dry_run)
+
+        # Canonical addresses collection
+        fields = {"_id": 0, "id": 1, "street": 1, "city": 1, "state": 1, "zip_code": 1}
+        cursor = self.db.addresses.find(missing, fields).batch_size(BACKFILL_BATCH_SIZE)
+        if limit:
+            cursor = cursor.limit(limit)
+        batch: List[dict] = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= BACKFILL_BATCH_SIZE:
+                await self._backfill_addresses(batch, stats, dry_run)
+                batch = []
+        if batch:
+            await self._backfill_addresses(batch, stats, dry_run)
+
+        logger.info(f"Geocode backfill: {stats}")
+        return stats
+
+    async def _import_embedded_only(self, users: List[dict], stats: Dict[str, int], dry_run: bool):
+        """Import users' embedded addresses that are missing from the collection"""
+        embedded_ids = {
+            address["id"]
+            for user in users
+            for address in user.get("addresses") or []
+            if address.get("id")
+        }
+        known = {
+            doc["id"]
+            async for doc in self.db.addresses.find({"id": {"$in": list(embedded_ids)}}, {"_id": 0, "id": 1})
+        }
+
+        for user in users:
+            embedded_only = [
+                address for address in user.get("addresses") or []
+                if address.get("id") not in known
+            ]
+            if not embedded_only:
+                continue
+            stats["embedded_only"] += len(embedded_only)
+            if not dry_run:
+                await self.addresses.sync_user(user["id"])
+
+    async def _geocode_all(self, addresses: List[dict]) -> List[Optional[Dict[str, Any]]]:
+        return await asyncio.gather(*(
+            self._geocode_quietly(format_address(
+                address.get("street", ""), address.get("city", ""),
+                address.get("state", ""), address.get("zip_code", "")
+            ))
+            for address in addresses
+        ))
+
+    async def _backfill_addresses(self, batch: List[dict], stats: Dict[str, int], dry_run: bool):
+        results = await self._geocode_all(batch)
+        found = []
+        for doc, result in zip(batch, results):
+            stats["addresses_seen"] += 1
+            if result is None:
+                stats["addresses_not_found"] += 1
+                continue
+            stats["addresses_geocoded"] += 1
+            found.append((doc["id"], result))
+
+        if found and not dry_run:
+            # Through the repository, so users.addresses and job copies follow
+            await asyncio.gather(*(
+                self.addresses.update(address_id, {"latitude": result["latitude"], "longitude": result["longitude"]})
+                for address_id, result in found
+            ))
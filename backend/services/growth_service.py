@@ -7,12 +7,20 @@ Emits growth events for:
 - Reviews received
 - Business milestones (LLC, license, insurance)
 
-Updates growth summaries for dashboard display.
+Updates growth summaries for dashboard display. Each event is applied to
+the summary with a single atomic upsert, so the cost of an event doesn't
+depend on how many events the user already has. rebuild_summary replays
+all events and is kept for repair.
 """
 
-from typing import Optional, List
+from typing import Optional, List, Dict, Any, Iterable, Set, Union
 from datetime import datetime
+import uuid
+import logging
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
 from models import (
     GrowthEvent, GrowthEventType, GrowthSummary,
@@ -21,6 +29,48 @@ from models import (
 )
 
 
+logger = logging.getLogger(__name__)
+
+# Events per insert_many (and its summary bulk_write) in emit_events_bulk
+BULK_CHUNK_SIZE = 5000
+
+# Invalid events logged individually per bulk call; the rest are only counted
+MAX_LOGGED_INVALID_EVENTS = 10
+
+# Duplicate key error code (event ID already recorded)
+DUPLICATE_KEY_ERROR = 11000
+
+# Counter fields on growth_summary
+SUMMARY_COUNTERS = [
+    "total_jobs_completed", "total_revenue",
+    "rating_sum", "rating_count", "five_star_count", "four_star_count"
+]
+
+
+def summary_changes(event_type: GrowthEventType, value: float) -> Dict[str, Dict[str, Any]]:
+    """
+    Summary changes caused by one event.
+
+    Returns:
+        Dict with "inc" (counter increments) and "set" (status fields)
+    """
+    if event_type == GrowthEventType.JOB_COMPLETED:
+        return {"inc": {"total_jobs_completed": int(value)}, "set": {}}
+    if event_type == GrowthEventType.REVENUE_EARNED:
+        return {"inc": {"total_revenue": value}, "set": {}}
+    if event_type == GrowthEventType.FIVE_STAR_REVIEW:
+        return {"inc": {"rating_sum": 5.0, "rating_count": 1, "five_star_count": 1}, "set": {}}
+    if event_type == GrowthEventType.FOUR_STAR_REVIEW:
+        return {"inc": {"rating_sum": 4.0, "rating_count": 1, "four_star_count": 1}, "set": {}}
+    if event_type == GrowthEventType.LLC_LINKED:
+        return {"inc": {}, "set": {"llc_status": LLCStatus.COMPLETED.value}}
+    if event_type == GrowthEventType.LICENSE_UPLOADED:
+        return {"inc": {}, "set": {"license_status": DocumentStatus.UPLOADED.value}}
+    if event_type == GrowthEventType.INSURANCE_UPLOADED:
+        return {"inc": {}, "set": {"insurance_status": DocumentStatus.UPLOADED.value}}
+    return {"inc": {}, "set": {}}
+
+
 class GrowthService:
     """Manages growth event tracking and summary calculations"""
 
@@ -33,7 +83,9 @@ class GrowthService:
         role: UserRole,
         event_type: GrowthEventType,
         value: float,
-        meta: Optional[dict] = None
+        meta: Optional[dict] = None,
+        event_id: Optional[str] = None,
+        session=None
     ):
         """
         Emit a growth event and update summary.
@@ -44,6 +96,9 @@ class GrowthService:
             event_type: Type of event
             value: Numeric value (revenue, rating, or 1 for boolean events)
             meta: Optional metadata (job_id, review_id, etc.)
+            event_id: Optional deterministic event ID. When given, emitting
+                the same event again is a no-op (safe for retries).
+            session: Optional MongoDB session to run inside a transaction
         """
         # Map UserRole to ContractorGrowthRole
         growth_role = (
@@ -59,92 +114,247 @@ class GrowthService:
             value=value,
             meta=meta or {}
         )
+        if event_id:
+            event.id = event_id
 
         # Insert event
         event_dict = event.model_dump()
-        await self.db.growth_events.insert_one(event_dict)
+        if event_id:
+            result = await self.db.growth_events.update_one(
+                {"id": event_id},
+                {"$setOnInsert": event_dict},
+                upsert=True,
+                session=session
+            )
+            if not result.upserted_id:
+                # Already recorded by an earlier attempt
+                return
+        else:
+            await self.db.growth_events.insert_one(event_dict, session=session)
 
         # Update summary
-        await self._update_summary(user_id, growth_role)
+        await self._apply_to_summary(
+            user_id, growth_role, summary_changes(event_type, value), session=session
+        )
 
-    async def _update_summary(self, user_id: str, role: ContractorGrowthRole):
+    async def _apply_to_summary(
+        self,
+        user_id: str,
+        role: ContractorGrowthRole,
+        changes: Dict[str, Dict[str, Any]],
+        session=None
+    ):
+        """Apply counter increments and status changes to a growth summary"""
+        await self.db.growth_summary.update_one(
+            {"user_id": user_id},
+            self._summary_pipeline(user_id, role, changes),
+            upsert=True,
+            session=session
+        )
+
+    def _summary_pipeline(
+        self,
+        user_id: str,
+        role: ContractorGrowthRole,
+        changes: Dict[str, Dict[str, Any]]
+    ) -> List[dict]:
         """
-        Update growth summary for a contractor.
+        Build the pipeline upsert that applies changes to a growth summary.
 
-        Recalculates from all events for this user.
+        Counters are incremented, statuses set and average_rating
+        recomputed from rating_sum / rating_count in the same atomic write.
+        Summaries written before rating_sum/rating_count existed get them
+        from average_rating and the star counts (only 4 and 5 star reviews
+        are tracked, so this is exact).
         """
-        # Get all events for user
-        cursor = self.db.growth_events.find({"user_id": user_id})
-
-        total_jobs_completed = 0
-        total_revenue = 0.0
-        rating_sum = 0.0
-        rating_count = 0
-        five_star_count = 0
-        four_star_count = 0
-        llc_status = LLCStatus.NONE
-        license_status = DocumentStatus.NONE
-        insurance_status = DocumentStatus.NONE
+        legacy_rating_count = {"$add": [
+            {"$ifNull": ["$five_star_count", 0]},
+            {"$ifNull": ["$four_star_count", 0]}
+        ]}
+        current = {
+            "rating_sum": {"$ifNull": [
+                "$rating_sum",
+                {"$multiply": [{"$ifNull": ["$average_rating", 0.0]}, legacy_rating_count]}
+            ]},
+            "rating_count": {"$ifNull": ["$rating_count", legacy_rating_count]},
+        }
 
-        async for event_data in cursor:
-            event_type = event_data["type"]
-            value = event_data["value"]
+        counters = {
+            field: {"$add": [
+                current.get(field, {"$ifNull": ["$" + field, 0]}),
+                changes["inc"].get(field, 0)
+            ]}
+            for field in SUMMARY_COUNTERS
+        }
+
+        defaults = GrowthSummary(user_id=user_id, role=role).model_dump()
+        statuses = {
+            field: changes["set"].get(field, {"$ifNull": ["$" + field, defaults[field]]})
+            for field in ("llc_status", "license_status", "insurance_status")
+        }
+
+        return [
+            {"$set": {
+                "id": {"$ifNull": ["$id", str(uuid.uuid4())]},
+                "user_id": user_id,
+                "role": {"$ifNull": ["$role", role.value]},
+                **counters,
+                **statuses,
+                "last_updated_at": datetime.utcnow()
+            }},
+            {"$set": {
+                "average_rating": {"$cond": [
+                    {"$gt": ["$rating_count", 0]},
+                    {"$divide": ["$rating_sum", "$rating_count"]},
+                    0.0
+                ]}
+            }}
+        ]
+
+    async def emit_events_bulk(
+        self,
+        events: Iterable[Union[GrowthEvent, dict]],
+        chunk_size: int = BULK_CHUNK_SIZE
+    ) -> Dict[str, int]:
+        """
+        Insert many growth events and update summaries once per user per chunk.
+
+        For backfills, migrations and imports. Events are validated, then
+        inserted in chunks with insert_many(ordered=False). Events whose ID
+        is already recorded are skipped, so a backfill can be re-run.
+        Right after each chunk is inserted, the changes from the events that
+        were actually inserted are combined per user and applied with one
+        summary update each, so an interrupted run leaves summaries in step
+        with the recorded events.
 
-            if event_type == GrowthEventType.JOB_COMPLETED:
-                total_jobs_completed += int(value)
+        Args:
+            events: GrowthEvent objects or dicts with GrowthEvent fields
+            chunk_size: Events per insert_many call
 
-            elif event_type == GrowthEventType.REVENUE_EARNED:
-                total_revenue += value
+        Returns:
+            Dict with inserted, duplicate, invalid, failed and users counts
+        """
+        stats = {"inserted": 0, "duplicate": 0, "invalid": 0, "failed": 0, "users": 0}
+        users: Set[str] = set()
+
+        chunk: List[GrowthEvent] = []
+        for event in events:
+            if not isinstance(event, GrowthEvent):
+                try:
+                    event = GrowthEvent(**event)
+                except ValidationError as e:
+                    stats["invalid"] += 1
+                    if stats["invalid"] <= MAX_LOGGED_INVALID_EVENTS:
+                        logger.warning(f"Skipping invalid growth event: {e.errors()[0]['msg']}")
+                    continue
+
+            chunk.append(event)
+            if len(chunk) >= chunk_size:
+                await self._insert_chunk(chunk, users, stats)
+                chunk = []
+
+        if chunk:
+            await self._insert_chunk(chunk, users, stats)
+
+        stats["users"] = len(users)
+        logger.info(
+            f"Bulk growth ingestion: {stats['inserted']} inserted, {stats['duplicate']} duplicate, "
+            f"{stats['invalid']} invalid, {stats['failed']} failed, {stats['users']} summaries updated"
+        )
+        return stats
 
-            elif event_type == GrowthEventType.FIVE_STAR_REVIEW:
-                rating_sum += 5.0
-                rating_count += 1
-                five_star_count += 1
+    async def _insert_chunk(
+        self,
+        chunk: List[GrowthEvent],
+        users: Set[str],
+        stats: Dict[str, int]
+    ):
+        """Insert one chunk of events and apply the inserted ones to summaries"""
+        failed = set()
+        try:
+            await self.db.growth_events.insert_many(
+                [event.model_dump() for event in chunk],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed.add(error["index"])
+                if error.get("code") == DUPLICATE_KEY_ERROR:
+                    stats["duplicate"] += 1
+                else:
+                    stats["failed"] += 1
+                    logger.error(f"Growth event insert failed: {error.get('errmsg')}")
+
+        combined: Dict[str, Dict[str, Any]] = {}
+        for index, event in enumerate(chunk):
+            if index in failed:
+                continue
+            stats["inserted"] += 1
+
+            user = combined.setdefault(
+                event.user_id,
+                {"role": event.role, "changes": {"inc": {}, "set": {}}}
+            )
+            changes = summary_changes(event.type, event.value)
+            for field, amount in changes["inc"].items():
+                user["changes"]["inc"][field] = user["changes"]["inc"].get(field, 0) + amount
+            user["changes"]["set"].update(changes["set"])
 
-            elif event_type == GrowthEventType.FOUR_STAR_REVIEW:
-                rating_sum += 4.0
-                rating_count += 1
-                four_star_count += 1
+        if not combined:
+            return
 
-            elif event_type == GrowthEventType.LLC_LINKED:
-                llc_status = LLCStatus.COMPLETED
+        await self.db.growth_summary.bulk_write(
+            [
+                UpdateOne(
+                    {"user_id": user_id},
+                    self._summary_pipeline(user_id, user["role"], user["changes"]),
+                    upsert=True
+                )
+                for user_id, user in combined.items()
+            ],
+            ordered=False
+        )
+        users.update(combined)
 
-            elif event_type == GrowthEventType.LICENSE_UPLOADED:
-                license_status = DocumentStatus.UPLOADED
+    async def rebuild_summary(self, user_id: str, role: ContractorGrowthRole, session=None):
+        """
+        Rebuild growth summary for a contractor.
 
-            elif event_type == GrowthEventType.INSURANCE_UPLOADED:
-                insurance_status = DocumentStatus.UPLOADED
+        Recalculates from all events for this user. Only needed for repair;
+        emit_event keeps summaries up to date incrementally.
+        """
+        # Get all events for user
+        cursor = self.db.growth_events.find({"user_id": user_id}, session=session)
+
+        totals = {field: 0 for field in SUMMARY_COUNTERS}
+        statuses = {}
+
+        async for event_data in cursor:
+            changes = summary_changes(GrowthEventType(event_data["type"]), event_data["value"])
+            for field, amount in changes["inc"].items():
+                totals[field] += amount
+            statuses.update(changes["set"])
 
         # Calculate average rating
-        average_rating = (rating_sum / rating_count) if rating_count > 0 else 0.0
-
-        # Get existing summary or create new one
-        existing_summary = await self.db.growth_summary.find_one({"user_id": user_id})
-
-        summary_data = {
-            "user_id": user_id,
-            "role": role,
-            "total_jobs_completed": total_jobs_completed,
-            "total_revenue": total_revenue,
-            "average_rating": average_rating,
-            "five_star_count": five_star_count,
-            "four_star_count": four_star_count,
-            "llc_status": llc_status,
-            "license_status": license_status,
-            "insurance_status": insurance_status,
-            "last_updated_at": datetime.utcnow()
-        }
+        average_rating = (
+            totals["rating_sum"] / totals["rating_count"] if totals["rating_count"] > 0 else 0.0
+        )
 
-        if existing_summary:
-            # Update existing
-            await self.db.growth_summary.update_one(
-                {"user_id": user_id},
-                {"$set": summary_data}
-            )
-        else:
-            # Insert new
-            summary = GrowthSummary(**summary_data)
-            await self.db.growth_summary.insert_one(summary.model_dump())
+        summary = GrowthSummary(
+            user_id=user_id,
+            role=role,
+            average_rating=average_rating,
+            **totals,
+            **statuses
+        ).model_dump()
+        summary_id = summary.pop("id")
+
+        await self.db.growth_summary.update_one(
+            {"user_id": user_id},
+            {"$set": summary, "$setOnInsert": {"id": summary_id}},
+            upsert=True,
+            session=session
+        )
 
     async def get_summary(self, user_id: str) -> Optional[GrowthSummary]:
         """
@@ -191,15 +401,31 @@ class GrowthService:
 
     # Helper methods to emit specific events
 
-    async def emit_job_completed(self, user_id: str, role: UserRole, job_id: str, revenue: float):
-        """Emit job completion and revenue events"""
+    async def emit_job_completed(
+        self,
+        user_id: str,
+        role: UserRole,
+        job_id: str,
+        revenue: float,
+        session=None
+    ):
+        """
+        Emit job completion and revenue events.
+
+        Event IDs are derived from the job ID, so emitting twice for the
+        same job (e.g. an outbox retry) records the events only once.
+        """
         await self.emit_event(
             user_id, role, GrowthEventType.JOB_COMPLETED, 1.0,
-            meta={"job_id": job_id}
+            meta={"job_id": job_id},
+            event_id=f"{job_id}:{GrowthEventType.JOB_COMPLETED.value}",
+            session=session
         )
         await self.emit_event(
             user_id, role, GrowthEventType.REVENUE_EARNED, revenue,
-            meta={"job_id": job_id}
+            meta={"job_id": job_id},
+            event_id=f"{job_id}:{GrowthEventType.REVENUE_EARNED.value}",
+            session=session
         )
 
     async def emit_review(self, user_id: str, role: UserRole, rating: int, review_id: str):
@@ -0,0 +1,220 @@
+"""
+Job lifecycle event log and publisher.
+
+Every job status change applied by JobLifecycleService (and job creation)
+is appended to the job_events collection. Old events expire through a TTL
+index, so the collection stays small.
+
+Events are published to in-process subscribers through JobEventBus, an
+asyncio pub/sub. Consumers (SSE streams, feeds, stats) subscribe to the bus
+instead of polling db.jobs.
+
+Publishing mode:
+- Replica set: a change stream on job_events feeds the bus, so every API
+  worker sees events written by any worker, and only after commit
+- Standalone server: events are published to the bus right after insert
+  (single-worker visibility)
+"""
+
+import os
+import json
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Optional, Set, List
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from utils.mongo_transactions import supports_transactions
+
+logger = logging.getLogger(__name__)
+
+JOB_EVENTS_TTL_DAYS = int(os.getenv("JOB_EVENTS_TTL_DAYS", "90"))
+
+# Per-subscriber buffer; slow subscribers lose their oldest events
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Delay before reopening a failed change stream
+CHANGE_STREAM_RETRY_SECONDS = 5
+
+# Identifies events recorded by this process. With a change stream every
+# worker receives every event; consumers with side effects that must run
+# once (analytics) only act on events whose origin is their own.
+EVENT_ORIGIN = uuid.uuid4().hex
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def build_job_event(job: dict, actor_id: Optional[str], actor_role: Optional[str]) -> dict:
+    """
+    Build a compact event document from a job document.
+
+    Carries what subscribers need to filter and route the event (parties,
+    category, location) so they don't have to read the job.
+    """
+    address = job.get("address") or {}
+    return {
+        "id": str(uuid.uuid4()),
+        "origin": EVENT_ORIGIN,
+        "job_id": job["id"],
+        "status": getattr(job.get("status"), "value", job.get("status")),
+        "actor_id": actor_id,
+        "actor_role": actor_role,
+        "customer_id": job.get("customer_id"),
+        "provider_id": (
+            job.get("assigned_provider_id")
+            or job.get("assigned_contractor_id")
+            or job.get("contractor_id")
+        ),
+        "service_category": job.get("service_category"),
+        "contractor_type_preference": getattr(
+            job.get("contractor_type_preference"), "value", job.get("contractor_type_preference")
+        ),
+        "location": {
+            "lat": address.get("lat"),
+            "lon": address.get("lon"),
+            "zip": address.get("zip"),
+        },
+        "created_at": datetime.utcnow()
+    }
+
+
+class JobEventBus:
+    """In-process asyncio pub/sub for job events"""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self.dropped_count = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a subscriber and return its event queue"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Remove a subscriber"""
+        self._subscribers.discard(queue)
+
+    def publish(self, event: dict):
+        """Deliver an event to every subscriber without blocking"""
+        for queue in self._subscribers:
+            if queue.full():
+                # Drop the oldest event rather than block the publisher
+                queue.get_nowait()
+                self.dropped_count += 1
+            queue.put_nowait(event)
+
+
+class JobEventLog:
+    """Appends job lifecycle events and publishes them to the bus"""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.bus = JobEventBus()
+        self._use_change_stream = False
+        self._watch_task: Optional[asyncio.Task] = None
+
+    async def ensure_indexes(self):
+        """Create the TTL and lookup indexes for job_events"""
+        await self.db.job_events.create_index(
+            "created_at",
+            expireAfterSeconds=JOB_EVENTS_TTL_DAYS * 24 * 3600
+        )
+        await self.db.job_events.create_index([("job_id", 1), ("created_at", 1)])
+
+    async def start(self):
+        """Start publishing; uses a change stream when the server supports one"""
+        if await supports_transactions(self.db):
+            self._use_change_stream = True
+            self._watch_task = asyncio.create_task(self._watch())
+            logger.info("Job events published from change stream")
+        else:
+            logger.info("Job events published in-process (no replica set)")
+
+    async def stop(self):
+        """Stop the change stream watcher"""
+        if self._watch_task:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    async def record(
+        self,
+        job: dict,
+        actor_id: Optional[str] = None,
+        actor_role: Optional[str] = None,
+        session=None
+    ) -> dict:
+        """
+        Append an event for the job's current status.
+
+        Args:
+            job: Job document after the change
+            actor_id: ID of user making the change
+            actor_role: Role of user making the change
+            session: Optional MongoDB session (event commits with the change)
+
+        Returns:
+            The recorded event
+        """
+        event = build_job_event(job, actor_id, actor_role)
+        await self.db.job_events.insert_one(dict(event), session=session)
+
+        if not self._use_change_stream:
+            self.bus.publish(event)
+
+        return event
+
+    async def record_many(
+        self,
+        jobs: List[dict],
+        actor_id: Optional[str] = None,
+        actor_role: Optional[str] = None
+    ) -> List[dict]:
+        """Append events for several jobs with one insert"""
+        if not jobs:
+            return []
+
+        events = [build_job_event(job, actor_id, actor_role) for job in jobs]
+        await self.db.job_events.insert_many([dict(event) for event in events])
+
+        if not self._use_change_stream:
+            for event in events:
+                self.bus.publish(event)
+
+        return events
+
+    async def get_events(self, job_id: str, limit: int = 100) -> List[dict]:
+        """Get the recorded events for a job, oldest first"""
+        cursor = self.db.job_events.find(
+            {"job_id": job_id}, {"_id": 0}
+        ).sort("created_at", 1).limit(limit)
+        return await cursor.to_list(limit)
+
+    async def _watch(self):
+        """Feed the bus from a change stream, resuming after errors"""
+        resume_token = None
+        while True:
+            try:
+                async with self.db.job_events.watch(
+                    [{"$match": {"operationType": "insert"}}],
+                    resume_after=resume_token
+                ) as stream:
+                    async for change in stream:
+                        resume_token = change["_id"]
+                        event = change["fullDocument"]
+                        event.pop("_id", None)
+                        self.bus.publish(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job event change stream failed, retrying: {e}")
+                await asyncio.sleep(CHANGE_STREAM_RETRY_SECONDS)
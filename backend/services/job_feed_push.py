@@ -0,0 +1,222 @@
+"""
+Real-time job feed push.
+
+Providers subscribe with a location, radius and skills and receive
+incremental feed events instead of polling /handyman/jobs/feed:
+
+- job_posted: a new job matching the filter (carries the feed item)
+- job_taken: a job in range was accepted by a provider
+- job_cancelled: a job in range was cancelled
+
+JobFeedHub consumes the JobEventBus once per worker and fans events out to
+subscribers. Subscribers are indexed in a spatial grid (cells of
+FEED_GRID_CELL_DEGREES), registered in every cell their radius touches, so
+matching a job only looks at subscribers in the job's cell.
+
+Each subscriber costs one bounded queue; idle connections are kept alive
+by a single hub-wide heartbeat instead of a timer per connection.
+"""
+
+import os
+import math
+import asyncio
+import logging
+import uuid
+from typing import Optional, Dict, Set, List, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from models import JobStatus
+from services.job_events import JobEventBus
+from services.job_feed_service import to_feed_item
+from utils.geo import haversine_miles, bounding_box
+
+logger = logging.getLogger(__name__)
+
+# Grid cell size in degrees (~35 miles of latitude)
+FEED_GRID_CELL_DEGREES = float(os.getenv("FEED_GRID_CELL_DEGREES", "0.5"))
+
+# Subscriptions wider than this are clamped to keep the cell count bounded
+MAX_FEED_RADIUS_MILES = 100
+
+# Per-subscriber buffer; slow subscribers lose their oldest events
+FEED_QUEUE_SIZE = 50
+
+# Sentinel put on every queue by the heartbeat loop
+HEARTBEAT = None
+
+FEED_EVENT_TYPES = {
+    JobStatus.POSTED.value: "job_posted",
+    JobStatus.ACCEPTED.value: "job_taken",
+    JobStatus.CANCELLED_BEFORE_ACCEPT.value: "job_cancelled",
+    JobStatus.CANCELLED_AFTER_ACCEPT.value: "job_cancelled",
+    JobStatus.CANCELLED_IN_PROGRESS.value: "job_cancelled",
+}
+
+Cell = Tuple[int, int]
+
+
+def grid_cell(lat: float, lon: float) -> Cell:
+    """Grid cell containing a point"""
+    return (
+        math.floor(lat / FEED_GRID_CELL_DEGREES),
+        math.floor(lon / FEED_GRID_CELL_DEGREES)
+    )
+
+
+class FeedSubscription:
+    """One provider's feed filter and event queue"""
+
+    def __init__(
+        self,
+        user_id: str,
+        lat: float,
+        lon: float,
+        radius_miles: float,
+        skills: List[str],
+        contractor_type: Optional[str]
+    ):
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.lat = lat
+        self.lon = lon
+        self.radius_miles = min(radius_miles, MAX_FEED_RADIUS_MILES)
+        self.skills = {skill.lower() for skill in skills}
+        self.contractor_type = contractor_type
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=FEED_QUEUE_SIZE)
+        self.cells: List[Cell] = []
+
+    def matches(self, event: dict) -> Optional[float]:
+        """
+        Check an event against this filter.
+
+        Returns:
+            Distance in miles if the job matches, None otherwise
+        """
+        category = (event.get("service_category") or "").lower()
+        if self.skills and category not in self.skills:
+            return None
+
+        preference = event.get("contractor_type_preference")
+        if self.contractor_type and preference not in (None, "no_preference", self.contractor_type):
+            return None
+
+        location = event["location"]
+        distance = haversine_miles(self.lat, self.lon, location["lat"], location["lon"])
+        return distance if distance <= self.radius_miles else None
+
+    def push(self, message):
+        """Queue a message without blocking, dropping the oldest when full"""
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+
+class JobFeedHub:
+    """Fans job events out to feed subscribers through a spatial grid"""
+
+    def __init__(self, db: AsyncIOMotorDatabase, bus: JobEventBus, heartbeat_seconds: float = 15):
+        self.db = db
+        self.bus = bus
+        self.heartbeat_seconds = heartbeat_seconds
+        self._grid: Dict[Cell, Set[FeedSubscription]] = {}
+        self._subscriptions: Set[FeedSubscription] = set()
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(
+        self,
+        user_id: str,
+        lat: float,
+        lon: float,
+        radius_miles: float,
+        skills: List[str],
+        contractor_type: Optional[str] = None
+    ) -> FeedSubscription:
+        """Register a subscriber in every grid cell its radius touches"""
+        subscription = FeedSubscription(user_id, lat, lon, radius_miles, skills, contractor_type)
+
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, subscription.radius_miles)
+        (min_row, min_col), (max_row, max_col) = grid_cell(min_lat, min_lon), grid_cell(max_lat, max_lon)
+        subscription.cells = [
+            (row, col)
+            for row in range(min_row, max_row + 1)
+            for col in range(min_col, max_col + 1)
+        ]
+
+        for cell in subscription.cells:
+            self._grid.setdefault(cell, set()).add(subscription)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: FeedSubscription):
+        """Remove a subscriber from the grid"""
+        self._subscriptions.discard(subscription)
+        for cell in subscription.cells:
+            members = self._grid.get(cell)
+            if members is not None:
+                members.discard(subscription)
+                if not members:
+                    del self._grid[cell]
+
+    async def start(self):
+        """Start consuming job events and sending heartbeats"""
+        self._tasks = [
+            asyncio.create_task(self._consume(self.bus.subscribe())),
+            asyncio.create_task(self._heartbeat()),
+        ]
+
+    async def stop(self):
+        """Stop the hub tasks"""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def dispatch(self, event: dict):
+        """Deliver one job event to the subscribers it matches"""
+        event_type = FEED_EVENT_TYPES.get(event.get("status"))
+        location = event.get("location") or {}
+        if not event_type or location.get("lat") is None or location.get("lon") is None:
+            return
+
+        matched = []
+        for subscription in self._grid.get(grid_cell(location["lat"], location["lon"]), ()):
+            distance = subscription.matches(event)
+            if distance is not None:
+                matched.append((subscription, distance))
+
+        if not matched:
+            return
+
+        payload = {"job_id": event["job_id"], "status": event["status"]}
+        if event_type == "job_posted":
+            # One read per posted job, shared by every matching subscriber
+            job = await self.db.jobs.find_one({"id": event["job_id"]}, {"_id": 0})
+            if not job:
+                return
+            payload["job"] = to_feed_item(job)
+
+        for subscription, distance in matched:
+            subscription.push((event_type, dict(payload, distance_miles=round(distance, 2))))
+
+    async def _consume(self, queue: asyncio.Queue):
+        """Read the job event bus and dispatch each event"""
+        try:
+            while True:
+                event = await queue.get()
+                try:
+                    await self.dispatch(event)
+                except Exception as e:
+                    logger.error(f"Job feed dispatch failed for job {event.get('job_id')}: {e}")
+        finally:
+            self.bus.unsubscribe(queue)
+
+    async def _heartbeat(self):
+        """Wake every subscriber periodically so idle streams stay open"""
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            for subscription in list(self._subscriptions):
+                if subscription.queue.empty():
+                    subscription.push(HEARTBEAT)
@@ -12,13 +12,39 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 from geopy.distance import geodesic
 
 from models import Job, JobStatus, User, UserRole, ContractorTypePreference
+from services.address_repository import AddressRepository
+
+
+def to_feed_item(job_dict: dict) -> dict:
+    """Shape a job as a feed item (camelCase for frontend compatibility)"""
+    address = job_dict.get("address") or {}
+    status = job_dict.get("status")
+    return {
+        "id": job_dict.get("id"),
+        "customerId": job_dict.get("customer_id"),
+        "status": getattr(status, "value", status),
+        "title": job_dict.get("title") or job_dict.get("description", "Untitled Job"),
+        "description": job_dict.get("description", ""),
+        "category": job_dict.get("service_category", ""),
+        "location": {
+            "city": address.get("city", ""),
+            "state": address.get("state", ""),
+            "zipCode": address.get("zip", ""),
+            "latitude": address.get("lat"),
+            "longitude": address.get("lon"),
+        },
+        "quotedAmount": job_dict.get("agreed_amount"),
+        "finalAmount": job_dict.get("budget_max"),
+        "item_type": "job",
+    }
 
 
 class JobFeedService:
     """Manages job feed queries with matching logic"""
 
-    def __init__(self, db: AsyncIOMotorDatabase):
+    def __init__(self, db: AsyncIOMotorDatabase, addresses: Optional[AddressRepository] = None):
         self.db = db
+        self.addresses = addresses or AddressRepository(db)
 
     async def get_available_jobs_feed(
         self,
@@ -50,11 +76,15 @@ class JobFeedService:
         if not contractor:
             return []
 
-        # Get contractor's business address coordinates
+        # Get contractor's business address coordinates: the (cached)
+        # default address, else the first address with coordinates
         contractor_lat = None
         contractor_lon = None
-        if contractor.get("addresses"):
-            # Use first address with coordinates
+        default_address = await self.addresses.default_for_user(contractor_id)
+        if default_address and default_address.latitude and default_address.longitude:
+            contractor_lat = default_address.latitude
+            contractor_lon = default_address.longitude
+        elif contractor.get("addresses"):
             for addr in contractor["addresses"]:
                 if addr.get("latitude") and addr.get("longitude"):
                     contractor_lat = addr["latitude"]
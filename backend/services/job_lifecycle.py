@@ -8,14 +8,41 @@ Provider Assignment:
 - assigned_provider_id is the canonical field for provider assignment
 - Legacy fields (contractor_id, assigned_contractor_id) are kept for backward compatibility
 - Use get_assigned_provider_id() and set_assigned_provider_id() helpers
+
+Completion side effects (payout, growth events):
+- Replica set: applied in the same transaction as the job update
+- Standalone server: recorded in the job_outbox collection before the job
+  update, applied right after it, and retried by process_outbox() if that
+  fails. Side effects are idempotent, so retries are safe. After
+  OUTBOX_MAX_ATTEMPTS failures an entry is marked "failed" and left for an
+  operator.
+
+Every applied transition is appended to the job event log (JobEventLog)
+when one is configured.
 """
 
-from typing import Optional, Dict, Any
-from datetime import datetime
+from typing import Optional, Dict, Any, List
+from datetime import datetime, timedelta
+import os
+import uuid
+import logging
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne, ReturnDocument
+
+from models import Job, JobStatus, Payout, PayoutStatus, PayoutProvider, UserRole
+from models.job import serialize_mongo_doc, LEGACY_STATUS_MAP
+from services.growth_service import GrowthService
+from services.payout_service import PayoutService
+from services.job_events import JobEventLog
+from utils.mongo_transactions import supports_transactions
+
+logger = logging.getLogger(__name__)
 
-from models import Job, JobStatus, Payout, PayoutStatus, PayoutProvider
-from models.job import serialize_mongo_doc
+# Outbox entries younger than this are left to the request that created them
+OUTBOX_RETRY_DELAY_SECONDS = int(os.getenv("JOB_OUTBOX_RETRY_DELAY_SECONDS", "60"))
+
+# Failed attempts after which an outbox entry is marked "failed" (dead letter)
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("JOB_OUTBOX_MAX_ATTEMPTS", "10"))
 
 
 class JobLifecycleError(Exception):
@@ -23,6 +50,21 @@ class JobLifecycleError(Exception):
     pass
 
 
+class JobNotFoundError(JobLifecycleError):
+    """Raised when the job being transitioned does not exist"""
+    pass
+
+
+class JobTransitionConflict(JobLifecycleError):
+    """
+    Raised when the job is not in a status the transition can start from.
+
+    Covers both invalid transitions and lost races (e.g. two providers
+    accepting the same job - only the first one matches).
+    """
+    pass
+
+
 def get_assigned_provider_id(job: dict) -> Optional[str]:
     """
     Get the assigned provider ID from a job document.
@@ -86,8 +128,34 @@ class JobLifecycleService:
         JobStatus.CANCELLED_IN_PROGRESS: [],  # Terminal state
     }
 
-    def __init__(self, db: AsyncIOMotorDatabase):
+    def __init__(self, db: AsyncIOMotorDatabase, event_log: Optional[JobEventLog] = None):
         self.db = db
+        self.growth_service = GrowthService(db)
+        self.payout_service = PayoutService(db)
+        self.event_log = event_log
+
+    @classmethod
+    def source_statuses(cls, new_status: JobStatus) -> List[Optional[str]]:
+        """
+        Stored status values a job may have to move to new_status.
+
+        Includes legacy status strings that map to an allowed source, and
+        None (missing status field) when draft is an allowed source.
+        """
+        sources = [
+            status for status, allowed in cls.TRANSITIONS.items()
+            if new_status in allowed
+        ]
+
+        values: List[Optional[str]] = [status.value for status in sources]
+        values.extend(
+            legacy for legacy, status in LEGACY_STATUS_MAP.items()
+            if status in sources and legacy not in values
+        )
+        if JobStatus.DRAFT in sources:
+            values.append(None)
+
+        return values
 
     async def apply_transition(
         self,
@@ -100,6 +168,10 @@ class JobLifecycleService:
         """
         Apply a status transition to a job.
 
+        The transition is a single conditional find_one_and_update: the filter
+        only matches the job while it is in an allowed source status, so
+        concurrent transitions cannot both succeed.
+
         Args:
             job_id: ID of job to transition
             new_status: Desired new status
@@ -111,25 +183,22 @@ class JobLifecycleService:
             Updated job document (dict)
 
         Raises:
-            JobLifecycleError: If transition is not allowed
+            JobNotFoundError: If the job does not exist
+            JobTransitionConflict: If the job is not in a status the
+                transition can start from (including lost races)
+            JobLifecycleError: If required transition data is missing
         """
-        # Fetch current job
-        job = await self.db.jobs.find_one({"id": job_id})
-        if not job:
-            raise JobLifecycleError(f"Job {job_id} not found")
-
-        current_status = JobStatus.from_string(job.get("status", "draft"))
+        source_statuses = self.source_statuses(new_status)
+        if not source_statuses:
+            raise JobTransitionConflict(f"No status can transition to {new_status.value}")
 
-        # Validate transition is allowed
-        if new_status not in self.TRANSITIONS.get(current_status, []):
-            raise JobLifecycleError(
-                f"Cannot transition from {current_status.value} to {new_status.value}"
-            )
+        now = datetime.utcnow().isoformat()
+        query: Dict[str, Any] = {"id": job_id, "status": {"$in": source_statuses}}
 
         # Prepare update data
         update_data = {
             "status": new_status.value,
-            "updated_at": datetime.utcnow().isoformat()
+            "updated_at": now
         }
 
         # Apply side effects based on transition
@@ -142,29 +211,31 @@ class JobLifecycleService:
             if not additional_data or "provider_id" not in additional_data:
                 raise JobLifecycleError("provider_id required for accepted status")
 
+            # Only an unassigned job can be claimed
+            query.update({
+                "assigned_provider_id": None,
+                "assigned_contractor_id": None,
+                "contractor_id": None
+            })
+
             provider_id = additional_data["provider_id"]
             # Set canonical provider ID and legacy fields
             update_data["assigned_provider_id"] = provider_id
             update_data["assigned_contractor_id"] = provider_id  # Legacy
             update_data["contractor_id"] = provider_id  # Legacy
-            update_data["accepted_at"] = datetime.utcnow().isoformat()
+            update_data["accepted_at"] = now
+            if additional_data.get("accepted_proposal_id"):
+                update_data["accepted_proposal_id"] = additional_data["accepted_proposal_id"]
 
         elif new_status == JobStatus.IN_PROGRESS:
             # Provider marked "On the job"
-            update_data["started_at"] = datetime.utcnow().isoformat()
+            update_data["started_at"] = now
 
         elif new_status == JobStatus.COMPLETED:
-            # Provider marked work complete - create payout
-            provider_id = get_assigned_provider_id(job)
-            payout = await self._create_payout_for_job(job_id, provider_id)
-            update_data["payout_id"] = payout.id
-            update_data["completed_at"] = datetime.utcnow().isoformat()
-
-        elif new_status == JobStatus.PAID:
-            # Payment processed - queue payout for transfer
-            payout_id = job.get("payout_id")
-            if payout_id:
-                await self._queue_payout_for_transfer(payout_id)
+            # Provider marked work complete - payout is created below with
+            # this ID so the job and payout reference each other
+            update_data["payout_id"] = str(uuid.uuid4())
+            update_data["completed_at"] = now
 
         elif new_status in [
             JobStatus.CANCELLED_BEFORE_ACCEPT,
@@ -172,43 +243,312 @@ class JobLifecycleService:
             JobStatus.CANCELLED_IN_PROGRESS
         ]:
             # Job cancelled - record cancellation
-            update_data["cancelled_at"] = datetime.utcnow().isoformat()
+            update_data["cancelled_at"] = now
             if additional_data and "cancellation_reason" in additional_data:
                 update_data["cancellation_reason"] = additional_data["cancellation_reason"]
             if additional_data and "cancelled_by" in additional_data:
                 update_data["cancelled_by"] = additional_data["cancelled_by"]
 
-        # Update job in database
-        await self.db.jobs.update_one(
-            {"id": job_id},
-            {"$set": update_data}
+        if new_status == JobStatus.COMPLETED:
+            job = await self._complete_job(job_id, query, update_data, actor_id, actor_role)
+            return serialize_mongo_doc(job)
+
+        # Validate and update in one round-trip
+        job = await self._update_job(job_id, new_status, query, update_data, actor_id, actor_role)
+
+        if new_status == JobStatus.PAID:
+            # Payment processed - queue payout for transfer
+            payout_id = job.get("payout_id")
+            if payout_id:
+                await self._queue_payout_for_transfer(payout_id)
+
+        return serialize_mongo_doc(job)
+
+    async def _update_job(
+        self,
+        job_id: str,
+        new_status: JobStatus,
+        query: Dict[str, Any],
+        update_data: Dict[str, Any],
+        actor_id: str,
+        actor_role: str,
+        session=None
+    ) -> dict:
+        """
+        Run the conditional transition update, record the transition in
+        the event log and return the updated job
+        """
+        job = await self.db.jobs.find_one_and_update(
+            query,
+            {"$set": update_data},
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+        if not job:
+            await self._raise_transition_failure(job_id, new_status)
+
+        if self.event_log:
+            await self.event_log.record(job, actor_id, actor_role, session=session)
+
+        return job
+
+    async def _complete_job(
+        self,
+        job_id: str,
+        query: Dict[str, Any],
+        update_data: Dict[str, Any],
+        actor_id: str,
+        actor_role: str
+    ) -> dict:
+        """
+        Apply the completed transition together with its side effects.
+
+        Uses a transaction when the server supports one. Otherwise the side
+        effects go through the outbox so a failure after the job update
+        cannot leave the job without its payout.
+        """
+        if await supports_transactions(self.db):
+            async def run_in_transaction(session):
+                job = await self._update_job(
+                    job_id, JobStatus.COMPLETED, query, update_data,
+                    actor_id, actor_role, session=session
+                )
+                await self._apply_completion_side_effects(job, actor_role, session=session)
+                return job
+
+            async with await self.db.client.start_session() as session:
+                return await session.with_transaction(run_in_transaction)
+
+        # No transactions: record the side effects before the job update
+        entry = {
+            "id": str(uuid.uuid4()),
+            "type": "job_completed",
+            "job_id": job_id,
+            "payout_id": update_data["payout_id"],
+            "actor_role": actor_role,
+            "status": "pending",
+            "attempts": 0,
+            "created_at": datetime.utcnow()
+        }
+        await self.db.job_outbox.insert_one(entry)
+
+        try:
+            job = await self._update_job(
+                job_id, JobStatus.COMPLETED, query, update_data, actor_id, actor_role
+            )
+        except JobLifecycleError:
+            await self.db.job_outbox.delete_one({"id": entry["id"]})
+            raise
+
+        # Apply now; process_outbox() retries if this fails
+        await self._process_outbox_entry(entry, job)
+        return job
+
+    async def process_outbox(self, limit: int = 100) -> dict:
+        """
+        Retry completion side effects left pending in the outbox.
+
+        Meant to run periodically in the background. Entries are only picked
+        up once they are older than OUTBOX_RETRY_DELAY_SECONDS, so requests
+        still in flight finish their own entries. Entries that have failed
+        OUTBOX_MAX_ATTEMPTS times are marked "failed" and no longer retried.
+
+        Returns:
+            Dict with processing stats
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=OUTBOX_RETRY_DELAY_SECONDS)
+        cursor = self.db.job_outbox.find({
+            "status": "pending",
+            "created_at": {"$lte": cutoff}
+        }).sort("created_at", 1).limit(limit)
+
+        processed_count = 0
+        failed_count = 0
+
+        async for entry in cursor:
+            if await self._process_outbox_entry(entry):
+                processed_count += 1
+            else:
+                failed_count += 1
+
+        return {
+            "processed": processed_count,
+            "failed": failed_count,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    async def _process_outbox_entry(self, entry: dict, job: Optional[dict] = None) -> bool:
+        """
+        Apply one outbox entry and mark it done.
+
+        Args:
+            entry: Outbox entry
+            job: Completed job document, if the caller already has it
+
+        Returns:
+            True if the entry was settled (done or discarded), False on error
+        """
+        try:
+            if job is None:
+                job = await self.db.jobs.find_one({"id": entry["job_id"]})
+
+            if not job or job.get("payout_id") != entry["payout_id"]:
+                # The job update never happened (e.g. crash before it ran)
+                await self.db.job_outbox.update_one(
+                    {"id": entry["id"]},
+                    {"$set": {"status": "discarded", "processed_at": datetime.utcnow()}}
+                )
+                logger.warning(f"Discarded outbox entry {entry['id']} for job {entry['job_id']}")
+                return True
+
+            await self._apply_completion_side_effects(job, entry.get("actor_role"))
+
+            await self.db.job_outbox.update_one(
+                {"id": entry["id"]},
+                {"$set": {"status": "done", "processed_at": datetime.utcnow()}}
+            )
+            return True
+
+        except Exception as e:
+            logger.error(f"Outbox entry {entry['id']} for job {entry['job_id']} failed: {e}")
+            updated = await self.db.job_outbox.find_one_and_update(
+                {"id": entry["id"], "status": "pending"},
+                {"$inc": {"attempts": 1}, "$set": {"last_error": str(e)}},
+                return_document=ReturnDocument.AFTER
+            )
+            if updated and updated["attempts"] >= OUTBOX_MAX_ATTEMPTS:
+                await self.db.job_outbox.update_one(
+                    {"id": entry["id"], "status": "pending"},
+                    {"$set": {"status": "failed", "failed_at": datetime.utcnow()}}
+                )
+                logger.error(
+                    f"Outbox entry {entry['id']} for job {entry['job_id']} gave up after "
+                    f"{updated['attempts']} attempts; payout {entry['payout_id']} needs manual repair"
+                )
+            return False
+
+    async def _raise_transition_failure(self, job_id: str, new_status: JobStatus):
+        """
+        Explain why a conditional transition matched nothing.
+
+        Only runs on the failure path, so successful transitions stay
+        at one round-trip.
+        """
+        job = await self.db.jobs.find_one({"id": job_id}, {"_id": 0, "status": 1})
+        if not job:
+            raise JobNotFoundError(f"Job {job_id} not found")
+
+        current_status = job.get("status") or JobStatus.DRAFT.value
+        if current_status in self.source_statuses(new_status):
+            # Status allowed it, so another precondition was lost to a
+            # concurrent update (e.g. the job was claimed first)
+            raise JobTransitionConflict(
+                f"Job {job_id} was updated by another request and can no longer "
+                f"transition to {new_status.value}"
+            )
+
+        raise JobTransitionConflict(
+            f"Cannot transition from {current_status} to {new_status.value}"
         )
 
-        # Fetch and return updated job
-        updated_job = await self.db.jobs.find_one({"id": job_id})
-        return serialize_mongo_doc(updated_job)
+    async def bulk_accept(
+        self,
+        assignments: Dict[str, str],
+        actor_id: str,
+        actor_role: str
+    ) -> int:
+        """
+        Apply posted -> accepted to many jobs in a single bulk write.
+
+        Used by batch routing. Each update only matches a job that is still
+        posted and unassigned, so jobs claimed in the meantime are skipped.
+
+        Args:
+            assignments: Dict of job_id -> provider_id
+            actor_id: ID of user making the change
+            actor_role: Role of user (normally admin)
 
-    async def _create_payout_for_job(self, job_id: str, provider_id: str) -> Payout:
+        Returns:
+            Number of jobs actually assigned
         """
-        Create a payout when job is completed.
+        if not assignments:
+            return 0
+
+        now = datetime.utcnow().isoformat()
+        operations = [
+            UpdateOne(
+                {
+                    "id": job_id,
+                    "status": {"$in": self.source_statuses(JobStatus.ACCEPTED)},
+                    "assigned_provider_id": None,
+                    "assigned_contractor_id": None,
+                    "contractor_id": None
+                },
+                {
+                    "$set": {
+                        "status": JobStatus.ACCEPTED.value,
+                        "assigned_provider_id": provider_id,
+                        "assigned_contractor_id": provider_id,  # Legacy
+                        "contractor_id": provider_id,  # Legacy
+                        "accepted_at": now,
+                        "updated_at": now
+                    }
+                }
+            )
+            for job_id, provider_id in assignments.items()
+        ]
+
+        result = await self.db.jobs.bulk_write(operations, ordered=False)
+
+        if self.event_log and result.modified_count:
+            # Jobs claimed by someone else in the meantime are skipped
+            assigned_jobs = [
+                job async for job in self.db.jobs.find({
+                    "id": {"$in": list(assignments)},
+                    "status": JobStatus.ACCEPTED.value,
+                    "accepted_at": now
+                })
+                if job.get("assigned_provider_id") == assignments[job["id"]]
+            ]
+            await self.event_log.record_many(assigned_jobs, actor_id, actor_role)
+
+        return result.modified_count
+
+    async def _apply_completion_side_effects(
+        self,
+        job: dict,
+        actor_role: Optional[str],
+        session=None
+    ) -> Payout:
+        """
+        Create the payout and growth events for a completed job.
         Platform fee is 15% of gross amount.
+
+        Idempotent: the payout is keyed by the payout_id already on the job
+        and growth events by job ID, so a retry writes nothing twice.
+
+        Args:
+            job: Job document as returned by the completing transition
+            actor_role: Role of the provider who completed the job
+            session: Optional MongoDB session to run inside a transaction
         """
-        # Get job to find the amount
-        job = await self.db.jobs.find_one({"id": job_id})
-        if not job:
-            raise JobLifecycleError(f"Job {job_id} not found")
+        provider_id = get_assigned_provider_id(job)
 
         # Get accepted proposal to determine amount
-        proposal = await self.db.proposals.find_one({
-            "id": job.get("accepted_proposal_id")
-        })
+        proposal = None
+        if job.get("accepted_proposal_id"):
+            proposal = await self.db.proposals.find_one(
+                {"id": job["accepted_proposal_id"]},
+                session=session
+            )
 
-        amount_gross = proposal.get("quoted_price", 0) if proposal else job.get("budget_max", 0)
+        amount_gross = proposal.get("quoted_price", 0) if proposal else (job.get("budget_max") or 0)
         platform_fee_amount = amount_gross * 0.15
         amount_net = amount_gross - platform_fee_amount
 
         payout = Payout(
-            job_id=job_id,
+            id=job["payout_id"],
+            job_id=job["id"],
             contractor_id=provider_id,
             amount_gross=amount_gross,
             platform_fee_amount=platform_fee_amount,
@@ -217,9 +557,18 @@ class JobLifecycleService:
             provider=PayoutProvider.PLACEHOLDER
         )
 
-        # Insert payout
-        payout_dict = payout.model_dump()
-        await self.db.payouts.insert_one(payout_dict)
+        # Insert payout and credit the wallet (no-op if an earlier attempt already did)
+        await self.payout_service.record_payout_created(payout, session=session)
+
+        # Growth events - provider earns the net amount
+        provider_role = (proposal or {}).get("contractor_role") or actor_role
+        await self.growth_service.emit_job_completed(
+            user_id=provider_id,
+            role=UserRole.HANDYMAN if provider_role == UserRole.HANDYMAN.value else UserRole.CONTRACTOR,
+            job_id=job["id"],
+            revenue=amount_net,
+            session=session
+        )
 
         return payout
 
@@ -228,12 +577,8 @@ class JobLifecycleService:
         Move payout to queued_for_transfer status.
         Background worker will process payment.
         """
-        await self.db.payouts.update_one(
-            {"id": payout_id},
-            {
-                "$set": {
-                    "status": PayoutStatus.QUEUED_FOR_TRANSFER,
-                    "updated_at": datetime.utcnow()
-                }
-            }
+        await self.payout_service.transition_payout(
+            payout_id,
+            PayoutStatus.PENDING,
+            PayoutStatus.QUEUED_FOR_TRANSFER
         )
@@ -0,0 +1,181 @@
+"""
+Customer location verification.
+
+A customer is "verified" when the device coordinates they last reported
+are within LOCATION_VERIFY_TOLERANCE_METERS (great-circle distance) of
+their default address, "mismatch" when farther, and "unverified" when
+the default address is missing or not geocoded.
+
+verify() handles one customer from the already-loaded User. reverify_all()
+re-checks every customer with auto_verify_enabled against their current
+default address (addresses are edited and geocoded after the device check),
+in chunks: distances for a whole chunk are one haversine_array call and
+only changed statuses are written, with one bulk_write per chunk.
+"""
+
+import os
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Tuple
+
+import numpy as np
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from models import User, UserRole
+from utils.geo import EARTH_RADIUS_METERS, haversine_array, haversine_meters
+
+logger = logging.getLogger(__name__)
+
+LOCATION_VERIFY_TOLERANCE_METERS = float(os.getenv("LOCATION_VERIFY_TOLERANCE_METERS", "5000"))
+LOCATION_REVERIFY_CHUNK_SIZE = int(os.getenv("LOCATION_REVERIFY_CHUNK_SIZE", "5000"))
+
+VERIFIED = "verified"
+MISMATCH = "mismatch"
+UNVERIFIED = "unverified"
+
+
+def default_address_coordinates(addresses: List[Any]) -> Optional[Tuple[float, float]]:
+    """
+    (latitude, longitude) of the default address, or None.
+
+    Args:
+        addresses: Address models or address dicts
+    """
+    for address in addresses or []:
+        address = address if isinstance(address, dict) else address.model_dump()
+        if address.get("is_default"):
+            if address.get("latitude") is None or address.get("longitude") is None:
+                return None
+            return float(address["latitude"]), float(address["longitude"])
+    return None
+
+
+def verification_status(distance_meters: Optional[float], tolerance_meters: float) -> str:
+    if distance_meters is None:
+        return UNVERIFIED
+    return VERIFIED if distance_meters <= tolerance_meters else MISMATCH
+
+
+class LocationVerificationService:
+    """Checks customers' device locations against their default address"""
+
+    def __init__(self, db: AsyncIOMotorDatabase, tolerance_meters: float = LOCATION_VERIFY_TOLERANCE_METERS):
+        self.db = db
+        self.tolerance_meters = tolerance_meters
+
+    async def verify(self, user: User, device_lat: float, device_lon: float) -> Dict[str, Any]:
+        """
+        Verify and store a customer's device location.
+
+        Args:
+            user: The customer, as loaded for the request
+            device_lat: Device latitude
+            device_lon: Device longitude
+
+        Returns:
+            The stored verification object, with distance_meters when the
+            default address has coordinates
+        """
+        address = default_address_coordinates(user.addresses)
+        distance = haversine_meters(device_lat, device_lon, *address) if address else None
+        status_value = verification_status(distance, self.tolerance_meters)
+
+        verification = {
+            "status": status_value,
+            "device_lat": device_lat,
+            "device_lon": device_lon,
+            "verified_at": datetime.utcnow() if status_value == VERIFIED else None,
+            "auto_verify_enabled": user.verification.auto_verify_enabled if user.verification else True,
+        }
+
+        await self.db.users.update_one(
+            {"id": user.id},
+            {"$set": {"verification": verification, "updated_at": datetime.utcnow()}}
+        )
+
+        return {
+            **verification,
+            "distance_meters": round(distance, 1) if distance is not None else None,
+            "tolerance_meters": self.tolerance_meters,
+        }
+
+    def _chunk_operations(self, chunk: List[dict], stats: Dict[str, int]) -> List[UpdateOne]:
+        """Recompute a chunk's statuses; updates for the ones that changed"""
+        device = np.array(
+            [(doc["verification"]["device_lat"], doc["verification"]["device_lon"]) for doc in chunk],
+            dtype=np.float64
+        )
+        address = np.array(
+            [default_address_coordinates(doc.get("addresses")) or (np.nan, np.nan) for doc in chunk],
+            dtype=np.float64
+        )
+
+        distances = haversine_array(device[:, 0], device[:, 1], address[:, 0], address[:, 1], EARTH_RADIUS_METERS)
+        statuses = np.where(
+            np.isnan(distances), UNVERIFIED,
+            np.where(distances <= self.tolerance_meters, VERIFIED, MISMATCH)
+        )
+
+        now = datetime.utcnow()
+        operations = []
+        for doc, status_value in zip(chunk, statuses.tolist()):
+            stats[status_value] += 1
+            verification = doc["verification"]
+            if verification.get("status") == status_value:
+                continue
+
+            stats["changed"] += 1
+            operations.append(UpdateOne(
+                {
+                    "id": doc["id"],
+                    # Skip customers who re-verified from their device meanwhile
+                    "verification.device_lat": verification["device_lat"],
+                    "verification.device_lon": verification["device_lon"],
+                },
+                {"$set": {
+                    "verification.status": status_value,
+                    "verification.verified_at": now if status_value == VERIFIED else None,
+                    "updated_at": now,
+                }}
+            ))
+        return operations
+
+    async def reverify_all(self, chunk_size: int = LOCATION_REVERIFY_CHUNK_SIZE, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Re-verify every customer with auto_verify_enabled and a device location.
+
+        Args:
+            chunk_size: Customers per vectorized chunk and bulk_write
+            dry_run: Compute and count without writing
+
+        Returns:
+            Counts: seen, changed, written and per status
+        """
+        stats = {"seen": 0, "changed": 0, "written": 0, VERIFIED: 0, MISMATCH: 0, UNVERIFIED: 0}
+        query = {
+            "role": UserRole.CUSTOMER.value,
+            "verification.auto_verify_enabled": True,
+            "verification.device_lat": {"$type": "number"},
+            "verification.device_lon": {"$type": "number"},
+        }
+        projection = {"_id": 0, "id": 1, "addresses": 1, "verification": 1}
+
+        async def flush(chunk: List[dict]):
+            stats["seen"] += len(chunk)
+            operations = self._chunk_operations(chunk, stats)
+            if operations and not dry_run:
+                result = await self.db.users.bulk_write(operations, ordered=False)
+                stats["written"] += result.modified_count
+
+        chunk: List[dict] = []
+        async for doc in self.db.users.find(query, projection).batch_size(chunk_size):
+            chunk.append(doc)
+            if len(chunk) >= chunk_size:
+                await flush(chunk)
+                chunk = []
+        if chunk:
+            await flush(chunk)
+
+        logger.info(f"Location re-verification{' (dry run)' if dry_run else ''}: {stats}")
+        return {**stats, "tolerance_meters": self.tolerance_meters, "dry_run": dry_run}
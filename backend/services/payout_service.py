@@ -5,67 +5,313 @@ Note: Payout creation is done by JobLifecycleService when job is completed.
 This service handles:
 - Wallet summary calculations
 - Payout queries
-- Background worker to process queued payouts
+- Payout status changes (transfers are made by PayoutWorker)
+
+Wallet balances:
+Each contractor has a wallet_balances document holding the sum of
+amount_net per payout status. Every payout write goes through
+record_payout_created / transition_payout, which apply a conditional
+update to the payout and an atomic $inc to the wallet, so the wallet view
+is a single document read. reconcile_wallets recomputes all balances from
+payouts with one $group aggregation and reports drift; repairs are a
+compare-and-set per wallet, so concurrent transitions are never undone.
 """
 
-from typing import List, Optional
-from datetime import datetime
+import os
+from typing import List, Optional, Dict, Any
+from datetime import datetime, timedelta
+import logging
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 
 from models import Payout, PayoutStatus, WalletSummary
+from services.analytics_service import analytics_row
+
+logger = logging.getLogger(__name__)
+
+# Balances within a cent are considered equal (float $inc drift)
+WALLET_TOLERANCE = 0.01
+
+# Wallets with a payout changed more recently than this are not repaired
+# (the transition's wallet $inc may not have landed yet)
+WALLET_RECONCILE_SETTLE_SECONDS = int(os.getenv("WALLET_RECONCILE_SETTLE_SECONDS", "60"))
+
+WALLET_STATUS_FIELDS = [status.value for status in PayoutStatus]
 
 
 class PayoutService:
     """Manages payout queries and wallet calculations"""
 
-    def __init__(self, db: AsyncIOMotorDatabase):
+    def __init__(self, db: AsyncIOMotorDatabase, analytics=None):
         self.db = db
+        self.analytics = analytics
 
     async def get_wallet_summary(self, contractor_id: str) -> WalletSummary:
         """
-        Calculate wallet summary for a contractor.
+        Get wallet summary for a contractor from its balance document.
 
         Returns:
             WalletSummary with lifetime_earnings, available, pending
         """
-        # Get all payouts for contractor
-        cursor = self.db.payouts.find({"contractor_id": contractor_id})
+        wallet = await self.db.wallet_balances.find_one({"contractor_id": contractor_id}) or {}
 
-        lifetime_earnings = 0.0
-        available = 0.0
-        pending = 0.0
-        last_payout_date = None
+        paid = wallet.get(PayoutStatus.PAID.value, 0.0)
+        queued = wallet.get(PayoutStatus.QUEUED_FOR_TRANSFER.value, 0.0)
+        pending = wallet.get(PayoutStatus.PENDING.value, 0.0)
 
-        async for payout_data in cursor:
-            status = payout_data["status"]
-            amount_net = payout_data["amount_net"]
+        return WalletSummary(
+            lifetime_earnings=round(paid + queued, 2),  # Lifetime earnings = paid + queued
+            available=round(queued, 2),  # Available = queued for transfer
+            pending=round(pending, 2),  # Pending = waiting for job completion
+            last_payout_date=wallet.get("last_payout_date")
+        )
+
+    async def record_payout_created(self, payout: Payout, session=None) -> bool:
+        """
+        Insert a payout and add its amount to the contractor's wallet.
 
-            # Lifetime earnings = paid + queued
-            if status in [PayoutStatus.PAID, PayoutStatus.QUEUED_FOR_TRANSFER]:
-                lifetime_earnings += amount_net
+        Idempotent: if a payout with this ID already exists nothing is
+        written, so the wallet is only credited once.
 
-            # Available = queued for transfer
-            if status == PayoutStatus.QUEUED_FOR_TRANSFER:
-                available += amount_net
+        Args:
+            payout: Payout to insert
+            session: Optional MongoDB session to run inside a transaction
+
+        Returns:
+            True if the payout was inserted
+        """
+        result = await self.db.payouts.update_one(
+            {"id": payout.id},
+            {"$setOnInsert": payout.model_dump()},
+            upsert=True,
+            session=session
+        )
+        if result.upserted_id is None:
+            return False
 
-            # Pending = waiting for job completion
-            if status == PayoutStatus.PENDING:
-                pending += amount_net
+        await self._inc_wallet(
+            payout.contractor_id,
+            {payout.status.value: payout.amount_net},
+            session=session
+        )
+        return True
 
-            # Track last payout date
-            if status == PayoutStatus.PAID:
-                payout_date = payout_data.get("updated_at")
-                if payout_date:
-                    if not last_payout_date or payout_date > last_payout_date:
-                        last_payout_date = payout_date
+    async def transition_payout(
+        self,
+        payout_id: str,
+        from_status: PayoutStatus,
+        to_status: PayoutStatus,
+        update_fields: Optional[Dict[str, Any]] = None,
+        session=None
+    ) -> Optional[dict]:
+        """
+        Move a payout between statuses and its amount between wallet balances.
 
-        return WalletSummary(
-            lifetime_earnings=lifetime_earnings,
-            available=available,
-            pending=pending,
-            last_payout_date=last_payout_date
+        The payout update only matches while the payout is still in
+        from_status, so concurrent or repeated transitions move the
+        amount exactly once.
+
+        Args:
+            payout_id: ID of payout
+            from_status: Status the payout must currently have
+            to_status: New status
+            update_fields: Extra payout fields to set
+            session: Optional MongoDB session
+
+        Returns:
+            Updated payout document, or None if it was not in from_status
+        """
+        now = datetime.utcnow()
+        payout = await self.db.payouts.find_one_and_update(
+            {"id": payout_id, "status": from_status.value},
+            {"$set": {"status": to_status.value, "updated_at": now, **(update_fields or {})}},
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+        if not payout:
+            return None
+
+        amount = payout["amount_net"]
+        await self._inc_wallet(
+            payout["contractor_id"],
+            {from_status.value: -amount, to_status.value: amount},
+            max_fields={"last_payout_date": now} if to_status == PayoutStatus.PAID else None,
+            session=session
+        )
+        return payout
+
+    async def _inc_wallet(
+        self,
+        contractor_id: str,
+        increments: Dict[str, float],
+        max_fields: Optional[Dict[str, Any]] = None,
+        session=None
+    ):
+        """Apply balance increments to a contractor's wallet document"""
+        update = {
+            "$inc": increments,
+            "$set": {"updated_at": datetime.utcnow()}
+        }
+        if max_fields:
+            update["$max"] = max_fields
+
+        await self.db.wallet_balances.update_one(
+            {"contractor_id": contractor_id},
+            update,
+            upsert=True,
+            session=session
         )
 
+    async def reconcile_wallets(self, fix: bool = False) -> dict:
+        """
+        Recompute every wallet from payouts and compare with stored balances.
+
+        Uses one $group aggregation over payouts. Mismatches are logged and
+        returned. The aggregation and the wallet read are not a snapshot, so
+        a mismatch may only be a transition caught between the two; with
+        fix=True each mismatched wallet is re-checked and corrected by
+        _fix_wallet, which leaves it alone if a transition is in flight or
+        lands meanwhile.
+
+        Args:
+            fix: Correct mismatched wallets
+
+        Returns:
+            Dict with checked count, mismatches, fixed count and skipped
+            count (wallets left for the next run)
+        """
+        expected = {
+            row.pop("_id"): row
+            async for row in self.db.payouts.aggregate([{"$group": self._wallet_group()}])
+        }
+        stored = {
+            wallet["contractor_id"]: wallet
+            async for wallet in self.db.wallet_balances.find({}, {"_id": 0})
+        }
+
+        mismatches = []
+        for contractor_id in expected.keys() | stored.keys():
+            want = expected.get(contractor_id, {})
+            have = stored.get(contractor_id, {})
+            if not self._wallet_deltas(want, have):
+                continue
+
+            mismatches.append({
+                "contractor_id": contractor_id,
+                "expected": {status: round(want.get(status, 0.0), 2) for status in WALLET_STATUS_FIELDS},
+                "stored": {status: round(have.get(status, 0.0), 2) for status in WALLET_STATUS_FIELDS},
+            })
+
+        for mismatch in mismatches:
+            logger.warning(
+                f"Wallet mismatch for {mismatch['contractor_id']}: "
+                f"stored {mismatch['stored']}, expected {mismatch['expected']}"
+            )
+
+        fixed = 0
+        skipped = 0
+        if fix:
+            for mismatch in mismatches:
+                if await self._fix_wallet(mismatch["contractor_id"]):
+                    fixed += 1
+                else:
+                    skipped += 1
+
+        return {
+            "checked": len(expected.keys() | stored.keys()),
+            "mismatches": mismatches,
+            "fixed": fixed,
+            "skipped": skipped,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    @staticmethod
+    def _wallet_group() -> Dict[str, Any]:
+        """$group stage computing wallet balances from payouts"""
+        group = {"_id": "$contractor_id"}
+        for status in WALLET_STATUS_FIELDS:
+            group[status] = {"$sum": {"$cond": [{"$eq": ["$status", status]}, "$amount_net", 0]}}
+        group["last_payout_date"] = {
+            "$max": {"$cond": [{"$eq": ["$status", PayoutStatus.PAID.value]}, "$updated_at", None]}
+        }
+        return group
+
+    @staticmethod
+    def _wallet_deltas(want: Dict[str, Any], have: Dict[str, Any]) -> Dict[str, float]:
+        """Balances differing by at least WALLET_TOLERANCE: expected minus stored"""
+        return {
+            status: want.get(status, 0.0) - have.get(status, 0.0)
+            for status in WALLET_STATUS_FIELDS
+            if abs(want.get(status, 0.0) - have.get(status, 0.0)) >= WALLET_TOLERANCE
+        }
+
+    async def _fix_wallet(self, contractor_id: str) -> bool:
+        """
+        Set one contractor's wallet to the balances recomputed from payouts.
+
+        The wallet is read before its payouts are aggregated, and the
+        update is a compare-and-set on the balances read: a transition
+        whose wallet $inc lands meanwhile makes it match nothing. A
+        transition's payout write comes before its wallet $inc, so
+        contractors with a payout updated in the last
+        WALLET_RECONCILE_SETTLE_SECONDS are skipped rather than corrected
+        against an $inc that is still on its way.
+
+        Returns:
+            True if the wallet was corrected
+        """
+        wallet = await self.db.wallet_balances.find_one({"contractor_id": contractor_id}, {"_id": 0})
+        group = {**self._wallet_group(), "last_updated_at": {"$max": "$updated_at"}}
+        rows = await self.db.payouts.aggregate([
+            {"$match": {"contractor_id": contractor_id}},
+            {"$group": group}
+        ]).to_list(1)
+        want = rows[0] if rows else {}
+
+        now = datetime.utcnow()
+        last_updated_at = want.get("last_updated_at")
+        if last_updated_at and last_updated_at > now - timedelta(seconds=WALLET_RECONCILE_SETTLE_SECONDS):
+            logger.info(f"Wallet reconcile skipped for {contractor_id}: payout changed recently")
+            return False
+        if not self._wallet_deltas(want, wallet or {}):
+            return False
+
+        balances = {status: want.get(status, 0.0) for status in WALLET_STATUS_FIELDS}
+        fields = {
+            **balances,
+            "last_payout_date": want.get("last_payout_date"),
+            "updated_at": now,
+            "reconciled_at": now
+        }
+
+        if wallet is None:
+            try:
+                await self.db.wallet_balances.insert_one({"contractor_id": contractor_id, **fields})
+            except DuplicateKeyError:
+                # Created by a transition meanwhile
+                return False
+            return True
+
+        expected_wallet = {"contractor_id": contractor_id}
+        for status in WALLET_STATUS_FIELDS:
+            expected_wallet[status] = wallet[status] if status in wallet else {"$exists": False}
+        result = await self.db.wallet_balances.update_one(expected_wallet, {"$set": fields})
+        if not result.matched_count:
+            logger.info(f"Wallet reconcile skipped for {contractor_id}: wallet changed meanwhile")
+            return False
+        return True
+
+    async def ensure_wallet_balances(self):
+        """Build wallet balances from payouts if none exist yet (first deploy)"""
+        if await self.db.wallet_balances.estimated_document_count() == 0:
+            result = await self.reconcile_wallets(fix=True)
+            if result["fixed"] or result["skipped"]:
+                logger.info(
+                    f"Built wallet balances for {result['fixed']} contractors "
+                    f"({result['skipped']} with recent payouts left for the next reconcile)"
+                )
+
     async def get_payouts(
         self,
         contractor_id: str,
@@ -93,59 +339,79 @@ class PayoutService:
 
         return payouts
 
-    async def process_queued_payouts(self) -> dict:
+    async def settle_transfers(self, lease_token: str, results: List[Dict[str, Any]]) -> Dict[str, int]:
         """
-        Background worker stub to process queued payouts.
+        Write the outcome of a batch of transfers and update wallets.
 
-        In production, this would:
-        1. Query payouts with status=queued_for_transfer
-        2. Call payment provider (Stripe) to transfer funds
-        3. Update status to paid or failed
+        Payouts are updated with one bulk write, each only while still
+        queued and leased by lease_token. Wallet balances are then moved
+        with one $inc per contractor for the payouts this batch settled.
 
-        For now, this is a placeholder that just marks them as paid.
+        Args:
+            lease_token: Token the batch was claimed with
+            results: Dicts with id, status (paid/failed) and payout fields to set
 
         Returns:
-            Dict with processing stats
+            Dict with paid and failed counts
         """
-        # Get queued payouts
-        cursor = self.db.payouts.find({"status": PayoutStatus.QUEUED_FOR_TRANSFER})
+        if not results:
+            return {"paid": 0, "failed": 0}
 
-        processed_count = 0
-        failed_count = 0
+        now = datetime.utcnow()
+        await self.db.payouts.bulk_write([
+            UpdateOne(
+                {
+                    "id": result["id"],
+                    "status": PayoutStatus.QUEUED_FOR_TRANSFER.value,
+                    "lease_token": lease_token
+                },
+                {
+                    "$set": {"status": result["status"].value, "updated_at": now, **result.get("fields", {})},
+                    "$unset": {"lease_expires_at": ""}
+                }
+            )
+            for result in results
+        ], ordered=False)
 
-        async for payout_data in cursor:
-            payout_id = payout_data["id"]
+        # Payouts re-leased by another worker in the meantime are not counted
+        settled = self.db.payouts.find(
+            {
+                "id": {"$in": [result["id"] for result in results]},
+                "lease_token": lease_token,
+                "status": {"$in": [PayoutStatus.PAID.value, PayoutStatus.FAILED.value]}
+            },
+            {"_id": 0, "contractor_id": 1, "amount_net": 1, "status": 1}
+        )
 
-            # TODO: Call payment provider here
-            # For now, just mark as paid
-            try:
-                await self.db.payouts.update_one(
-                    {"id": payout_id},
-                    {
-                        "$set": {
-                            "status": PayoutStatus.PAID,
-                            "updated_at": datetime.utcnow(),
-                            "provider_payout_id": f"placeholder_{payout_id}"
-                        }
-                    }
-                )
-                processed_count += 1
-            except Exception as e:
-                # Mark as failed
-                await self.db.payouts.update_one(
-                    {"id": payout_id},
+        counts = {"paid": 0, "failed": 0}
+        increments: Dict[str, Dict[str, float]] = {}
+        paid_amounts: List[float] = []
+        async for payout in settled:
+            counts[payout["status"]] += 1
+            if payout["status"] == PayoutStatus.PAID.value:
+                paid_amounts.append(payout["amount_net"])
+            wallet = increments.setdefault(payout["contractor_id"], {})
+            queued = PayoutStatus.QUEUED_FOR_TRANSFER.value
+            wallet[queued] = wallet.get(queued, 0.0) - payout["amount_net"]
+            wallet[payout["status"]] = wallet.get(payout["status"], 0.0) + payout["amount_net"]
+
+        if increments:
+            await self.db.wallet_balances.bulk_write([
+                UpdateOne(
+                    {"contractor_id": contractor_id},
                     {
-                        "$set": {
-                            "status": PayoutStatus.FAILED,
-                            "updated_at": datetime.utcnow(),
-                            "failure_reason": str(e)
-                        }
-                    }
+                        "$inc": wallet,
+                        "$set": {"updated_at": now},
+                        **({"$max": {"last_payout_date": now}} if PayoutStatus.PAID.value in wallet else {})
+                    },
+                    upsert=True
                 )
-                failed_count += 1
+                for contractor_id, wallet in increments.items()
+            ], ordered=False)
 
-        return {
-            "processed": processed_count,
-            "failed": failed_count,
-            "timestamp": datetime.utcnow().isoformat()
-        }
+        if self.analytics and paid_amounts:
+            await self.analytics.record_many([
+                analytics_row("payout_paid", value=amount, ts=now) for amount in paid_amounts
+            ])
+
+        return counts
@@ -0,0 +1,298 @@
+"""
+PayoutWorker - Sends queued payouts to the payment provider.
+
+Each run claims batches of queued_for_transfer payouts and transfers them:
+
+1. Claim: a batch is leased atomically (lease_token + lease_expires_at)
+   with one update_many, so several workers never pick the same payout.
+   Leases left by a crashed worker expire and are claimed again.
+2. Hold: payouts whose contractor has no payout_account_id stay queued;
+   their lease is pushed out by PAYOUT_MISSING_ACCOUNT_RETRY_SECONDS so
+   they are retried once an account is set, instead of failing.
+3. Transfer: provider calls run concurrently, capped by a semaphore
+   (PAYOUT_WORKER_CONCURRENCY) and a token bucket (PAYOUT_WORKER_RATE_PER_SECOND).
+   The payout ID is the idempotency key, so a transfer retried after a
+   lost lease is not paid twice.
+4. Settle: results and wallet balances are written with bulk writes
+   through PayoutService.settle_transfers.
+
+Metrics (throughput, provider latency, queue lag) are kept in memory and
+exposed through get_metrics().
+
+The worker moves real money, so it only runs when PAYOUT_WORKER_ENABLED
+is set and a payment provider is chosen explicitly. The mock provider
+(which marks payouts paid without transferring anything) is refused
+unless APP_ENV is a development or test environment.
+"""
+
+import os
+import socket
+import asyncio
+import logging
+import time
+import uuid
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from models import PayoutStatus
+from providers.base import PaymentProvider
+from services.payout_service import PayoutService
+from utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+PAYOUT_WORKER_BATCH_SIZE = int(os.getenv("PAYOUT_WORKER_BATCH_SIZE", "50"))
+PAYOUT_WORKER_CONCURRENCY = int(os.getenv("PAYOUT_WORKER_CONCURRENCY", "10"))
+PAYOUT_WORKER_RATE_PER_SECOND = float(os.getenv("PAYOUT_WORKER_RATE_PER_SECOND", "20"))
+PAYOUT_LEASE_SECONDS = int(os.getenv("PAYOUT_LEASE_SECONDS", "300"))
+PAYOUT_MISSING_ACCOUNT_RETRY_SECONDS = int(os.getenv("PAYOUT_MISSING_ACCOUNT_RETRY_SECONDS", "3600"))
+PAYOUT_WORKER_ENABLED = os.getenv("PAYOUT_WORKER_ENABLED", "false").lower() == "true"
+
+APP_ENV = os.getenv("APP_ENV", "production").lower()
+MOCK_PAYOUT_ENVIRONMENTS = ("development", "dev", "test")
+
+
+def is_mock_provider(payment_provider: PaymentProvider) -> bool:
+    return bool(getattr(payment_provider, "mock_mode", False))
+
+
+def payout_worker_disabled_reason(payment_provider: PaymentProvider, provider_name: Optional[str]) -> Optional[str]:
+    """
+    Why the payout worker must not start, or None if it may.
+
+    Args:
+        payment_provider: The configured payment provider
+        provider_name: ACTIVE_PAYMENT_PROVIDER as set in the environment (None if unset)
+    """
+    if not PAYOUT_WORKER_ENABLED:
+        return "PAYOUT_WORKER_ENABLED is not set"
+    if not provider_name:
+        return "ACTIVE_PAYMENT_PROVIDER is not set"
+    if is_mock_provider(payment_provider) and APP_ENV not in MOCK_PAYOUT_ENVIRONMENTS:
+        return f"mock payment provider is not allowed with APP_ENV={APP_ENV}"
+    return None
+
+
+class PayoutWorker:
+    """Claims queued payouts in batches and transfers them concurrently"""
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        payment_provider: PaymentProvider,
+        payout_service: PayoutService,
+        batch_size: int = PAYOUT_WORKER_BATCH_SIZE,
+        concurrency: int = PAYOUT_WORKER_CONCURRENCY,
+        rate_per_second: float = PAYOUT_WORKER_RATE_PER_SECOND,
+        lease_seconds: int = PAYOUT_LEASE_SECONDS
+    ):
+        self.db = db
+        self.payment_provider = payment_provider
+        self.payout_service = payout_service
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._rate_limiter = TokenBucket(rate_per_second)
+
+        self.metrics = {
+            "batches": 0,
+            "claimed": 0,
+            "paid": 0,
+            "failed": 0,
+            "held": 0,
+            "transfer_seconds_total": 0.0,
+            "last_run_at": None,
+            "last_run_payouts": 0,
+            "last_run_seconds": 0.0,
+        }
+
+    async def run_once(self) -> Dict[str, Any]:
+        """
+        Process queued payouts until none are left to claim.
+
+        Returns:
+            Dict with processing stats for this run
+        """
+        if is_mock_provider(self.payment_provider) and APP_ENV not in MOCK_PAYOUT_ENVIRONMENTS:
+            raise RuntimeError(f"Refusing to pay out through the mock payment provider with APP_ENV={APP_ENV}")
+
+        started = time.monotonic()
+        paid = failed = 0
+
+        while True:
+            lease_token, batch = await self.claim_batch()
+            if not batch:
+                break
+
+            counts = await self.process_batch(lease_token, batch)
+            paid += counts["paid"]
+            failed += counts["failed"]
+
+        elapsed = time.monotonic() - started
+        self.metrics["last_run_at"] = datetime.utcnow()
+        self.metrics["last_run_payouts"] = paid + failed
+        self.metrics["last_run_seconds"] = elapsed
+
+        if paid or failed:
+            logger.info(f"Payout worker: {paid} paid, {failed} failed in {elapsed:.1f}s")
+
+        return {
+            "processed": paid,
+            "failed": failed,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    async def claim_batch(self):
+        """
+        Lease up to batch_size queued payouts, oldest first.
+
+        Returns:
+            (lease_token, payouts) - payouts is empty when nothing is queued
+        """
+        now = datetime.utcnow()
+        claimable = {
+            "status": PayoutStatus.QUEUED_FOR_TRANSFER.value,
+            "$or": [
+                {"lease_expires_at": None},
+                {"lease_expires_at": {"$lt": now}}
+            ]
+        }
+
+        candidates = await self.db.payouts.find(
+            claimable, {"_id": 0, "id": 1}
+        ).sort("updated_at", 1).limit(self.batch_size).to_list(self.batch_size)
+        if not candidates:
+            return None, []
+
+        # The claimable filter is re-checked per document, so payouts
+        # another worker leased since the find are skipped
+        lease_token = f"{self.worker_id}:{uuid.uuid4()}"
+        await self.db.payouts.update_many(
+            {**claimable, "id": {"$in": [payout["id"] for payout in candidates]}},
+            {"$set": {
+                "lease_token": lease_token,
+                "lease_owner": self.worker_id,
+                "lease_expires_at": now + timedelta(seconds=self.lease_seconds)
+            }}
+        )
+
+        batch = await self.db.payouts.find(
+            {"lease_token": lease_token}, {"_id": 0}
+        ).to_list(self.batch_size)
+
+        self.metrics["batches"] += 1
+        self.metrics["claimed"] += len(batch)
+        return lease_token, batch
+
+    async def process_batch(self, lease_token: str, batch: List[dict]) -> Dict[str, int]:
+        """Transfer a claimed batch concurrently and settle the results"""
+        accounts = await self._load_destinations({payout["contractor_id"] for payout in batch})
+
+        # The mock provider needs no destination
+        if not is_mock_provider(self.payment_provider):
+            held = [payout for payout in batch if not accounts.get(payout["contractor_id"])]
+            if held:
+                await self._hold(lease_token, held)
+                batch = [payout for payout in batch if accounts.get(payout["contractor_id"])]
+
+        results = await asyncio.gather(*(
+            self._transfer(payout, accounts.get(payout["contractor_id"]))
+            for payout in batch
+        ))
+
+        counts = await self.payout_service.settle_transfers(lease_token, results)
+        self.metrics["paid"] += counts["paid"]
+        self.metrics["failed"] += counts["failed"]
+        return counts
+
+    async def _load_destinations(self, contractor_ids) -> Dict[str, str]:
+        """Payout account per contractor, from one query"""
+        cursor = self.db.users.find(
+            {"id": {"$in": list(contractor_ids)}},
+            {"_id": 0, "id": 1, "payout_account_id": 1}
+        )
+        return {
+            user["id"]: user.get("payout_account_id")
+            async for user in cursor
+        }
+
+    async def _hold(self, lease_token: str, payouts: List[dict]):
+        """Keep payouts without a payout account queued, retried after a delay"""
+        await self.db.payouts.update_many(
+            {
+                "id": {"$in": [payout["id"] for payout in payouts]},
+                "status": PayoutStatus.QUEUED_FOR_TRANSFER.value,
+                "lease_token": lease_token
+            },
+            {"$set": {
+                "lease_token": None,
+                "lease_owner": None,
+                "lease_expires_at": datetime.utcnow() + timedelta(seconds=PAYOUT_MISSING_ACCOUNT_RETRY_SECONDS),
+                "hold_reason": "No payout account on file"
+            }}
+        )
+        self.metrics["held"] += len(payouts)
+        logger.warning(
+            f"Held {len(payouts)} payouts without a payout account "
+            f"(contractors: {sorted({payout['contractor_id'] for payout in payouts})})"
+        )
+
+    async def _transfer(self, payout: dict, destination) -> Dict[str, Any]:
+        """Send one payout to the provider; never raises"""
+        async with self._semaphore:
+            await self._rate_limiter.acquire()
+            started = time.monotonic()
+            try:
+                transfer = await self.payment_provider.create_transfer(
+                    amount=int(round(payout["amount_net"] * 100)),
+                    destination=destination,
+                    metadata={"payout_id": payout["id"], "job_id": payout["job_id"]},
+                    idempotency_key=payout["id"]
+                )
+                return {
+                    "id": payout["id"],
+                    "status": PayoutStatus.PAID,
+                    "fields": {"provider_payout_id": transfer.id, "hold_reason": None}
+                }
+            except Exception as e:
+                logger.error(f"Transfer failed for payout {payout['id']}: {e}")
+                return {
+                    "id": payout["id"],
+                    "status": PayoutStatus.FAILED,
+                    "fields": {"failure_reason": str(e), "hold_reason": None}
+                }
+            finally:
+                self.metrics["transfer_seconds_total"] += time.monotonic() - started
+
+    async def get_metrics(self) -> Dict[str, Any]:
+        """
+        Worker metrics plus current queue depth and lag.
+
+        Lag is the age of the oldest payout still waiting for transfer.
+        """
+        queued_filter = {"status": PayoutStatus.QUEUED_FOR_TRANSFER.value}
+        queue_depth = await self.db.payouts.count_documents(queued_filter)
+        oldest = await self.db.payouts.find_one(
+            queued_filter, {"_id": 0, "updated_at": 1}, sort=[("updated_at", 1)]
+        )
+
+        settled = self.metrics["paid"] + self.metrics["failed"]
+        return {
+            **self.metrics,
+            "worker_id": self.worker_id,
+            "queue_depth": queue_depth,
+            "lag_seconds": (
+                (datetime.utcnow() - oldest["updated_at"]).total_seconds()
+                if oldest and oldest.get("updated_at") else 0.0
+            ),
+            "avg_transfer_seconds": (
+                self.metrics["transfer_seconds_total"] / settled if settled else 0.0
+            ),
+            "last_run_throughput_per_second": (
+                self.metrics["last_run_payouts"] / self.metrics["last_run_seconds"]
+                if self.metrics["last_run_seconds"] else 0.0
+            ),
+        }
@@ -7,7 +7,7 @@ Enforces business rules:
 - One provider can have at most one active proposal per job
 """
 
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
@@ -15,6 +15,8 @@ from models import (
     Proposal, ProposalCreateRequest, ProposalStatus,
     ContractorRole, JobStatus, UserRole
 )
+from services.contractor_routing import get_business_location
+from utils.geo import haversine_miles
 
 
 class ProposalError(Exception):
@@ -175,3 +177,111 @@ class ProposalService:
             proposals.append(Proposal(**proposal_data))
 
         return proposals
+
+    async def get_proposals_with_context(
+        self,
+        job_id: str,
+        customer_id: str,
+        statuses: Optional[List[ProposalStatus]] = None
+    ) -> List[dict]:
+        """
+        Get proposals for a job with contractor details (customer-only).
+
+        One aggregation joins each proposal with the contractor's profile
+        and growth summary (projected fields only), so the customer app
+        doesn't fetch every contractor separately.
+
+        Args:
+            job_id: Job to get proposals for
+            customer_id: ID of customer who owns the job
+            statuses: Optional proposal statuses to include
+
+        Returns:
+            List of proposal dicts with a contractor section (name, photo,
+            rating, completed jobs, distance from the job in miles)
+
+        Raises:
+            ProposalError: If validation fails
+        """
+        # Verify customer owns the job
+        job = await self.db.jobs.find_one(
+            {"id": job_id},
+            {"_id": 0, "customer_id": 1, "address": 1}
+        )
+        if not job:
+            raise ProposalError(f"Job {job_id} not found")
+
+        if job["customer_id"] != customer_id:
+            raise ProposalError("You can only view proposals for your own jobs")
+
+        match = {"job_id": job_id}
+        if statuses:
+            match["status"] = {"$in": [status.value for status in statuses]}
+
+        pipeline = [
+            {"$match": match},  # Uses the (job_id, status) index
+            {"$sort": {"created_at": 1}},
+            {"$lookup": {
+                "from": "users",
+                "let": {"contractor_id": "$contractor_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$id", "$$contractor_id"]}}},
+                    {"$project": {
+                        "_id": 0,
+                        "first_name": 1,
+                        "last_name": 1,
+                        "business_name": 1,
+                        "profile_photo": 1,
+                        "addresses.latitude": 1,
+                        "addresses.longitude": 1,
+                        "addresses.is_default": 1,
+                    }},
+                ],
+                "as": "contractor"
+            }},
+            {"$lookup": {
+                "from": "growth_summary",
+                "let": {"contractor_id": "$contractor_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$user_id", "$$contractor_id"]}}},
+                    {"$project": {
+                        "_id": 0,
+                        "total_jobs_completed": 1,
+                        "average_rating": 1,
+                        "rating_count": 1,
+                    }},
+                ],
+                "as": "growth"
+            }},
+            {"$project": {"_id": 0}},
+        ]
+
+        address = job.get("address") or {}
+        job_location = (address.get("lat"), address.get("lon"))
+
+        results = []
+        async for proposal in self.db.proposals.aggregate(pipeline):
+            contractor = (proposal.pop("contractor") or [{}])[0]
+            growth = (proposal.pop("growth") or [{}])[0]
+
+            distance = None
+            location = get_business_location(contractor)
+            if location and None not in job_location:
+                distance = round(haversine_miles(
+                    job_location[0], job_location[1],
+                    location["latitude"], location["longitude"]
+                ), 1)
+
+            proposal["contractor"] = {
+                "id": proposal["contractor_id"],
+                "name": f"{contractor.get('first_name', '')} {contractor.get('last_name', '')}".strip(),
+                "business_name": contractor.get("business_name"),
+                "profile_photo": contractor.get("profile_photo"),
+                "average_rating": growth.get("average_rating", 0.0),
+                "rating_count": growth.get("rating_count", 0),
+                "jobs_completed": growth.get("total_jobs_completed", 0),
+                "distance_miles": distance,
+            }
+            results.append(proposal)
+
+        return results
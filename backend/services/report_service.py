@@ -0,0 +1,212 @@
+"""
+ReportService - Contractor monthly, yearly and tax reports.
+
+Totals are computed in MongoDB, one $group-by-month aggregation per
+collection (jobs, expenses, mileage_logs, time_logs), run concurrently.
+Nothing is loaded into Python beyond one row per month, so there is no
+document cap and the cost doesn't grow with the number of records
+returned.
+
+Date fields are stored inconsistently: expenses, mileage and time logs
+hold ISO strings, jobs may hold BSON dates or ISO strings. Range matches
+therefore cover both types, and months are taken from either the date or
+the "YYYY-MM" prefix of the string.
+"""
+
+import asyncio
+from typing import Dict, Any, Optional, Tuple
+from datetime import date, datetime, timedelta
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from models import JobStatus
+
+# IRS standard mileage rate (2024: $0.67/mile)
+IRS_MILEAGE_RATE = 0.67
+
+TAX_DISCLAIMER = "For informational purposes only. Not official tax documentation. Consult your tax professional."
+
+
+def date_range_filter(field: str, start: date, end: date) -> Dict[str, Any]:
+    """Match start <= field < end for fields stored as dates or ISO strings"""
+    start_dt = datetime.combine(start, datetime.min.time())
+    end_dt = datetime.combine(end, datetime.min.time())
+    return {"$or": [
+        {field: {"$gte": start_dt, "$lt": end_dt}},
+        {field: {"$gte": start.isoformat(), "$lt": end.isoformat()}},
+    ]}
+
+
+def parse_tax_period(start_date: str, end_date: str) -> Tuple[date, date]:
+    """
+    Parse an inclusive YYYY-MM-DD range.
+
+    Returns:
+        (start, end) with end exclusive (the day after end_date)
+
+    Raises:
+        ValueError: if either date is malformed
+    """
+    start = date.fromisoformat(start_date[:10])
+    end = date.fromisoformat(end_date[:10]) + timedelta(days=1)
+    return start, end
+
+
+def _month_key(field: str) -> Dict[str, Any]:
+    """ "YYYY-MM" of a field stored as a date or an ISO string (dates stringify as ISO)"""
+    return {"$substrBytes": [{"$toString": f"${field}"}, 0, 7]}
+
+
+def _report_row(jobs: dict, expenses: dict, mileage: dict, time_logs: dict) -> Dict[str, Any]:
+    total_revenue = jobs.get("revenue", 0)
+    total_expenses = expenses.get("amount", 0)
+    return {
+        "total_jobs": jobs.get("total", 0),
+        "completed_jobs": jobs.get("completed", 0),
+        "total_revenue": total_revenue,
+        "total_expenses": total_expenses,
+        "total_mileage": mileage.get("miles", 0),
+        "total_hours": time_logs.get("minutes", 0) / 60,
+        "net_income": total_revenue - total_expenses,
+    }
+
+
+def _sum_months(months: Dict[Optional[str], dict]) -> dict:
+    """Add up per-month rows (including rows whose month couldn't be read)"""
+    totals: Dict[str, float] = {}
+    for row in months.values():
+        for key, value in row.items():
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+class ReportService:
+    """Aggregation-based contractor reports"""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+
+    async def _sum_by_month(
+        self,
+        collection: str,
+        contractor_id: str,
+        date_field: str,
+        start: date,
+        end: date,
+        sums: Dict[str, Any],
+        extra_match: Optional[Dict[str, Any]] = None
+    ) -> Dict[Optional[str], dict]:
+        """
+        Group one collection's documents in [start, end) by month.
+
+        Returns:
+            {"YYYY-MM": {sum_name: value}} - one row per month with data
+        """
+        pipeline = [
+            {"$match": {
+                "contractor_id": contractor_id,
+                **(extra_match or {}),
+                **date_range_filter(date_field, start, end),
+            }},
+            {"$group": {"_id": _month_key(date_field), **sums}},
+        ]
+        cursor = self.db[collection].aggregate(pipeline)
+        return {row.pop("_id"): row async for row in cursor}
+
+    async def _monthly_activity(self, contractor_id: str, start: date, end: date):
+        """Jobs, expenses, mileage and time logs per month, aggregated concurrently"""
+        completed = {"$eq": ["$status", JobStatus.COMPLETED.value]}
+        return await asyncio.gather(
+            self._sum_by_month("jobs", contractor_id, "created_at", start, end, {
+                "total": {"$sum": 1},
+                "completed": {"$sum": {"$cond": [completed, 1, 0]}},
+                "revenue": {"$sum": {"$cond": [completed, {"$ifNull": ["$contractor_invoice_amount", 0]}, 0]}},
+            }),
+            self._sum_by_month("expenses", contractor_id, "date", start, end, {
+                "amount": {"$sum": {"$ifNull": ["$amount", 0]}},
+            }),
+            self._sum_by_month("mileage_logs", contractor_id, "date", start, end, {
+                "miles": {"$sum": {"$ifNull": ["$miles", 0]}},
+            }),
+            self._sum_by_month("time_logs", contractor_id, "start_time", start, end, {
+                "minutes": {"$sum": {"$ifNull": ["$duration_minutes", 0]}},
+            }),
+        )
+
+    async def get_monthly_report(self, contractor_id: str, year: int, month: int) -> Dict[str, Any]:
+        """Totals for one calendar month"""
+        start = date(year, month, 1)
+        end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+
+        activity = await self._monthly_activity(contractor_id, start, end)
+        return {
+            "year": year,
+            "month": month,
+            "contractor_id": contractor_id,
+            **_report_row(*(_sum_months(months) for months in activity)),
+        }
+
+    async def get_yearly_report(self, contractor_id: str, year: int) -> Dict[str, Any]:
+        """Totals for a calendar year with a per-month breakdown"""
+        activity = await self._monthly_activity(contractor_id, date(year, 1, 1), date(year + 1, 1, 1))
+        jobs, expenses, mileage, time_logs = activity
+
+        monthly_breakdown = []
+        for month in range(1, 13):
+            key = f"{year}-{month:02d}"
+            monthly_breakdown.append({
+                "year": year,
+                "month": month,
+                "contractor_id": contractor_id,
+                **_report_row(
+                    jobs.get(key, {}), expenses.get(key, {}), mileage.get(key, {}), time_logs.get(key, {})
+                ),
+            })
+
+        return {
+            "year": year,
+            "contractor_id": contractor_id,
+            **_report_row(*(_sum_months(months) for months in activity)),
+            "monthly_breakdown": monthly_breakdown,
+        }
+
+    async def get_tax_report(self, contractor_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
+        """
+        Revenue and deductions for an inclusive date range.
+
+        Args:
+            start_date: First day, YYYY-MM-DD
+            end_date: Last day (inclusive), YYYY-MM-DD
+        """
+        start, end = parse_tax_period(start_date, end_date)
+
+        jobs, expenses, mileage = await asyncio.gather(
+            self._sum_by_month("jobs", contractor_id, "completed_at", start, end, {
+                "revenue": {"$sum": {"$ifNull": ["$contractor_invoice_amount", 0]}},
+            }, extra_match={"status": JobStatus.COMPLETED.value}),
+            self._sum_by_month("expenses", contractor_id, "date", start, end, {
+                "amount": {"$sum": {"$ifNull": ["$amount", 0]}},
+            }),
+            self._sum_by_month("mileage_logs", contractor_id, "date", start, end, {
+                "miles": {"$sum": {"$ifNull": ["$miles", 0]}},
+            }),
+        )
+
+        total_revenue = _sum_months(jobs).get("revenue", 0)
+        total_expenses = _sum_months(expenses).get("amount", 0)
+        total_mileage = _sum_months(mileage).get("miles", 0)
+        mileage_deduction = total_mileage * IRS_MILEAGE_RATE
+        total_deductions = total_expenses + mileage_deduction
+
+        return {
+            "contractor_id": contractor_id,
+            "start_date": start_date,
+            "end_date": end_date,
+            "total_revenue": total_revenue,
+            "total_expenses": total_expenses,
+            "total_mileage": total_mileage,
+            "mileage_deduction": mileage_deduction,
+            "total_deductions": total_deductions,
+            "net_income": total_revenue - total_deductions,
+            "tax_year": start.year,
+            "disclaimer": TAX_DISCLAIMER,
+        }
@@ -0,0 +1,179 @@
+"""
+SystemStatsService - Materialized system-wide statistics for the admin dashboard.
+
+Counts per collection are computed with one $group-by-status (or role)
+aggregation each, run concurrently, and written to a single
+system_stats document. The admin endpoint reads that snapshot instead of
+issuing a dozen count queries per page load.
+
+The snapshot is refreshed every SYSTEM_STATS_INTERVAL_SECONDS, and sooner
+after job lifecycle events (at most once per
+SYSTEM_STATS_MIN_REFRESH_SECONDS, so bursts of events cost one refresh).
+"""
+
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from models import JobStatus, QuoteStatus, UserRole
+from services.job_events import JobEventBus
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_STATS_INTERVAL_SECONDS = int(os.getenv("SYSTEM_STATS_INTERVAL_SECONDS", "300"))
+SYSTEM_STATS_MIN_REFRESH_SECONDS = int(os.getenv("SYSTEM_STATS_MIN_REFRESH_SECONDS", "10"))
+
+SNAPSHOT_ID = "global"
+
+
+class SystemStatsService:
+    """Computes, stores and serves the admin statistics snapshot"""
+
+    def __init__(self, db: AsyncIOMotorDatabase, bus: Optional[JobEventBus] = None):
+        self.db = db
+        self.bus = bus
+        self._changed = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    async def _count_by(self, collection: str, field: str, sums: Optional[Dict[str, Any]] = None) -> Dict[str, dict]:
+        """{value of field: {"count": n, **sums}} in one pass over the collection"""
+        pipeline = [{"$group": {"_id": f"${field}", "count": {"$sum": 1}, **(sums or {})}}]
+        cursor = self.db[collection].aggregate(pipeline)
+        return {row.pop("_id"): row async for row in cursor}
+
+    async def compute(self) -> Dict[str, Any]:
+        """Compute the statistics live, one aggregation per collection, concurrently"""
+        users, jobs, quotes, warranties, change_orders = await asyncio.gather(
+            self._count_by("users", "role"),
+            self._count_by("jobs", "status", {
+                "revenue": {"$sum": {"$ifNull": ["$contractor_invoice_amount", 0]}},
+            }),
+            self._count_by("quotes", "status"),
+            self._count_by("warranty_requests", "status"),
+            self._count_by("change_orders", "status"),
+        )
+
+        def total(groups: Dict[str, dict]) -> int:
+            return sum(group["count"] for group in groups.values())
+
+        def count(groups: Dict[str, dict], key: str) -> int:
+            return groups.get(key, {}).get("count", 0)
+
+        completed = jobs.get(JobStatus.COMPLETED.value, {})
+        return {
+            "users": {
+                "total": total(users),
+                "customers": count(users, UserRole.CUSTOMER.value),
+                "contractors": count(users, UserRole.CONTRACTOR.value)
+            },
+            "jobs": {
+                "total": total(jobs),
+                "pending": count(jobs, "pending"),
+                "in_progress": count(jobs, JobStatus.IN_PROGRESS.value),
+                "completed": completed.get("count", 0)
+            },
+            "revenue": {
+                "total": completed.get("revenue", 0),
+                "completed_jobs_count": completed.get("count", 0)
+            },
+            "quotes": {
+                "total": total(quotes),
+                "pending": count(quotes, QuoteStatus.DRAFT.value)
+            },
+            "warranties": {
+                "total": total(warranties),
+                "pending": count(warranties, "pending")
+            },
+            "change_orders": {
+                "total": total(change_orders),
+                "pending": count(change_orders, "pending")
+            }
+        }
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Recompute the statistics and store them as the snapshot"""
+        started = time.perf_counter()
+        stats = await self.compute()
+        snapshot = {
+            "_id": SNAPSHOT_ID,
+            "stats": stats,
+            "computed_at": datetime.utcnow(),
+            "compute_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        await self.db.system_stats.replace_one({"_id": SNAPSHOT_ID}, snapshot, upsert=True)
+        return snapshot
+
+    async def get_stats(self, fresh: bool = False) -> Dict[str, Any]:
+        """
+        Statistics with freshness metadata.
+
+        Args:
+            fresh: Compute live instead of reading the snapshot
+
+        Returns:
+            The statistics plus a "freshness" entry with computed_at,
+            age_seconds, compute_ms and source ("snapshot" or "live")
+        """
+        if fresh:
+            snapshot = await self.refresh()
+            source = "live"
+        else:
+            snapshot = await self.db.system_stats.find_one({"_id": SNAPSHOT_ID})
+            source = "snapshot"
+            if snapshot is None:
+                snapshot = await self.refresh()
+                source = "live"
+
+        computed_at = snapshot["computed_at"]
+        return {
+            **snapshot["stats"],
+            "freshness": {
+                "computed_at": computed_at.isoformat(),
+                "age_seconds": round((datetime.utcnow() - computed_at).total_seconds(), 1),
+                "compute_ms": snapshot.get("compute_ms"),
+                "source": source,
+                "refresh_interval_seconds": SYSTEM_STATS_INTERVAL_SECONDS,
+            }
+        }
+
+    async def start(self):
+        """Refresh in the background on an interval and after job events"""
+        self._tasks = [asyncio.create_task(self._refresh_loop())]
+        if self.bus is not None:
+            self._tasks.append(asyncio.create_task(self._consume(self.bus.subscribe())))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def _consume(self, queue: asyncio.Queue):
+        """Mark the snapshot stale on every job lifecycle event"""
+        try:
+            while True:
+                await queue.get()
+                self._changed.set()
+        finally:
+            self.bus.unsubscribe(queue)
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"System stats refresh failed: {e}")
+
+            # Coalesce event bursts into one refresh per minimum interval
+            await asyncio.sleep(SYSTEM_STATS_MIN_REFRESH_SECONDS)
+            try:
+                await asyncio.wait_for(
+                    self._changed.wait(),
+                    timeout=max(0, SYSTEM_STATS_INTERVAL_SECONDS - SYSTEM_STATS_MIN_REFRESH_SECONDS)
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._changed.clear()
@@ -0,0 +1,387 @@
+"""
+TaxExportService - Year-end tax exports (PDF or CSV) for contractors.
+
+Every completed job, expense, mileage log and time log in the period is
+listed, followed by the same totals as the tax report. Documents are read
+from cursors in batches of EXPORT_BATCH_SIZE and written out as they
+arrive, so memory stays flat however long the period is:
+
+- PDF pages are emitted as soon as they fill; only the byte offsets of
+  written objects are kept for the cross-reference table
+- CSV rows are encoded per row and flushed in EXPORT_CHUNK_BYTES chunks
+
+Periods up to TAX_EXPORT_STREAM_MAX_DAYS are streamed in the response.
+Longer periods are spooled to a temporary file (on disk past
+EXPORT_SPOOL_MEMORY_BYTES), uploaded to object storage and returned as a
+signed URL, so a slow client can't hold a cursor open for minutes.
+"""
+
+import io
+import os
+import csv
+import uuid
+import asyncio
+import logging
+import tempfile
+from datetime import date, datetime
+from typing import Dict, Any, AsyncIterator, List, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from models import JobStatus
+from services.report_service import (
+    IRS_MILEAGE_RATE,
+    TAX_DISCLAIMER,
+    date_range_filter,
+    parse_tax_period,
+)
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+EXPORT_CHUNK_BYTES = 64 * 1024
+EXPORT_SPOOL_MEMORY_BYTES = 1024 * 1024
+TAX_EXPORT_STREAM_MAX_DAYS = int(os.getenv("TAX_EXPORT_STREAM_MAX_DAYS", "366"))
+TAX_EXPORT_URL_EXPIRES_SECONDS = int(os.getenv("TAX_EXPORT_URL_EXPIRES_SECONDS", "3600"))
+
+EXPORT_FORMATS = {
+    "pdf": "application/pdf",
+    "csv": "text/csv",
+}
+
+CSV_COLUMNS = ["section", "date", "reference", "description", "category", "amount", "miles", "hours"]
+
+# section, collection, date field, fields read
+SECTIONS = [
+    ("Completed jobs", "jobs", "completed_at",
+     ["id", "title", "service_category", "completed_at", "contractor_invoice_amount"]),
+    ("Expenses", "expenses", "date",
+     ["id", "date", "description", "vendor", "category", "amount"]),
+    ("Mileage", "mileage_logs", "date",
+     ["id", "date", "purpose", "miles"]),
+    ("Time logs", "time_logs", "start_time",
+     ["job_id", "start_time", "notes", "duration_minutes"]),
+]
+
+
+def _format_date(value: Any) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()[:10]
+    return str(value or "")[:10]
+
+
+def _export_row(section: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a document into the export's columns"""
+    if section == "Completed jobs":
+        return {
+            "date": _format_date(doc.get("completed_at")),
+            "reference": doc.get("id", ""),
+            "description": doc.get("title") or doc.get("service_category") or "",
+            "category": doc.get("service_category") or "",
+            "amount": doc.get("contractor_invoice_amount") or 0,
+        }
+    if section == "Expenses":
+        return {
+            "date": _format_date(doc.get("date")),
+            "reference": doc.get("id", ""),
+            "description": doc.get("description") or doc.get("vendor") or "",
+            "category": doc.get("category") or "",
+            "amount": doc.get("amount") or 0,
+        }
+    if section == "Mileage":
+        return {
+            "date": _format_date(doc.get("date")),
+            "reference": doc.get("id", ""),
+            "description": doc.get("purpose") or "",
+            "miles": doc.get("miles") or 0,
+        }
+    return {
+        "date": _format_date(doc.get("start_time")),
+        "reference": doc.get("job_id", ""),
+        "description": doc.get("notes") or "",
+        "hours": round((doc.get("duration_minutes") or 0) / 60, 2),
+    }
+
+
+class _Totals:
+    """Running totals, accumulated while rows stream past"""
+
+    def __init__(self):
+        self.revenue = 0.0
+        self.expenses = 0.0
+        self.miles = 0.0
+        self.hours = 0.0
+
+    def add(self, section: str, row: Dict[str, Any]):
+        if section == "Completed jobs":
+            self.revenue += row["amount"]
+        elif section == "Expenses":
+            self.expenses += row["amount"]
+        elif section == "Mileage":
+            self.miles += row["miles"]
+        else:
+            self.hours += row["hours"]
+
+    def summary(self) -> List[Tuple[str, str]]:
+        mileage_deduction = self.miles * IRS_MILEAGE_RATE
+        total_deductions = self.expenses + mileage_deduction
+        return [
+            ("Total revenue", f"{self.revenue:.2f}"),
+            ("Total expenses", f"{self.expenses:.2f}"),
+            ("Total mileage", f"{self.miles:.1f}"),
+            (f"Mileage deduction (${IRS_MILEAGE_RATE}/mile)", f"{mileage_deduction:.2f}"),
+            ("Total deductions", f"{total_deductions:.2f}"),
+            ("Total hours", f"{self.hours:.2f}"),
+            ("Net income", f"{self.revenue - total_deductions:.2f}"),
+        ]
+
+
+class _CsvWriter:
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._csv = csv.writer(self._buffer)
+
+    def _take(self) -> bytes:
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def begin(self, title: str) -> bytes:
+        self._csv.writerow(CSV_COLUMNS)
+        return self._take()
+
+    def section(self, name: str) -> bytes:
+        return b""
+
+    def row(self, section: str, row: Dict[str, Any]) -> bytes:
+        self._csv.writerow([section] + [row.get(column, "") for column in CSV_COLUMNS[1:]])
+        return self._take()
+
+    def finish(self, summary: List[Tuple[str, str]], note: str) -> bytes:
+        for label, value in summary:
+            self._csv.writerow(["Summary", "", "", label, "", value, "", ""])
+        self._csv.writerow(["Note", "", "", note, "", "", "", ""])
+        return self._take()
+
+
+class _PdfWriter:
+    """
+    Minimal PDF writer (Courier text, US Letter) that emits each page as
+    soon as it is full.
+
+    Pages reference the page tree (object 2) before it exists; the tree
+    and the cross-reference table are written last, from the offsets
+    recorded along the way.
+    """
+
+    PAGE_WIDTH = 612
+    PAGE_HEIGHT = 792
+    MARGIN = 40
+    FONT_SIZE = 8
+    LEADING = 11
+    LINE_CHARS = 112
+
+    # 1: catalog, 2: page tree, 3: regular font, 4: bold font
+    FIRST_PAGE_OBJECT = 5
+
+    def __init__(self):
+        self._offset = 0
+        self._offsets: Dict[int, int] = {}
+        self._next_object = self.FIRST_PAGE_OBJECT
+        self._page_objects: List[int] = []
+        self._lines: List[Tuple[str, bool]] = []
+        self._lines_per_page = (self.PAGE_HEIGHT - 2 * self.MARGIN) // self.LEADING
+
+    def _emit(self, data: bytes) -> bytes:
+        self._offset += len(data)
+        return data
+
+    def _object(self, number: int, body: bytes) -> bytes:
+        self._offsets[number] = self._offset
+        return self._emit(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    @staticmethod
+    def _escape(text: str) -> bytes:
+        encoded = text.encode("cp1252", errors="replace")
+        return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+    def _add_line(self, text: str, bold: bool = False) -> bytes:
+        self._lines.append((text[:self.LINE_CHARS], bold))
+        if len(self._lines) >= self._lines_per_page:
+            return self._flush_page()
+        return b""
+
+    def _flush_page(self) -> bytes:
+        if not self._lines:
+            return b""
+
+        top = self.PAGE_HEIGHT - self.MARGIN
+        content = [b"BT", b"%d TL" % self.LEADING, b"%d %d Td" % (self.MARGIN, top)]
+        current_font = None
+        for text, bold in self._lines:
+            font = b"/F2" if bold else b"/F1"
+            if font != current_font:
+                content.append(font + b" %d Tf" % self.FONT_SIZE)
+                current_font = font
+            content.append(b"(" + self._escape(text) + b") Tj T*")
+        content.append(b"ET")
+        stream = b"\n".join(content)
+        self._lines = []
+
+        contents_number = self._next_object
+        page_number = self._next_object + 1
+        self._next_object += 2
+        self._page_objects.append(page_number)
+
+        return self._object(
+            contents_number,
+            b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        ) + self._object(
+            page_number,
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>"
+            % (self.PAGE_WIDTH, self.PAGE_HEIGHT, contents_number)
+        )
+
+    def begin(self, title: str) -> bytes:
+        return (
+            self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+            + self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+            + self._object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>")
+            + self._object(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier-Bold /Encoding /WinAnsiEncoding >>")
+            + self._add_line(title, bold=True)
+            + self._add_line("")
+        )
+
+    def section(self, name: str) -> bytes:
+        header = f"{'Date':<10}  {'Reference':<36}  {'Description':<40}  {'Amount':>9}  {'Miles/Hrs':>9}"
+        return self._add_line("") + self._add_line(name, bold=True) + self._add_line(header, bold=True)
+
+    def row(self, section: str, row: Dict[str, Any]) -> bytes:
+        amount = f"{row['amount']:.2f}" if "amount" in row else ""
+        quantity = row.get("miles", row.get("hours", ""))
+        line = (
+            f"{row['date']:<10}  {str(row['reference'])[:36]:<36}  "
+            f"{str(row['description'])[:40]:<40}  {amount:>9}  {quantity!s:>9}"
+        )
+        return self._add_line(line)
+
+    def finish(self, summary: List[Tuple[str, str]], note: str) -> bytes:
+        data = self._add_line("") + self._add_line("Summary", bold=True)
+        for label, value in summary:
+            data += self._add_line(f"{label:<40}  {value:>12}")
+        data += self._add_line("") + self._add_line(note)
+        data += self._flush_page()
+
+        kids = b" ".join(b"%d 0 R" % number for number in self._page_objects)
+        data += self._object(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._page_objects)))
+
+        xref_offset = self._offset
+        size = self._next_object
+        xref = [b"xref", b"0 %d" % size, b"0000000000 65535 f "]
+        xref.extend(b"%010d 00000 n " % self._offsets[number] for number in range(1, size))
+        trailer = b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref_offset)
+        return data + self._emit(b"\n".join(xref) + b"\n" + trailer)
+
+
+class TaxExportService:
+    """Streams tax exports, or uploads them to object storage for long periods"""
+
+    def __init__(self, db: AsyncIOMotorDatabase, storage=None):
+        self.db = db
+        self.storage = storage
+
+    def _cursor(self, contractor_id: str, collection: str, date_field: str, fields: List[str],
+                start: date, end: date):
+        query = {"contractor_id": contractor_id, **date_range_filter(date_field, start, end)}
+        if collection == "jobs":
+            query["status"] = JobStatus.COMPLETED.value
+
+        projection = {field: 1 for field in fields}
+        projection["_id"] = 0
+        return (
+            self.db[collection]
+            .find(query, projection)
+            .sort(date_field, 1)
+            .batch_size(EXPORT_BATCH_SIZE)
+        )
+
+    async def iter_export(
+        self,
+        contractor_id: str,
+        start_date: str,
+        end_date: str,
+        export_format: str = "pdf"
+    ) -> AsyncIterator[bytes]:
+        """
+        Generate the export as byte chunks of about EXPORT_CHUNK_BYTES.
+
+        Args:
+            start_date: First day, YYYY-MM-DD
+            end_date: Last day (inclusive), YYYY-MM-DD
+            export_format: "pdf" or "csv"
+        """
+        start, end = parse_tax_period(start_date, end_date)
+        writer = _PdfWriter() if export_format == "pdf" else _CsvWriter()
+        totals = _Totals()
+
+        pending = bytearray(writer.begin(f"Tax export {start_date[:10]} to {end_date[:10]}"))
+        for section, collection, date_field, fields in SECTIONS:
+            pending += writer.section(section)
+            async for doc in self._cursor(contractor_id, collection, date_field, fields, start, end):
+                row = _export_row(section, doc)
+                totals.add(section, row)
+                pending += writer.row(section, row)
+                if len(pending) >= EXPORT_CHUNK_BYTES:
+                    yield bytes(pending)
+                    pending.clear()
+
+        pending += writer.finish(totals.summary(), TAX_DISCLAIMER)
+        yield bytes(pending)
+
+    def should_stream(self, start_date: str, end_date: str) -> bool:
+        """Whether the period is short enough to stream in the response"""
+        start, end = parse_tax_period(start_date, end_date)
+        return self.storage is None or (end - start).days <= TAX_EXPORT_STREAM_MAX_DAYS
+
+    def filename(self, start_date: str, end_date: str, export_format: str) -> str:
+        return f"tax_export_{start_date[:10]}_{end_date[:10]}.{export_format}"
+
+    async def export_to_storage(
+        self,
+        contractor_id: str,
+        start_date: str,
+        end_date: str,
+        export_format: str = "pdf"
+    ) -> Dict[str, Any]:
+        """
+        Write the export to object storage.
+
+        Returns:
+            Dict with a signed download URL and its lifetime
+        """
+        key = (
+            f"contractors/{contractor_id}/exports/"
+            f"{uuid.uuid4()}_{self.filename(start_date, end_date, export_format)}"
+        )
+
+        with tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MEMORY_BYTES) as spool:
+            async for chunk in self.iter_export(contractor_id, start_date, end_date, export_format):
+                spool.write(chunk)
+            size = spool.tell()
+            spool.seek(0)
+            url = await asyncio.to_thread(
+                self.storage.upload_export_file,
+                spool,
+                key,
+                EXPORT_FORMATS[export_format],
+                TAX_EXPORT_URL_EXPIRES_SECONDS,
+            )
+
+        logger.info("Tax export uploaded: contractor=%s key=%s bytes=%d", contractor_id, key, size)
+        return {
+            "url": url,
+            "expires_in": TAX_EXPORT_URL_EXPIRES_SECONDS,
+            "format": export_format,
+            "size_bytes": size,
+        }
@@ -0,0 +1,93 @@
+"""
+Test Script: Concurrent Job Accepts
+
+Fires N simultaneous accepts for one posted job through JobLifecycleService
+and verifies that exactly one succeeds and the rest get a conflict.
+
+Runs against the database in providers.env (MONGO_URL / DB_NAME).
+A throwaway job is inserted and removed again afterwards.
+
+Usage:
+    python backend/test_concurrent_accept.py [N]
+"""
+
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import uuid
+from datetime import datetime
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from models import JobStatus
+from services.job_lifecycle import JobLifecycleService, JobTransitionConflict
+
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), "providers", "providers.env"))
+
+
+async def accept(job_lifecycle: JobLifecycleService, job_id: str, provider_id: str):
+    """Attempt one accept; return provider_id on success, None on conflict."""
+    try:
+        await job_lifecycle.apply_transition(
+            job_id=job_id,
+            new_status=JobStatus.ACCEPTED,
+            actor_id=provider_id,
+            actor_role="handyman",
+            additional_data={"provider_id": provider_id}
+        )
+        return provider_id
+    except JobTransitionConflict:
+        return None
+
+
+async def main(attempts: int):
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+    db = client[os.environ["DB_NAME"]]
+    job_lifecycle = JobLifecycleService(db)
+
+    job_id = f"concurrency-test-{uuid.uuid4()}"
+    await db.jobs.insert_one({
+        "id": job_id,
+        "customer_id": "concurrency-test-customer",
+        "status": JobStatus.POSTED.value,
+        "service_category": "test",
+        "description": "Concurrent accept test job",
+        "created_at": datetime.utcnow().isoformat(),
+        "updated_at": datetime.utcnow().isoformat(),
+    })
+
+    print("\n" + "=" * 60)
+    print(f"CONCURRENT ACCEPT TEST - {attempts} simultaneous accepts")
+    print("=" * 60)
+
+    try:
+        providers = [f"provider-{i}" for i in range(attempts)]
+        results = await asyncio.gather(
+            *(accept(job_lifecycle, job_id, provider_id) for provider_id in providers)
+        )
+
+        winners = [r for r in results if r is not None]
+        job = await db.jobs.find_one({"id": job_id})
+
+        print(f"Succeeded: {len(winners)}")
+        print(f"Conflicts: {len(results) - len(winners)}")
+        print(f"Job status: {job['status']}, assigned to: {job.get('assigned_provider_id')}")
+
+        passed = (
+            len(winners) == 1
+            and job["status"] == JobStatus.ACCEPTED.value
+            and job.get("assigned_provider_id") == winners[0]
+        )
+        print("\n✅ PASS - exactly one accept succeeded" if passed else "\n❌ FAIL")
+        return passed
+    finally:
+        await db.jobs.delete_one({"id": job_id})
+        client.close()
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    ok = asyncio.run(main(n))
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,89 @@
+"""
+Test Script: Event Loop Watchdog
+
+Serves two endpoints from an in-process FastAPI app with a LoopWatchdog
+running: one blocks the loop with a synchronous sleep (like requests.put
+or a SendGrid send called from a handler), one awaits properly. Verifies
+that the stalls are attributed to the blocking endpoint and call site and
+that the well-behaved endpoint causes none.
+
+No database is needed.
+
+Usage:
+    python backend/test_loop_watchdog.py
+"""
+
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import time
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from utils.loop_watchdog import LoopWatchdog
+
+THRESHOLD_MS = 50
+
+
+def blocking_upload():
+    time.sleep(0.2)
+
+
+app = FastAPI()
+
+
+@app.post("/api/photos/{photo_id}")
+async def upload_photo(photo_id: str):
+    blocking_upload()
+    return {"id": photo_id}
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    await asyncio.sleep(0.2)
+    return {"id": job_id}
+
+
+async def main():
+    watchdog = LoopWatchdog(threshold_ms=THRESHOLD_MS)
+    await watchdog.start()
+
+    print("\n" + "=" * 60)
+    print(f"LOOP WATCHDOG TEST - threshold {THRESHOLD_MS}ms")
+    print("=" * 60)
+
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            for i in range(3):
+                await client.get(f"/api/jobs/job-{i}")
+            clean_stalls = watchdog.stalls
+            print(f"Stalls from awaiting endpoint: {clean_stalls}")
+
+            for i in range(3):
+                await client.post(f"/api/photos/photo-{i}")
+                # Let the heartbeat observe each stall separately
+                await asyncio.sleep(THRESHOLD_MS / 1000)
+    finally:
+        await watchdog.stop()
+
+    report = watchdog.get_report()
+    sites = report["routes"].get("POST /api/photos/{photo_id}", [])
+    for site in sites:
+        print(f"POST /api/photos/{{photo_id}}: {site['call_site']} -> {site['blocked_in']} "
+              f"({site['count']} stalls, max {site['max_ms']}ms)")
+
+    passed = (
+        clean_stalls == 0
+        and report["stalls"] == 3
+        and bool(sites)
+        and "blocking_upload" in sites[0]["call_site"]
+    )
+    print("\n✅ PASS - blocking call site reported for its endpoint" if passed else "\n❌ FAIL")
+    return passed
+
+
+if __name__ == "__main__":
+    ok = asyncio.run(main())
+    sys.exit(0 if ok else 1)
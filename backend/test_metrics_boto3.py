@@ -0,0 +1,105 @@
+"""
+Test Script: boto3 Call Metrics
+
+Instruments an S3 client with instrument_boto3_client and makes three
+calls: one answered with 200, one with an S3 404 (both served by a
+before-send hook in place of the network), and one against an endpoint
+nothing listens on. Verifies that each call is timed under its operation
+and outcome, and that the failing calls still raise the original
+botocore exception.
+
+No object storage or network access is needed.
+
+Usage:
+    python backend/test_metrics_boto3.py
+"""
+
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError, EndpointConnectionError
+from botocore.awsrequest import AWSResponse
+
+from utils.metrics import instrument_boto3_client, provider_call_duration_seconds
+
+UNREACHABLE_ENDPOINT = "http://127.0.0.1:9"
+
+
+def make_client(endpoint_url=None):
+    client = boto3.client(
+        "s3",
+        region_name="us-east-1",
+        endpoint_url=endpoint_url,
+        aws_access_key_id="test",
+        aws_secret_access_key="test",
+        config=Config(connect_timeout=1, retries={"max_attempts": 0}),
+    )
+    instrument_boto3_client(client)
+    return client
+
+
+class FakeRaw:
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def stream(self, **kwargs):
+        yield self.body
+
+
+def fake_send(request, **kwargs):
+    """Answer S3 requests locally: 404 for HeadBucket, an empty bucket list otherwise"""
+    if request.method == "HEAD":
+        return AWSResponse(request.url, 404, {}, FakeRaw(b""))
+    body = b'<?xml version="1.0" encoding="UTF-8"?><ListAllMyBucketsResult><Buckets></Buckets></ListAllMyBucketsResult>'
+    return AWSResponse(request.url, 200, {"Content-Type": "application/xml"}, FakeRaw(body))
+
+
+def observed(operation: str, outcome: str) -> int:
+    series = provider_call_duration_seconds._series.get(("s3", operation, outcome))
+    return int(sum(series[:-1])) if series else 0
+
+
+def main():
+    print("\n" + "=" * 60)
+    print("BOTO3 CALL METRICS TEST")
+    print("=" * 60)
+
+    results = []
+
+    client = make_client()
+    client.meta.events.register("before-send.s3", fake_send)
+
+    client.list_buckets()
+    results.append(("successful call timed as ok", observed("ListBuckets", "ok") == 1))
+
+    try:
+        client.head_bucket(Bucket="missing")
+        raised = None
+    except Exception as e:
+        raised = e
+    results.append(("error response raises ClientError", isinstance(raised, ClientError)))
+    results.append(("error response timed as error", observed("HeadBucket", "error") == 1))
+
+    unreachable = make_client(UNREACHABLE_ENDPOINT)
+    try:
+        unreachable.head_bucket(Bucket="photos")
+        raised = None
+    except Exception as e:
+        raised = e
+    print(f"Unreachable endpoint raised: {type(raised).__name__}: {raised}")
+    results.append(("transport failure raises the botocore exception", isinstance(raised, EndpointConnectionError)))
+    results.append(("transport failure timed as error", observed("HeadBucket", "error") == 2))
+
+    for name, ok in results:
+        print(f"{'✅' if ok else '❌'} {name}")
+
+    passed = all(ok for _, ok in results)
+    print("\n✅ PASS" if passed else "\n❌ FAIL")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,97 @@
+"""
+Test Script: Payout Worker
+
+Queues N payouts and runs two PayoutWorkers against MockPaymentProvider at
+the same time. Verifies that every payout is paid exactly once, that the
+wallet balance matches, and reports throughput.
+
+Runs against the database in providers.env (MONGO_URL / DB_NAME).
+Throwaway payouts and the test wallet are removed again afterwards.
+
+Usage:
+    python backend/test_payout_worker.py [N]
+"""
+
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import time
+import uuid
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+# The worker only pays out through the mock provider in dev/test
+os.environ.setdefault("APP_ENV", "test")
+
+from models import Payout, PayoutStatus
+from providers.mock_providers import MockPaymentProvider
+from services.payout_service import PayoutService
+from services.payout_worker import PayoutWorker
+
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), "providers", "providers.env"))
+
+
+async def main(count: int):
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+    db = client[os.environ["DB_NAME"]]
+    payout_service = PayoutService(db)
+
+    contractor_id = f"payout-worker-test-{uuid.uuid4()}"
+    payouts = [
+        Payout(
+            job_id=f"{contractor_id}-job-{i}",
+            contractor_id=contractor_id,
+            amount_gross=100.0,
+            platform_fee_amount=15.0,
+            amount_net=85.0,
+            status=PayoutStatus.QUEUED_FOR_TRANSFER
+        )
+        for i in range(count)
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"PAYOUT WORKER TEST - {count} queued payouts, 2 workers")
+    print("=" * 60)
+
+    try:
+        for payout in payouts:
+            await payout_service.record_payout_created(payout)
+
+        provider = MockPaymentProvider()
+        workers = [
+            PayoutWorker(db, provider, payout_service, batch_size=25, concurrency=20, rate_per_second=200)
+            for _ in range(2)
+        ]
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker.run_once() for worker in workers))
+        elapsed = time.monotonic() - started
+
+        paid = await db.payouts.count_documents({"contractor_id": contractor_id, "status": PayoutStatus.PAID.value})
+        claimed = sum(worker.metrics["claimed"] for worker in workers)
+        wallet = await payout_service.get_wallet_summary(contractor_id)
+
+        print(f"Paid: {paid}/{count}, claimed across workers: {claimed}")
+        print(f"Elapsed: {elapsed:.2f}s ({count / elapsed:.0f} payouts/s)")
+        print(f"Wallet lifetime: {wallet.lifetime_earnings}, available: {wallet.available}")
+
+        passed = (
+            paid == count
+            and claimed == count
+            and wallet.lifetime_earnings == round(85.0 * count, 2)
+            and wallet.available == 0
+        )
+        print("\n✅ PASS - every payout paid exactly once" if passed else "\n❌ FAIL")
+        return passed
+    finally:
+        await db.payouts.delete_many({"contractor_id": contractor_id})
+        await db.wallet_balances.delete_one({"contractor_id": contractor_id})
+        client.close()
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    ok = asyncio.run(main(n))
+    sys.exit(0 if ok else 1)
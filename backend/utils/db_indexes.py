@@ -0,0 +1,309 @@
+"""
+Index manager.
+
+Declares the MongoDB indexes the API relies on, next to the queries they
+serve, and applies them idempotently at startup. Indexes are created one
+at a time, so one conflicting index (e.g. a unique index over existing
+duplicates) is logged without blocking the rest.
+
+AUDITED_QUERIES registers the shapes of the hot queries (filter + sort).
+The audit explains each one and flags any whose winning plan is a
+COLLSCAN, so a new query or a dropped index shows up before it reaches
+production:
+
+    cd backend
+    python -m utils.db_indexes apply
+    python -m utils.db_indexes audit
+"""
+
+import sys
+import os
+import json
+import asyncio
+import logging
+from typing import Dict, List, Any
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+
+# Indexes per collection. Compound keys follow equality -> sort -> range.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("id", ASCENDING)], unique=True),
+        # Contractor routing: role + active + skill match
+        IndexModel([("role", ASCENDING), ("is_active", ASCENDING), ("skills", ASCENDING)]),
+    ],
+    "quotes": [
+        IndexModel([("id", ASCENDING)]),
+        IndexModel([("customer_id", ASCENDING)]),
+        IndexModel([("status", ASCENDING)]),
+    ],
+    "services": [
+        IndexModel([("category", ASCENDING)]),
+    ],
+    "jobs": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        # Feeds and admin list: status, newest first
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("status", ASCENDING), ("service_category", ASCENDING)]),
+        IndexModel([("address.zip", ASCENDING)]),
+        # Contractor dashboard, completed jobs, tax report
+        IndexModel([("contractor_id", ASCENDING), ("status", ASCENDING), ("completed_at", DESCENDING)]),
+        # Accepted/scheduled jobs, routing capacity check
+        IndexModel([("contractor_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)]),
+        # Monthly/yearly reports
+        IndexModel([("contractor_id", ASCENDING), ("created_at", ASCENDING)]),
+        IndexModel([("assigned_contractor_id", ASCENDING), ("status", ASCENDING)]),
+        IndexModel([("customer_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "proposals": [
+        IndexModel([("job_id", ASCENDING), ("status", ASCENDING)]),
+        IndexModel([("contractor_id", ASCENDING)]),
+        IndexModel([("id", ASCENDING)]),
+    ],
+    "payouts": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("contractor_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("status", ASCENDING), ("updated_at", ASCENDING)]),
+        IndexModel([("job_id", ASCENDING)]),
+        IndexModel([("lease_token", ASCENDING)], sparse=True),
+    ],
+    "wallet_balances": [
+        IndexModel([("contractor_id", ASCENDING)], unique=True),
+    ],
+    "growth_events": [
+        # Job outbox retries and backfills rely on this to record an event once
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("type", ASCENDING)]),
+    ],
+    "growth_summary": [
+        IndexModel([("user_id", ASCENDING)], unique=True),
+    ],
+    "addresses": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING), ("is_default", ASCENDING)]),
+        # At most one default address per user (AddressRepository switches
+        # defaults in one ordered bulk_write: clear, then set)
+        IndexModel(
+            [("user_id", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"is_default": True},
+            name="user_id_default_unique"
+        ),
+    ],
+    "job_outbox": [
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)]),
+    ],
+    "expenses": [
+        IndexModel([("id", ASCENDING)]),
+        IndexModel([("contractor_id", ASCENDING), ("date", DESCENDING)]),
+    ],
+    "mileage": [
+        IndexModel([("contractor_id", ASCENDING), ("date", DESCENDING)]),
+    ],
+    "mileage_logs": [
+        IndexModel([("id", ASCENDING)]),
+        IndexModel([("contractor_id", ASCENDING), ("date", DESCENDING)]),
+    ],
+    "time_logs": [
+        IndexModel([("id", ASCENDING)]),
+        IndexModel([("contractor_id", ASCENDING), ("job_id", ASCENDING), ("start_time", DESCENDING)]),
+        IndexModel([("contractor_id", ASCENDING), ("start_time", ASCENDING)]),
+    ],
+    "job_photos": [
+        IndexModel([("id", ASCENDING)]),
+        IndexModel([("job_id", ASCENDING), ("contractor_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "change_orders": [
+        IndexModel([("id", ASCENDING)]),
+        IndexModel([("job_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("status", ASCENDING)]),
+    ],
+    "warranty_requests": [
+        IndexModel([("job_id", ASCENDING)]),
+        IndexModel([("status", ASCENDING)]),
+    ],
+    # Geocoding cache by normalized address; entries expire at expires_at
+    "geocode_cache": [
+        IndexModel([("key", ASCENDING)], unique=True),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ],
+    "service_area_polygons": [
+        IndexModel([("market", ASCENDING)], unique=True),
+    ],
+    # Daily analytics rollups: series queries match metric + dimension, range on day
+    "analytics_rollups": [
+        IndexModel([("metric", ASCENDING), ("dimension", ASCENDING), ("day", ASCENDING), ("key", ASCENDING)], unique=True),
+    ],
+}
+
+# Indexes created by earlier versions that must not exist. The 2dsphere
+# index on two numeric fields can't index job documents (geo keys need a
+# GeoJSON point or coordinate pair), so inserts would fail if it were built.
+OBSOLETE_INDEXES: Dict[str, List[str]] = {
+    "jobs": ["address.lat_2dsphere_address.lon_2dsphere"],
+}
+
+# Hot query shapes, audited with explain(). Values are placeholders;
+# only the fields and operators matter for plan selection.
+AUDITED_QUERIES: List[Dict[str, Any]] = [
+    {"name": "get_job", "collection": "jobs", "filter": {"id": "x"}},
+    {"name": "contractor_dashboard_completed", "collection": "jobs",
+     "filter": {"contractor_id": "x", "status": "completed", "completed_at": {"$gte": "2024-01-01"}}},
+    {"name": "contractor_dashboard_accepted", "collection": "jobs",
+     "filter": {"contractor_id": "x", "status": {"$in": ["posted", "accepted"]}}},
+    {"name": "get_accepted_contractor_jobs", "collection": "jobs",
+     "filter": {"contractor_id": "x", "status": {"$in": ["accepted", "quoted"]}}, "sort": {"created_at": -1}},
+    {"name": "get_scheduled_contractor_jobs", "collection": "jobs",
+     "filter": {"contractor_id": "x", "status": "scheduled"}, "sort": {"scheduled_date": 1}},
+    {"name": "get_completed_contractor_jobs", "collection": "jobs",
+     "filter": {"contractor_id": "x", "status": "completed"}, "sort": {"completed_at": -1}},
+    {"name": "contractor_reports_monthly", "collection": "jobs",
+     "filter": {"contractor_id": "x", "created_at": {"$gte": "2024-01-01", "$lt": "2024-02-01"}}},
+    {"name": "routing_has_capacity", "collection": "jobs",
+     "filter": {"contractor_id": "x", "status": {"$in": ["posted", "accepted", "in_progress"]}}},
+    {"name": "job_feed", "collection": "jobs",
+     "filter": {"status": "posted", "service_category": {"$in": ["plumbing"]}}},
+    {"name": "admin_list_all_jobs", "collection": "jobs",
+     "filter": {"status": "posted"}, "sort": {"created_at": -1}},
+    {"name": "customer_jobs", "collection": "jobs",
+     "filter": {"customer_id": "x"}, "sort": {"created_at": -1}},
+    {"name": "routing_find_contractors", "collection": "users",
+     "filter": {"role": "contractor", "is_active": True, "skills": {"$in": ["plumbing"]}}},
+    {"name": "get_user", "collection": "users", "filter": {"id": "x"}},
+    {"name": "default_addresses", "collection": "addresses",
+     "filter": {"user_id": {"$in": ["x"]}, "is_default": True}},
+    {"name": "get_proposals_for_job", "collection": "proposals",
+     "filter": {"job_id": "x", "status": {"$in": ["pending"]}}},
+    {"name": "get_payouts", "collection": "payouts",
+     "filter": {"contractor_id": "x"}, "sort": {"created_at": -1}},
+    {"name": "payout_worker_claim", "collection": "payouts",
+     "filter": {"status": "queued_for_transfer"}, "sort": {"updated_at": 1}},
+    {"name": "growth_events", "collection": "growth_events",
+     "filter": {"user_id": "x"}, "sort": {"created_at": -1}},
+    {"name": "get_contractor_expenses", "collection": "expenses",
+     "filter": {"contractor_id": "x"}, "sort": {"date": -1}},
+    {"name": "dashboard_mileage", "collection": "mileage",
+     "filter": {"contractor_id": "x", "date": {"$gte": "2024-01-01"}}},
+    {"name": "get_mileage_logs", "collection": "mileage_logs",
+     "filter": {"contractor_id": "x", "date": {"$gte": "2024-01-01", "$lte": "2024-02-01"}}, "sort": {"date": -1}},
+    {"name": "active_time_log", "collection": "time_logs",
+     "filter": {"contractor_id": "x", "job_id": "x", "end_time": None}},
+    {"name": "time_logs_for_job", "collection": "time_logs",
+     "filter": {"contractor_id": "x", "job_id": "x"}, "sort": {"start_time": -1}},
+    {"name": "job_photos", "collection": "job_photos",
+     "filter": {"job_id": "x", "contractor_id": "x"}, "sort": {"created_at": -1}},
+    {"name": "change_orders_for_job", "collection": "change_orders",
+     "filter": {"job_id": "x"}, "sort": {"created_at": -1}},
+    {"name": "warranty_for_job", "collection": "warranty_requests", "filter": {"job_id": "x"}},
+]
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> Dict[str, int]:
+    """
+    Create all declared indexes and drop obsolete ones.
+
+    Safe to run on every startup: existing identical indexes are no-ops.
+
+    Returns:
+        Dict with created (or already present) and failed counts
+    """
+    counts = {"ensured": 0, "failed": 0}
+
+    for collection, names in OBSOLETE_INDEXES.items():
+        existing = await db[collection].index_information()
+        for name in names:
+            if name in existing:
+                await db[collection].drop_index(name)
+                logger.info(f"Dropped obsolete index {collection}.{name}")
+
+    for collection, models in INDEXES.items():
+        for model in models:
+            try:
+                await db[collection].create_indexes([model])
+                counts["ensured"] += 1
+            except OperationFailure as e:
+                counts["failed"] += 1
+                logger.error(f"Could not create index {collection}.{model.document['name']}: {e}")
+
+    logger.info(f"Database indexes ensured: {counts['ensured']} ok, {counts['failed']} failed")
+    return counts
+
+
+async def explain_query(db: AsyncIOMotorDatabase, query: Dict[str, Any]) -> Dict[str, Any]:
+    """Explain one registered query and summarize its winning plan"""
+    command = {"find": query["collection"], "filter": query["filter"]}
+    if query.get("sort"):
+        command["sort"] = query["sort"]
+
+    result = await db.command({"explain": command, "verbosity": "queryPlanner"})
+    winning_plan = result.get("queryPlanner", {}).get("winningPlan", {})
+    plan_text = json.dumps(winning_plan, default=str)
+
+    return {
+        "name": query["name"],
+        "collection": query["collection"],
+        "collscan": "COLLSCAN" in plan_text,
+        "in_memory_sort": '"SORT"' in plan_text,
+        "indexes": sorted(set(_index_names(winning_plan))),
+    }
+
+
+def _index_names(plan: Any) -> List[str]:
+    """Collect index names used anywhere in a plan tree"""
+    names = []
+    if isinstance(plan, dict):
+        if plan.get("indexName"):
+            names.append(plan["indexName"])
+        for value in plan.values():
+            names.extend(_index_names(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            names.extend(_index_names(item))
+    return names
+
+
+async def audit_queries(db: AsyncIOMotorDatabase) -> List[Dict[str, Any]]:
+    """Explain every registered query; entries with collscan=True need an index"""
+    return [await explain_query(db, query) for query in AUDITED_QUERIES]
+
+
+async def _main(command: str) -> int:
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "providers", "providers.env"))
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+    db = client[os.environ["DB_NAME"]]
+
+    try:
+        if command == "apply":
+            counts = await ensure_indexes(db)
+            print(f"Indexes ensured: {counts['ensured']}, failed: {counts['failed']}")
+            return 1 if counts["failed"] else 0
+
+        results = await audit_queries(db)
+        for result in results:
+            status = "COLLSCAN" if result["collscan"] else "ok"
+            sort_note = " (in-memory sort)" if result["in_memory_sort"] else ""
+            print(f"{status:>8}  {result['collection']:<18} {result['name']:<34} "
+                  f"{', '.join(result['indexes']) or '-'}{sort_note}")
+
+        collscans = [result for result in results if result["collscan"]]
+        print(f"\n{len(results)} queries audited, {len(collscans)} collection scans")
+        return 1 if collscans else 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) != 2 or sys.argv[1] not in ("apply", "audit"):
+        print("Usage: python -m utils.db_indexes [apply|audit]")
+        sys.exit(2)
+    sys.exit(asyncio.run(_main(sys.argv[1])))
@@ -0,0 +1,218 @@
+"""
+MongoDB request profiler.
+
+DbProfiler is a PyMongo command listener. Motor runs every command on its
+executor with a copy of the caller's context, so a contextvar set by
+DbProfilerMiddleware ties each command to the HTTP request that issued it.
+
+Per request it records round trips, total DB time, documents returned and
+the slowest command. Requests over DB_ROUND_TRIP_BUDGET round trips or
+DB_TIME_BUDGET_MS of DB time are logged. With DB_PROFILER_HEADERS enabled
+the numbers are also returned as X-DB-* response headers.
+
+Totals are aggregated per route and rendered in Prometheus text format.
+"""
+
+import os
+import time
+import logging
+import threading
+from contextvars import ContextVar
+from typing import Optional, Dict, Tuple
+from pymongo import monitoring
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+DB_PROFILER_ENABLED = os.getenv("DB_PROFILER_ENABLED", "true").lower() == "true"
+DB_PROFILER_HEADERS = os.getenv("DB_PROFILER_HEADERS", "false").lower() == "true"
+DB_ROUND_TRIP_BUDGET = int(os.getenv("DB_ROUND_TRIP_BUDGET", "25"))
+DB_TIME_BUDGET_MS = float(os.getenv("DB_TIME_BUDGET_MS", "250"))
+
+# Commands whose first field is not a collection name
+_NON_COLLECTION_COMMANDS = {"getMore", "killCursors", "endSessions", "hello", "isMaster", "ping", "buildInfo"}
+
+
+class RequestDbStats:
+    """DB usage of one request; updated from Motor's executor threads"""
+
+    __slots__ = ("round_trips", "db_seconds", "documents", "slowest", "_lock")
+
+    def __init__(self):
+        self.round_trips = 0
+        self.db_seconds = 0.0
+        self.documents = 0
+        self.slowest: Optional[Tuple[str, str, float]] = None
+        self._lock = threading.Lock()
+
+    def record(self, command: str, collection: str, seconds: float, documents: int):
+        with self._lock:
+            self.round_trips += 1
+            self.db_seconds += seconds
+            self.documents += documents
+            if self.slowest is None or seconds > self.slowest[2]:
+                self.slowest = (command, collection, seconds)
+
+    def describe_slowest(self) -> str:
+        if not self.slowest:
+            return "-"
+        command, collection, seconds = self.slowest
+        return f"{command} {collection} {seconds * 1000:.1f}ms"
+
+
+_current_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("db_request_stats", default=None)
+
+
+def current_db_stats() -> Optional[RequestDbStats]:
+    """Stats of the request being served, if any"""
+    return _current_stats.get()
+
+
+def _documents_returned(command: str, reply: dict) -> int:
+    """Documents in a command reply (cursor batch, write count or findAndModify value)"""
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    if command == "findAndModify":
+        return 1 if reply.get("value") else 0
+    n = reply.get("n")
+    return n if isinstance(n, int) else 0
+
+
+class DbProfiler(monitoring.CommandListener):
+    """Attributes MongoDB commands to requests and aggregates them per route"""
+
+    def __init__(
+        self,
+        enabled: bool = DB_PROFILER_ENABLED,
+        debug_headers: bool = DB_PROFILER_HEADERS,
+        round_trip_budget: int = DB_ROUND_TRIP_BUDGET,
+        time_budget_ms: float = DB_TIME_BUDGET_MS
+    ):
+        self.enabled = enabled
+        self.debug_headers = debug_headers
+        self.round_trip_budget = round_trip_budget
+        self.time_budget_ms = time_budget_ms
+
+        # (connection_id, request_id) -> collection, for commands in flight
+        self._in_flight: Dict[Tuple, str] = {}
+
+        # (method, route) -> aggregated counters
+        self.routes: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    # ----- PyMongo command listener -----
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        if _current_stats.get() is None:
+            return
+        if event.command_name == "getMore":
+            collection = event.command.get("collection", "")
+        elif event.command_name in _NON_COLLECTION_COMMANDS:
+            collection = ""
+        else:
+            collection = event.command.get(event.command_name, "")
+        self._in_flight[(event.connection_id, event.request_id)] = str(collection)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finish(event, _documents_returned(event.command_name, event.reply))
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finish(event, 0)
+
+    def _finish(self, event, documents: int):
+        collection = self._in_flight.pop((event.connection_id, event.request_id), None)
+        stats = _current_stats.get()
+        if stats is None or collection is None:
+            return
+        stats.record(event.command_name, collection, event.duration_micros / 1_000_000, documents)
+
+    # ----- Request lifecycle -----
+
+    def begin_request(self):
+        """Start collecting for the current request; returns a token for end_request"""
+        return _current_stats.set(RequestDbStats())
+
+    def end_request(self, token, method: str, route: str, elapsed_seconds: float) -> RequestDbStats:
+        """Stop collecting, aggregate per route and log budget overruns"""
+        stats = _current_stats.get()
+        _current_stats.reset(token)
+
+        db_ms = stats.db_seconds * 1000
+        over_budget = stats.round_trips > self.round_trip_budget or db_ms > self.time_budget_ms
+
+        totals = self.routes.setdefault((method, route), {
+            "requests": 0,
+            "round_trips": 0,
+            "db_seconds": 0.0,
+            "documents": 0,
+            "over_budget": 0,
+            "max_round_trips": 0,
+        })
+        totals["requests"] += 1
+        totals["round_trips"] += stats.round_trips
+        totals["db_seconds"] += stats.db_seconds
+        totals["documents"] += stats.documents
+        totals["max_round_trips"] = max(totals["max_round_trips"], stats.round_trips)
+
+        if over_budget:
+            totals["over_budget"] += 1
+            logger.warning(
+                f"DB budget exceeded: {method} {route} made {stats.round_trips} round trips, "
+                f"{db_ms:.1f}ms DB time, {stats.documents} documents in {elapsed_seconds * 1000:.0f}ms "
+                f"(slowest: {stats.describe_slowest()})"
+            )
+
+        return stats
+
+    def render_prometheus(self) -> str:
+        """Per-route totals in Prometheus text exposition format"""
+        metrics = [
+            ("db_requests_total", "requests", "Requests served"),
+            ("db_round_trips_total", "round_trips", "MongoDB commands issued while serving requests"),
+            ("db_seconds_total", "db_seconds", "Time spent in MongoDB commands"),
+            ("db_documents_returned_total", "documents", "Documents returned or written by MongoDB commands"),
+            ("db_budget_exceeded_total", "over_budget", "Requests over the round-trip or DB time budget"),
+            ("db_max_round_trips", "max_round_trips", "Most round trips made by a single request"),
+        ]
+
+        lines = []
+        for name, key, help_text in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {'gauge' if name == 'db_max_round_trips' else 'counter'}")
+            for (method, route), totals in sorted(self.routes.items()):
+                lines.append(f'{name}{{method="{method}",route="{route}"}} {round(totals[key], 6)}')
+        return "\n".join(lines) + "\n"
+
+
+class DbProfilerMiddleware:
+    """ASGI middleware that scopes DB profiling to each HTTP request"""
+
+    def __init__(self, app, profiler: DbProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        token = self.profiler.begin_request()
+        stats = current_db_stats()
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and self.profiler.debug_headers:
+                headers = MutableHeaders(scope=message)
+                headers.append("X-DB-Round-Trips", str(stats.round_trips))
+                headers.append("X-DB-Time-Ms", f"{stats.db_seconds * 1000:.1f}")
+                headers.append("X-DB-Documents", str(stats.documents))
+                headers.append("X-DB-Slowest", stats.describe_slowest())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            # The router stores the matched route in the scope; fall back to a
+            # fixed label so unknown paths don't create new metric series
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            self.profiler.end_request(token, scope["method"], route, time.perf_counter() - started)
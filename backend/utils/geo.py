@@ -0,0 +1,70 @@
+"""
+Geographic helpers.
+
+haversine_miles is a fast great-circle approximation (within ~0.5% of
+geopy's geodesic). Use it on hot paths that check many points against a
+radius; keep geodesic where exact distances are reported.
+
+haversine_array is the same kernel over numpy arrays (broadcasting), for
+batch jobs that compare thousands of point pairs at once.
+"""
+
+import math
+from typing import Tuple
+
+import numpy as np
+
+EARTH_RADIUS_MILES = 3958.8
+EARTH_RADIUS_METERS = 6371008.8
+
+METERS_PER_MILE = 1609.344
+
+# Miles per degree of latitude
+MILES_PER_DEGREE_LAT = 69.0
+
+
+def haversine_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in miles between two points"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in meters between two points"""
+    return haversine_miles(lat1, lon1, lat2, lon2) * METERS_PER_MILE
+
+
+def haversine_array(lat1, lon1, lat2, lon2, radius: float = EARTH_RADIUS_MILES) -> np.ndarray:
+    """
+    Vectorized great-circle distance.
+
+    Args:
+        lat1, lon1, lat2, lon2: degrees; scalars or arrays that broadcast
+        radius: Earth radius in the unit wanted (miles by default)
+
+    Returns:
+        Array of distances in the unit of radius
+    """
+    phi1 = np.radians(np.asarray(lat1, dtype=np.float64))
+    phi2 = np.radians(np.asarray(lat2, dtype=np.float64))
+    d_lambda = np.radians(np.asarray(lon2, dtype=np.float64) - np.asarray(lon1, dtype=np.float64))
+
+    a = np.sin((phi2 - phi1) / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+    return 2 * radius * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def bounding_box(lat: float, lon: float, radius_miles: float) -> Tuple[float, float, float, float]:
+    """
+    Bounding box around a point.
+
+    Returns:
+        (min_lat, max_lat, min_lon, max_lon)
+    """
+    lat_margin = radius_miles / MILES_PER_DEGREE_LAT
+    lon_margin = lat_margin / max(math.cos(math.radians(lat)), 0.01)
+    return (lat - lat_margin, lat + lat_margin, lon - lon_margin, lon + lon_margin)
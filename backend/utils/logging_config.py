@@ -0,0 +1,132 @@
+"""
+Logging setup.
+
+configure_logging() replaces basicConfig with:
+
+- a queue handler: request code only enqueues the record; formatting
+  and writing happen on a QueueListener thread. Records are enqueued
+  unformatted, so %-style arguments are only rendered there (and never
+  for records that are filtered out)
+- LOG_FORMAT=json for one JSON object per line (fields passed through
+  `extra=` are included), or text (the previous format, the default)
+- LOG_LEVEL for the root level and LOG_LEVELS for per-module levels,
+  e.g. "server.available_jobs=DEBUG,providers.openai_provider=WARNING"
+- LOG_SAMPLING for per-item lines, e.g. "server.available_jobs=0.01"
+  keeps 1% of that logger's records below WARNING
+
+Hot paths should log with %-style arguments (logger.debug("job %s", id))
+rather than f-strings, so nothing is formatted unless the record is kept.
+Arguments are rendered later on the listener thread, so pass values, not
+objects that are mutated right after the call.
+"""
+
+import os
+import sys
+import json
+import queue
+import random
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including `extra` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of records below WARNING; warnings and errors always pass"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues records as they are.
+
+    The stock QueueHandler formats the message on the calling thread;
+    here formatting is left to the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _parse_mapping(value: str) -> Dict[str, str]:
+    """Parse "name=value,name=value" settings"""
+    mapping = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, setting = item.partition("=")
+        mapping[name.strip()] = setting.strip()
+    return mapping
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    log_format: Optional[str] = None,
+    levels: Optional[str] = None,
+    sampling: Optional[str] = None,
+    use_queue: Optional[bool] = None,
+    stream=None
+) -> Optional[logging.handlers.QueueListener]:
+    """
+    Configure the root logger from arguments or LOG_* environment variables.
+
+    Returns:
+        The QueueListener writing records (stop it on shutdown to flush),
+        or None when the queue is disabled
+    """
+    level = level or os.getenv("LOG_LEVEL", "INFO")
+    log_format = log_format or os.getenv("LOG_FORMAT", "text")
+    levels = levels if levels is not None else os.getenv("LOG_LEVELS", "")
+    sampling = sampling if sampling is not None else os.getenv("LOG_SAMPLING", "")
+    if use_queue is None:
+        use_queue = os.getenv("LOG_QUEUE", "true").lower() == "true"
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(level.upper())
+
+    for name, module_level in _parse_mapping(levels).items():
+        logging.getLogger(name).setLevel(module_level.upper())
+    for name, rate in _parse_mapping(sampling).items():
+        logging.getLogger(name).addFilter(SamplingFilter(float(rate)))
+
+    if not use_queue:
+        root.addHandler(output)
+        return None
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(DeferredQueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+    return listener
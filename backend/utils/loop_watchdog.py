@@ -0,0 +1,214 @@
+"""
+Event loop blocking detector.
+
+A heartbeat coroutine stamps the time every LOOP_BLOCK_THRESHOLD_MS / 2.
+A watchdog thread checks the stamp; when the loop has not run for longer
+than the threshold, it samples the loop thread's stack. The sample
+identifies:
+
+- route: the endpoint being served, read from the ASGI scope of a frame
+  on the blocked stack
+- call_site: the innermost frame in our own code (e.g.
+  providers/linode_storage_provider.py:98 in _upload_via_presigned_url)
+- blocked_in: the innermost frame overall (the library call that blocked)
+
+When the loop resumes, the heartbeat measures how long it was stalled and
+the sample is aggregated per (route, call_site). get_report() returns the
+top blocking call sites per endpoint; each site is logged with its stack
+at most once per LOOP_WATCHDOG_LOG_INTERVAL_SECONDS.
+
+Tests can run a LoopWatchdog around async code and assert stalls == 0.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from typing import Optional, Dict, Tuple, Any, List
+
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+LOOP_WATCHDOG_ENABLED = os.getenv("LOOP_WATCHDOG_ENABLED", "true").lower() == "true"
+LOOP_BLOCK_THRESHOLD_MS = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100"))
+LOOP_WATCHDOG_LOG_INTERVAL_SECONDS = float(os.getenv("LOOP_WATCHDOG_LOG_INTERVAL_SECONDS", "60"))
+
+# Frames under this directory (outside site-packages) count as our code
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Stack lines kept per call site
+MAX_STACK_LINES = 20
+
+event_loop_stalls_total = registry.counter(
+    "event_loop_stalls_total", "Event loop stalls over the blocking threshold", ("route",))
+event_loop_stall_seconds_total = registry.counter(
+    "event_loop_stall_seconds_total", "Time the event loop spent blocked", ("route",))
+
+
+_THIS_FILE = os.path.abspath(__file__)
+
+
+def _is_app_frame(filename: str) -> bool:
+    filename = os.path.abspath(filename)
+    return filename.startswith(BACKEND_DIR) and "site-packages" not in filename and filename != _THIS_FILE
+
+
+def _describe(frame: traceback.FrameSummary, relative: bool = False) -> str:
+    filename = os.path.relpath(os.path.abspath(frame.filename), BACKEND_DIR) if relative else os.path.basename(frame.filename)
+    return f"{filename}:{frame.lineno} in {frame.name}"
+
+
+def _route_from_stack(frame) -> str:
+    """Route of the request whose code is on the stack, from an ASGI scope local"""
+    while frame is not None:
+        if "scope" in frame.f_code.co_varnames:
+            scope = frame.f_locals.get("scope")
+            if isinstance(scope, dict) and scope.get("type") == "http":
+                route = getattr(scope.get("route"), "path", None)
+                return f"{scope.get('method')} {route or scope.get('path')}"
+        frame = frame.f_back
+    return "background"
+
+
+class LoopWatchdog:
+    """Detects event loop stalls and attributes them to endpoints and call sites"""
+
+    def __init__(self, threshold_ms: float = LOOP_BLOCK_THRESHOLD_MS):
+        self.threshold = threshold_ms / 1000
+        self.stalls = 0
+        self.stall_seconds = 0.0
+
+        # (route, call_site) -> aggregated stalls
+        self.sites: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+        self._beat = time.monotonic()
+        self._pending_sample: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    async def start(self):
+        """Start the heartbeat on the running loop and the watchdog thread"""
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    async def _heartbeat(self):
+        interval = self.threshold / 2
+        while True:
+            self._beat = time.monotonic()
+            await asyncio.sleep(interval)
+            stalled = time.monotonic() - self._beat - interval
+            if stalled >= self.threshold:
+                self._record_stall(stalled)
+
+    def _watch(self):
+        """Watchdog thread: sample the loop's stack once per stall"""
+        deadline = self.threshold / 2 + self.threshold
+        while not self._stop.wait(self.threshold / 4):
+            if time.monotonic() - self._beat > deadline and self._pending_sample is None:
+                try:
+                    sample = self._sample()
+                except Exception as e:
+                    logger.error(f"Loop watchdog sampling failed: {e}")
+                    continue
+                with self._lock:
+                    self._pending_sample = sample
+
+    def _sample(self) -> Optional[Dict[str, Any]]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+
+        stack = traceback.extract_stack(frame)
+        app_frames = [entry for entry in stack if _is_app_frame(entry.filename)]
+        return {
+            "route": _route_from_stack(frame),
+            "call_site": _describe(app_frames[-1], relative=True) if app_frames else "unknown",
+            "blocked_in": _describe(stack[-1]) if stack else "unknown",
+            "stack": "".join(traceback.format_list(stack[-MAX_STACK_LINES:])),
+        }
+
+    def _record_stall(self, seconds: float):
+        """Aggregate a finished stall with the stack sampled during it"""
+        with self._lock:
+            sample = self._pending_sample or {}
+            self._pending_sample = None
+
+        # No sample: the stall ended before the watchdog thread got the GIL
+        route = sample.get("route", "unknown")
+        call_site = sample.get("call_site", "unknown")
+
+        self.stalls += 1
+        self.stall_seconds += seconds
+        event_loop_stalls_total.inc(route)
+        event_loop_stall_seconds_total.inc(route, amount=seconds)
+
+        site = self.sites.setdefault((route, call_site), {
+            "count": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0,
+            "blocked_in": None,
+            "stack": None,
+            "last_logged": None,
+        })
+        site["count"] += 1
+        site["total_seconds"] += seconds
+        site["max_seconds"] = max(site["max_seconds"], seconds)
+        if sample:
+            site["blocked_in"] = sample["blocked_in"]
+            site["stack"] = sample["stack"]
+
+        now = time.monotonic()
+        if site["last_logged"] is None or now - site["last_logged"] >= LOOP_WATCHDOG_LOG_INTERVAL_SECONDS:
+            site["last_logged"] = now
+            logger.warning(
+                f"Event loop blocked for {seconds * 1000:.0f}ms in {route} at {call_site} "
+                f"(blocked in {site['blocked_in']}, {site['count']} stalls so far)\n{site['stack'] or ''}"
+            )
+
+    def get_report(self, top: int = 10) -> Dict[str, Any]:
+        """
+        Top blocking call sites per endpoint.
+
+        Returns:
+            Dict with totals and, per route, call sites ordered by total stall time
+        """
+        routes: Dict[str, List[Dict[str, Any]]] = {}
+        for (route, call_site), site in self.sites.items():
+            routes.setdefault(route, []).append({
+                "call_site": call_site,
+                "blocked_in": site["blocked_in"],
+                "count": site["count"],
+                "total_ms": round(site["total_seconds"] * 1000, 1),
+                "max_ms": round(site["max_seconds"] * 1000, 1),
+            })
+
+        ordered = sorted(routes.items(), key=lambda item: -sum(s["total_ms"] for s in item[1]))
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "stalls": self.stalls,
+            "stall_ms": round(self.stall_seconds * 1000, 1),
+            "routes": {
+                route: sorted(sites, key=lambda s: -s["total_ms"])[:top]
+                for route, sites in ordered
+            },
+        }
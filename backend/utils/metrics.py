@@ -0,0 +1,321 @@
+"""
+Application metrics in Prometheus text format.
+
+A small in-process registry (counters, gauges, histograms) and the
+collectors that feed it:
+
+- MetricsMiddleware: per-route request count by status, latency
+  histogram and in-flight gauge
+- LoopLagMonitor: event loop scheduling lag
+- MongoPoolListener: Motor connection pool usage
+- track_provider_call / instrument_boto3_client: latency of OpenAI,
+  SendGrid and S3 calls
+- executor queue depth (Motor's and the loop's default executor),
+  sampled when metrics are rendered
+
+Routes are labelled by their template ("/api/jobs/{job_id}"), never the
+raw path, so the number of series stays bounded.
+"""
+
+import time
+import bisect
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Tuple, List, Callable, Optional
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Request latency buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Provider calls are slower; wider buckets
+PROVIDER_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for values, total in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, values)} {total}")
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, *label_values: str, value: float):
+        with self._lock:
+            self._values[label_values] = value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, *label_values: str, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for values, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, values)} {round(series[-1], 6)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, values)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and callbacks sampled at render time"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def add_collector(self, collect: Callable[[], None]):
+        """Register a callback that updates gauges just before rendering"""
+        self._collectors.append(collect)
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        for collect in self._collectors:
+            try:
+                collect()
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {e}")
+
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests being served")
+event_loop_lag_seconds = registry.histogram(
+    "event_loop_lag_seconds", "Delay between when a loop callback was due and when it ran")
+executor_queue_depth = registry.gauge(
+    "executor_queue_depth", "Work items waiting for an executor thread", ("executor",))
+mongo_pool_connections = registry.gauge(
+    "mongo_pool_connections", "Open MongoDB connections")
+mongo_pool_checked_out = registry.gauge(
+    "mongo_pool_checked_out", "MongoDB connections currently checked out")
+mongo_pool_checkout_failures_total = registry.counter(
+    "mongo_pool_checkout_failures_total", "Failed MongoDB connection checkouts", ("reason",))
+provider_call_duration_seconds = registry.histogram(
+    "provider_call_duration_seconds", "External provider call latency",
+    ("provider", "operation", "outcome"), buckets=PROVIDER_BUCKETS)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request count, latency and in-flight requests"""
+
+    def __init__(self, app, exclude_paths: Tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = exclude_paths
+        self._in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self._in_flight += 1
+        http_requests_in_flight.set(value=self._in_flight)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self._in_flight -= 1
+            http_requests_in_flight.set(value=self._in_flight)
+
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            http_requests_total.inc(method, route, str(status_code))
+            http_request_duration_seconds.observe(method, route, value=time.perf_counter() - started)
+
+
+class LoopLagMonitor:
+    """Measures event loop lag by timing a periodic sleep against its deadline"""
+
+    def __init__(self, interval_seconds: float = 0.5):
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            due = loop.time() + self.interval_seconds
+            await asyncio.sleep(self.interval_seconds)
+            event_loop_lag_seconds.observe(value=max(0.0, loop.time() - due))
+
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """Tracks open and checked-out connections across Motor's pools"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open = 0
+        self._checked_out = 0
+
+    def _adjust(self, open_delta: int = 0, checked_out_delta: int = 0):
+        with self._lock:
+            self._open += open_delta
+            self._checked_out += checked_out_delta
+            mongo_pool_connections.set(value=self._open)
+            mongo_pool_checked_out.set(value=self._checked_out)
+
+    def connection_created(self, event):
+        self._adjust(open_delta=1)
+
+    def connection_closed(self, event):
+        self._adjust(open_delta=-1)
+
+    def connection_checked_out(self, event):
+        self._adjust(checked_out_delta=1)
+
+    def connection_checked_in(self, event):
+        self._adjust(checked_out_delta=-1)
+
+    def connection_check_out_failed(self, event):
+        mongo_pool_checkout_failures_total.inc(str(event.reason))
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+
+@contextmanager
+def track_provider_call(provider: str, operation: str):
+    """Time an external provider call; wraps sync calls and awaits alike"""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        provider_call_duration_seconds.observe(provider, operation, outcome, value=time.perf_counter() - started)
+
+
+def instrument_boto3_client(client, provider: str = "s3"):
+    """Time every API call made through a boto3 client via its event hooks"""
+
+    def before_call(context, **kwargs):
+        context["metrics_started"] = time.perf_counter()
+
+    def observe(context, operation: str, outcome: str):
+        started = context.pop("metrics_started", None)
+        if started is not None:
+            provider_call_duration_seconds.observe(provider, operation, outcome, value=time.perf_counter() - started)
+
+    def after_call(context, model, http_response=None, **kwargs):
+        failed = http_response is not None and http_response.status_code >= 300
+        observe(context, model.name, "error" if failed else "ok")
+
+    def after_call_error(context, event_name, **kwargs):
+        # Emitted without the operation model: "after-call-error.<service>.<Operation>"
+        observe(context, event_name.rsplit(".", 1)[-1], "error")
+
+    client.meta.events.register(f"before-call.{provider}", before_call)
+    client.meta.events.register(f"after-call.{provider}", after_call)
+    client.meta.events.register(f"after-call-error.{provider}", after_call_error)
+
+
+def watch_executor_queue(name: str, get_executor: Callable[[], object]):
+    """Sample a ThreadPoolExecutor's pending work queue when metrics are rendered"""
+
+    def collect():
+        executor = get_executor()
+        work_queue = getattr(executor, "_work_queue", None)
+        executor_queue_depth.set(name, value=work_queue.qsize() if work_queue is not None else 0)
+
+    registry.add_collector(collect)
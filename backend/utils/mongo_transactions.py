@@ -0,0 +1,40 @@
+"""
+MongoDB transaction support detection.
+
+Multi-document transactions need a replica set or a sharded cluster.
+Standalone servers (typical for local development) don't support them,
+so services check supports_transactions() and fall back to another
+strategy (e.g. an outbox) when it returns False.
+"""
+
+import logging
+from typing import Dict
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+# Cached per client - topology doesn't change while the app runs
+_transaction_support: Dict[int, bool] = {}
+
+
+async def supports_transactions(db: AsyncIOMotorDatabase) -> bool:
+    """
+    Check whether the server behind db supports multi-document transactions.
+
+    Returns:
+        True for replica set members and mongos routers, False otherwise
+    """
+    key = id(db.client)
+    if key not in _transaction_support:
+        try:
+            hello = await db.client.admin.command("isMaster")
+            _transaction_support[key] = bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
+        except Exception as e:
+            logger.warning(f"Could not detect transaction support, assuming none: {e}")
+            _transaction_support[key] = False
+
+        logger.info(
+            f"MongoDB transactions {'available' if _transaction_support[key] else 'unavailable'}"
+        )
+
+    return _transaction_support[key]
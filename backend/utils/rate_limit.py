@@ -0,0 +1,39 @@
+"""
+Async token bucket rate limiter.
+
+Caps how often an operation runs (e.g. calls to an external provider)
+across all tasks in the process:
+
+    limiter = TokenBucket(rate=20, capacity=20)
+    await limiter.acquire()
+    await provider.call()
+"""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        # The lock makes waiters queue in order instead of racing for tokens
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
@@ -0,0 +1,184 @@
+"""
+Offline ZIP code centroids.
+
+data/zip_centroids.npy holds one record per ZIP (ZCTA): zip as uint32,
+lat and lon as float32, sorted by zip. 12 bytes per ZIP, about 400 KB
+for the ~33k US ZCTAs. It is built from the Census Gazetteer file by
+build_zip_centroids.py, which is a build step: the file is generated at
+deploy time (ops/deploy-production.sh, from ZIP_GAZETTEER_FILE), not
+committed.
+
+Environment:
+    ZIP_CENTROIDS_PATH      Table file (default backend/data/zip_centroids.npy)
+    ZIP_CENTROIDS_REQUIRED  "true" to refuse to start without the table;
+                            by default a missing table is logged as an error
+                            and the ZIP fallback is simply unavailable
+
+The table is memory-mapped on first use, so it costs nothing until
+needed and the pages are shared by every worker process. Lookups are a
+binary search; radius queries are a vectorized bounding box plus
+haversine over the table, with no network involved.
+
+Use it where ZIP-level precision is enough (a mile or two in cities,
+more in rural ZIPs): a fallback when geocoding fails, approximate
+distances, and ZIP-radius queries such as
+{"address.zip": {"$in": zips_within(lat, lon, 25)}}, which use the
+jobs address.zip index.
+"""
+
+import os
+import logging
+import threading
+from typing import Optional, Tuple, List
+
+import numpy as np
+
+from utils.geo import bounding_box, haversine_array
+
+logger = logging.getLogger(__name__)
+
+ZIP_CENTROIDS_PATH = os.getenv(
+    "ZIP_CENTROIDS_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "zip_centroids.npy")
+)
+
+# Refuse to start without the table (off by default: the table only backs fallbacks)
+ZIP_CENTROIDS_REQUIRED = os.getenv("ZIP_CENTROIDS_REQUIRED", "false").lower() == "true"
+
+ZIP_CENTROID_DTYPE = np.dtype([("zip", "<u4"), ("lat", "<f4"), ("lon", "<f4")])
+
+
+def parse_zip(zip_code) -> Optional[int]:
+    """First five digits of a ZIP (accepts ZIP+4 and ints), or None"""
+    if zip_code is None:
+        return None
+    if isinstance(zip_code, int):
+        return zip_code if 0 <= zip_code <= 99999 else None
+    digits = str(zip_code).strip()[:5]
+    return int(digits) if len(digits) == 5 and digits.isdigit() else None
+
+
+def format_zip(zip_number: int) -> str:
+    return f"{int(zip_number):05d}"
+
+
+class ZipCentroids:
+    """Lazily memory-mapped ZIP -> centroid table"""
+
+    def __init__(self, path: str = ZIP_CENTROIDS_PATH):
+        self.path = path
+        self._table: Optional[np.ndarray] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def table(self) -> Optional[np.ndarray]:
+        """The table, mapped on first access; None if the file is missing"""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    try:
+                        self._table = np.load(self.path, mmap_mode="r")
+                        if self._table.dtype != ZIP_CENTROID_DTYPE:
+                            raise ValueError(f"unexpected dtype {self._table.dtype}")
+                        logger.info(f"ZIP centroids mapped: {len(self._table)} ZIPs from {self.path}")
+                    except (OSError, ValueError) as e:
+                        logger.warning(f"ZIP centroid table unavailable ({self.path}): {e}")
+                        self._table = None
+                    self._loaded = True
+        return self._table
+
+    @property
+    def available(self) -> bool:
+        return self.table is not None
+
+    def lookup(self, zip_code) -> Optional[Tuple[float, float]]:
+        """
+        Centroid of a ZIP.
+
+        Returns:
+            (latitude, longitude), or None if the ZIP is unknown
+        """
+        table = self.table
+        zip_number = parse_zip(zip_code)
+        if table is None or zip_number is None:
+            return None
+
+        index = int(np.searchsorted(table["zip"], zip_number))
+        if index >= len(table) or table["zip"][index] != zip_number:
+            return None
+        record = table[index]
+        return float(record["lat"]), float(record["lon"])
+
+    def within(self, lat: float, lon: float, radius_miles: float) -> List[Tuple[str, float]]:
+        """
+        ZIPs whose centroid is within radius_miles of a point.
+
+        Returns:
+            [(zip, distance_miles)] sorted by distance
+        """
+        table = self.table
+        if table is None:
+            return []
+
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_miles)
+        lats, lons = table["lat"], table["lon"]
+        candidates = np.nonzero((lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon))[0]
+        if not len(candidates):
+            return []
+
+        distances = haversine_array(lat, lon, lats[candidates], lons[candidates])
+
+        inside = distances <= radius_miles
+        order = np.argsort(distances[inside])
+        zips = table["zip"][candidates][inside][order]
+        return [(format_zip(z), round(float(d), 2)) for z, d in zip(zips, distances[inside][order])]
+
+
+zip_centroids = ZipCentroids()
+
+
+def check_zip_centroids():
+    """
+    Startup check for the table file: logs an error if it is missing.
+
+    Raises:
+        RuntimeError: If the table is missing or unreadable and
+            ZIP_CENTROIDS_REQUIRED is set
+    """
+    if zip_centroids.available:
+        return
+    message = (
+        f"ZIP centroid table missing or unreadable at {zip_centroids.path}; "
+        f"build it with: python backend/build_zip_centroids.py <gazetteer file>"
+    )
+    if ZIP_CENTROIDS_REQUIRED:
+        raise RuntimeError(message)
+    logger.error(f"{message} (ZIP fallback and ZIP-radius queries are disabled)")
+
+
+def zip_centroid(zip_code) -> Optional[Tuple[float, float]]:
+    """(latitude, longitude) of a ZIP from the bundled table, or None"""
+    return zip_centroids.lookup(zip_code)
+
+
+def zips_within(lat: float, lon: float, radius_miles: float) -> List[str]:
+    """ZIPs within radius_miles of a point, nearest first"""
+    return [zip_code for zip_code, _ in zip_centroids.within(lat, lon, radius_miles)]
+
+
+def write_zip_centroids(records: List[Tuple[int, float, float]], path: str = ZIP_CENTROIDS_PATH) -> int:
+    """
+    Write the table file from (zip, lat, lon) records.
+
+    Returns:
+        Number of ZIPs written (duplicates keep the last record)
+    """
+    by_zip = {int(zip_number): (lat, lon) for zip_number, lat, lon in records}
+    table = np.empty(len(by_zip), dtype=ZIP_CENTROID_DTYPE)
+    for index, zip_number in enumerate(sorted(by_zip)):
+        table[index] = (zip_number, *by_zip[zip_number])
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.save(path, table)
+    return len(table)
@@ -65,6 +65,17 @@ log "🚀 Step 3: Starting Backend API in screen session"
 
 cd /srv/handyman-app/Handyman-app-main
 
+# Offline ZIP centroid table (ZIP fallback for geocoding; optional unless
+# ZIP_CENTROIDS_REQUIRED=true)
+if [ ! -f backend/data/zip_centroids.npy ]; then
+    if [ -n "$ZIP_GAZETTEER_FILE" ]; then
+        venv/bin/python3 backend/build_zip_centroids.py "$ZIP_GAZETTEER_FILE"
+        log "   ✅ ZIP centroid table built"
+    else
+        warning "   backend/data/zip_centroids.npy missing; set ZIP_GAZETTEER_FILE to the Census ZCTA Gazetteer file to build it"
+    fi
+fi
+
 # Create screen session and run backend
 screen -dmS handyman-backend bash -c "
     source venv/bin/activate